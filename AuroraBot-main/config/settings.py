@@ -15,10 +15,12 @@ SRC_DIR = PROJECT_ROOT / "src"
 CONFIG_DIR = PROJECT_ROOT / "config"
 ASSETS_DIR = PROJECT_ROOT / "assets"
 LOGS_DIR = PROJECT_ROOT / "logs"
+DATA_DIR = PROJECT_ROOT / "data"
 
 # Crear directorios si no existen
 LOGS_DIR.mkdir(exist_ok=True)
 ASSETS_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(exist_ok=True)
 
 # ============== CONFIGURACIÓN DE IA ==============
 ASSISTANT_NAME = "Aurora"
@@ -48,6 +50,87 @@ LISTEN_TIMEOUT = 5
 PHRASE_TIME_LIMIT = 10
 AMBIENT_NOISE_DURATION = 1
 
+# Captura continua: el micrófono se abre una vez y alimenta un buffer circular
+MIC_DEVICE_INDEX = int(os.getenv("MIC_DEVICE_INDEX")) if os.getenv("MIC_DEVICE_INDEX") else None
+CAPTURE_CHUNK = 1024           # muestras por bloque leído del dispositivo
+CAPTURE_BUFFER_SECONDS = 10    # audio reciente que conserva el buffer circular
+CAPTURE_MAX_FRASES = 8         # frases segmentadas en espera de reconocimiento
+COMMAND_QUEUE_SIZE = 4         # comandos reconocidos en espera de procesarse (modo voz)
+
+# Calibración de ruido: se mide una vez por sesión (AMBIENT_NOISE_DURATION, sin
+# bloquear la escucha), luego se sigue el piso de ruido con los bloques sin voz
+# y se guarda por dispositivo para arrancar ya calibrado
+CALIBRATION_FILE = DATA_DIR / "calibracion_audio.json"
+ENERGY_RATIO = 2.0             # umbral de voz = piso de ruido x ENERGY_RATIO
+ENERGY_MIN_THRESHOLD = 300     # umbral mínimo (micrófonos muy silenciosos)
+# Supresión de ruido (opcional): el espectro del ruido se aprende en la misma
+# calibración y se atenúa en cada frase antes de reconocerla
+NOISE_SUPPRESSION = os.getenv("NOISE_SUPPRESSION", "0") == "1"
+NOISE_REDUCTION_DB = float(os.getenv("NOISE_REDUCTION_DB", "12"))  # atenuación del ruido
+
+# Detección de actividad de voz (VAD) por marcos: energía + forma del espectro
+VAD_FRAME_MS = 20              # duración de cada marco analizado
+VAD_ONSET_MS = 60              # voz continua necesaria para abrir una frase
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "300"))  # audio previo que se antepone a cada frase
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "200"))  # silencio que cierra la frase
+VAD_MIN_VOICE_MS = 150         # frases con menos voz que esto se descartan (clics, golpes)
+VAD_SPEECH_BAND_MIN = 0.25     # fracción mínima de energía en 300-3400 Hz
+VAD_FLATNESS_MAX = 0.5         # planitud espectral máxima (el ruido blanco es ~1)
+
+# Barge-in: se escucha mientras Aura habla y la voz del usuario corta el TTS.
+# El eco del parlante se cancela (WAV) o se exige superarlo (MP3)
+BARGE_IN = os.getenv("BARGE_IN", "1") == "1"
+ECHO_RATIO = 2.0               # voz del usuario >= eco residual x ECHO_RATIO
+ECHO_FILTER_TAPS = 256         # largo del filtro adaptativo (muestras)
+ECHO_NLMS_MU = 0.5             # paso de adaptación del filtro
+ECHO_MAX_DELAY_MS = 500        # retardo máximo parlante -> micrófono
+ECHO_TAIL_MS = 300             # el eco sigue llegando este tiempo tras cortar el audio
+
+# Reconocimiento de voz (ASR): "auto" compite Google contra el motor local
+# (si hay modelo) y usa el primero que responda; "google" o "vosk" fuerzan uno
+ASR_BACKEND = os.getenv("ASR_BACKEND", "auto")
+VOSK_MODEL = os.getenv("VOSK_MODEL", "")  # carpeta de un modelo Vosk (p. ej. vosk-model-small-es-0.42)
+ASR_TIMEOUT = float(os.getenv("ASR_TIMEOUT", "8"))  # segundos máximos por frase
+# Despacho anticipado: con hipótesis parciales, "busca en youtube X" se ejecuta
+# sin esperar el cierre de la frase ni el reconocimiento final si el texto no
+# cambia y hay una pausa de PARTIAL_STABLE_MS (menor que VAD_HANGOVER_MS)
+EARLY_DISPATCH = os.getenv("EARLY_DISPATCH", "1") == "1"
+PARTIAL_STABLE_MS = int(os.getenv("PARTIAL_STABLE_MS", "120"))
+# Subida a la nube: la frase se recorta (silencio inicial y final, dejando un
+# margen para las consonantes débiles) y se envía mono a UPLOAD_SAMPLE_RATE
+UPLOAD_SAMPLE_RATE = int(os.getenv("UPLOAD_SAMPLE_RATE", "16000"))
+UPLOAD_TRIM_MARGIN_MS = int(os.getenv("UPLOAD_TRIM_MARGIN_MS", "150"))
+
+# Palabra clave: en modo voz continuo solo se reconoce (y se llama a la nube)
+# después de oírla; se detecta en local con Vosk o con plantillas grabadas
+WAKE_WORD = os.getenv("WAKE_WORD", "hola aura")
+WAKE_WORD_ENABLED = os.getenv("WAKE_WORD_ENABLED", "1") == "1"
+# auto = Vosk o plantillas (sin motor local la palabra clave se desactiva);
+# nube = reconocer en Google cada frase corta (hay que pedirlo explícitamente)
+WAKE_WORD_ENGINE = os.getenv("WAKE_WORD_ENGINE", "auto").lower()
+WAKE_TEMPLATES_DIR = DATA_DIR / "palabra_clave"  # plantillas de `python -m src.palabra_clave`
+WAKE_MAX_SECONDS = 2.5         # se busca la palabra clave al inicio de cada frase, en estos segundos
+WAKE_DTW_THRESHOLD = float(os.getenv("WAKE_DTW_THRESHOLD", "0.9"))  # distancia máxima con una sola plantilla
+WAKE_FOLLOWUP_SECONDS = 8      # tras una respuesta se escucha sin palabra clave este tiempo
+
+# Síntesis paralela: segmentos por oración sintetizados en un pool acotado
+TTS_SYNTH_WORKERS = int(os.getenv("TTS_SYNTH_WORKERS", "4"))
+TTS_SEGMENT_MAX_CHARS = 100  # gTTS corta internamente en ~100 caracteres
+
+# Motor TTS: "auto", "gtts", "offline", "espeak" o "piper"
+# En "auto" se usa el motor offline para acuses cortos o si gTTS está lento/caído
+TTS_BACKEND = os.getenv("TTS_BACKEND", "auto")
+TTS_OFFLINE_MAX_CHARS = int(os.getenv("TTS_OFFLINE_MAX_CHARS", "40"))
+TTS_GTTS_MAX_LATENCY = float(os.getenv("TTS_GTTS_MAX_LATENCY", "1.5"))  # segundos
+# Red de gTTS: una sesión HTTP con conexiones keep-alive compartida por toda la síntesis
+TTS_HTTP_POOL = int(os.getenv("TTS_HTTP_POOL", "4"))  # conexiones y descargas simultáneas
+TTS_HTTP_TIMEOUT = float(os.getenv("TTS_HTTP_TIMEOUT", "10"))  # segundos
+ESPEAK_VOICE = os.getenv("ESPEAK_VOICE", "es")
+PIPER_MODEL = os.getenv("PIPER_MODEL", "")  # ruta al modelo .onnx de Piper
+
+# Presupuesto de caracteres por enunciado hablado (el texto completo queda en el chat)
+TTS_MAX_CHARS_ENUNCIADO = int(os.getenv("TTS_MAX_CHARS_ENUNCIADO", "400"))
+
 # ============== CONFIGURACIÓN DE AUDIO ==============
 TEMP_AUDIO_FILE = "temp_audio.mp3"
 AUDIO_PLAYERS = {
@@ -55,6 +138,21 @@ AUDIO_PLAYERS = {
     "Darwin": "afplay",
     "Linux": ["mpg123", "ffplay -nodisp -autoexit", "vlc --play-and-exit"]
 }
+# mpg123 no reproduce WAV (motores offline)
+AUDIO_PLAYERS_WAV = {
+    "Linux": ["aplay -q", "ffplay -nodisp -autoexit", "vlc --play-and-exit"]
+}
+# Reproductores que leen de stdin (reproducción continua de varios segmentos)
+AUDIO_STREAM_PLAYERS = {
+    "Darwin": {
+        "mp3": ["ffplay -nodisp -autoexit -loglevel quiet -i -"],
+        "wav": ["ffplay -nodisp -autoexit -loglevel quiet -i -"],
+    },
+    "Linux": {
+        "mp3": ["mpg123 -q -", "ffplay -nodisp -autoexit -loglevel quiet -i -"],
+        "wav": ["aplay -q -", "ffplay -nodisp -autoexit -loglevel quiet -i -"],
+    },
+}
 
 # ============== CONFIGURACIÓN DE SISTEMA ==============
 CURRENT_OS = platform.system()
@@ -128,6 +226,14 @@ EXIT_COMMANDS = [
     "salir", "exit", "quit", "eso es todo"
 ]
 
+# ============== CLASIFICADOR DE INTENCIONES ==============
+# Comandos sin disparador explícito ("ponme música de Queen") se clasifican en
+# local con un modelo entrenado sobre INTENT_CORPUS; solo si la confianza
+# llega a INTENT_CONFIDENCE se resuelven sin la IA
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "1") == "1"
+INTENT_CORPUS = DATA_DIR / "intenciones.tsv"
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.8"))
+
 # ============== CONFIGURACIÓN DE INTERFAZ ==============
 WINDOW_TITLE = f"{ASSISTANT_NAME} - Asistente IA"
 WINDOW_WIDTH = 1100
@@ -160,9 +266,16 @@ def get_programas_for_os():
     return PROGRAMAS_CONFIG.get(CURRENT_OS, {})
 
 
-def get_audio_player():
+def get_audio_player(formato="mp3"):
     """Retorna el comando del reproductor de audio para el OS actual"""
     player = AUDIO_PLAYERS.get(CURRENT_OS)
+    if formato == "wav":
+        player = AUDIO_PLAYERS_WAV.get(CURRENT_OS, player)
     if isinstance(player, list):
         return player
-    return [player] if player else []
\ No newline at end of file
+    return [player] if player else []
+
+
+def get_audio_stream_player(formato="mp3"):
+    """Retorna los reproductores capaces de leer audio por stdin para el OS actual"""
+    return AUDIO_STREAM_PLAYERS.get(CURRENT_OS, {}).get(formato, [])
\ No newline at end of file
@@ -1,7 +1,7 @@
 # main.py
-import speech_recognition as sr
 from gtts import gTTS
 import os
+import time
 import random
 
 
@@ -9,6 +9,14 @@ import cerebro_ia
 import habilidades_web
 import habilidades_sistema
 
+from config.settings import WAKE_WORD
+from src.captura import ServicioCaptura, FuenteMicrofono, PRIORIDAD_FONDO, PRIORIDAD_PULSAR
+from src.palabra_clave import get_detector_palabra_clave
+from src.reconocimiento import reconocer_frase
+
+# Un solo dueño del micrófono para la palabra clave y los comandos
+captura = ServicioCaptura(FuenteMicrofono(device_index=4))
+
 def hablar(texto):
     print(f"Aura: {texto}")
     try:
@@ -20,60 +28,88 @@ def hablar(texto):
         print(f"Ocurrió un error con la voz (gTTS): {e}.")
 
 def escuchar(prompt="...", timeout=7):
-    r = sr.Recognizer()
-    with sr.Microphone(device_index=4) as source:
-        print(prompt)
-        r.pause_threshold = 0.8
-        try:
-            audio = r.listen(source, timeout=timeout, phrase_time_limit=5)
-            print("Procesando tu voz...")
-            query = r.recognize_google(audio, language='es-SV')
-            print(f"Tú dijiste: {query}\n")
-            return query.lower()
-        except sr.WaitTimeoutError: return "timeout"
-        except Exception: return "error"
+    print(prompt)
+    desde = time.monotonic()  # lo que sonó antes (la propia voz de Aura) no cuenta
+    try:
+        captura.iniciar()
+        with captura.adquirir("escuchar", PRIORIDAD_PULSAR) as concesion:
+            frase = concesion.siguiente_frase(timeout=timeout, desde=desde)
+        if frase is None:
+            return "timeout"
+        print("Procesando tu voz...")
+        query = reconocer_frase(frase)
+        if not query:
+            return "error"
+        print(f"Tú dijiste: {query}\n")
+        return query.lower()
+    except Exception: return "error"
+
+def esperar_palabra_clave(prompt="..."):
+    # Detección local: no se envía nada a Google hasta oír la palabra clave
+    detector = get_detector_palabra_clave()
+    if not detector.disponible:
+        # Sin Vosk ni plantillas no hay palabra clave: cada frase es un comando
+        return escuchar(prompt, timeout=None)
+    print(prompt)
+    try:
+        captura.iniciar()
+        deteccion = None
+        with captura.adquirir("palabra clave", PRIORIDAD_FONDO) as concesion:
+            while deteccion is None:
+                deteccion = detector.esperar(concesion)
+        return detector.comando(deteccion) or ""
+    except Exception as e:
+        print(f"Error del micrófono: {e}")
+        return "error"
 
 def escuchar_confirmacion():
     respuesta = escuchar("Esperando confirmación (sí/no)...", timeout=4)
     return "sí" in respuesta or "claro" in respuesta
 
 if __name__ == "__main__":
-    PALABRA_CLAVE = "hola aura"
+    PALABRA_CLAVE = WAKE_WORD
     hablar(f"Sistema Aura iniciado. Di '{PALABRA_CLAVE}' para comenzar.")
 
     while True:
-        comando_inicial = escuchar(f"Esperando '{PALABRA_CLAVE}'...", timeout=10)
+        comando_inicial = esperar_palabra_clave(f"Esperando '{PALABRA_CLAVE}'...")
+
+        if comando_inicial == "error":
+            time.sleep(1)
+            continue
 
-        if PALABRA_CLAVE in comando_inicial:
+        if comando_inicial:
+            # Comando dicho en la misma frase ("hola aura, abre firefox")
+            comando = comando_inicial
+        else:
             hablar("¡Hola! Soy Aura. ¿En qué te puedo ayudar?")
             comando = escuchar()
 
-            if comando in ["error", "timeout"]:
-                hablar("Disculpa, no te entendí bien. ¿Podrías repetirlo?")
-                continue
-
-            if 'adiós' in comando:
-                hablar("¡Claro! Que tengas un día genial.")
-                break
-            
-            elif 'abrir' in comando:
-                habilidades_sistema.abrir_programa(comando, hablar, escuchar_confirmacion)
-            elif 'volumen a' in comando:
-                habilidades_sistema.ajustar_volumen(comando, hablar)
-            elif 'vaciar papelera' in comando:
-                habilidades_sistema.vaciar_papelera(hablar, escuchar_confirmacion)
-            elif 'borra el archivo' in comando:
-                habilidades_sistema.mover_a_papelera(comando, hablar, escuchar_confirmacion)
-            elif 'busca el archivo' in comando:
-                habilidades_sistema.buscar_archivo(comando, hablar)
-
-            elif 'busca en google' in comando:
-                habilidades_web.buscar_en_google(comando, hablar)
-            elif 'busca en youtube' in comando:
-                habilidades_web.buscar_en_youtube(comando, hablar)
-            elif 'clima' in comando:
-                habilidades_web.buscar_clima(comando, hablar)
-
-            else:
-                respuesta = cerebro_ia.generar_respuesta(comando)
-                hablar(respuesta)
\ No newline at end of file
+        if comando in ["error", "timeout"]:
+            hablar("Disculpa, no te entendí bien. ¿Podrías repetirlo?")
+            continue
+
+        if 'adiós' in comando:
+            hablar("¡Claro! Que tengas un día genial.")
+            break
+        
+        elif 'abrir' in comando:
+            habilidades_sistema.abrir_programa(comando, hablar, escuchar_confirmacion)
+        elif 'volumen a' in comando:
+            habilidades_sistema.ajustar_volumen(comando, hablar)
+        elif 'vaciar papelera' in comando:
+            habilidades_sistema.vaciar_papelera(hablar, escuchar_confirmacion)
+        elif 'borra el archivo' in comando:
+            habilidades_sistema.mover_a_papelera(comando, hablar, escuchar_confirmacion)
+        elif 'busca el archivo' in comando:
+            habilidades_sistema.buscar_archivo(comando, hablar)
+
+        elif 'busca en google' in comando:
+            habilidades_web.buscar_en_google(comando, hablar)
+        elif 'busca en youtube' in comando:
+            habilidades_web.buscar_en_youtube(comando, hablar)
+        elif 'clima' in comando:
+            habilidades_web.buscar_clima(comando, hablar)
+
+        else:
+            respuesta = cerebro_ia.generar_respuesta(comando)
+            hablar(respuesta)
\ No newline at end of file
@@ -1,11 +1,27 @@
 """
 Paquete principal de Aura - Asistente de IA
+Los módulos de habilidades se importan al usar sus funciones por primera
+vez (ver src.habilidades), no al importar el paquete.
 """
+import importlib
+
 from .cerebro_ia import generar_respuesta, verificar_conexion, obtener_info_api
-from .habilidades_sistema import abrir_programa, listar_programas_disponibles
-from .habilidades_web import abrir_pagina_web, buscar_en_google, listar_atajos_web
 from .main import hablar, escuchar, procesar_comando, modo_terminal, test_sistema
 
+_PEREZOSOS = {
+    "abrir_programa": ".habilidades_sistema",
+    "listar_programas_disponibles": ".habilidades_sistema",
+    "abrir_pagina_web": ".habilidades_web",
+    "buscar_en_google": ".habilidades_web",
+    "listar_atajos_web": ".habilidades_web",
+}
+
+
+def __getattr__(nombre):
+    if nombre in _PEREZOSOS:
+        return getattr(importlib.import_module(_PEREZOSOS[nombre], __name__), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
 __all__ = [
     # Cerebro IA
     "generar_respuesta",
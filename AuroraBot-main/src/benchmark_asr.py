@@ -0,0 +1,567 @@
+"""
+Banco de pruebas del reconocimiento de Aura - Sin micrófono ni red
+Reproduce grabaciones WAV/FLAC como un micrófono virtual a través de la
+misma captura, VAD y reconocimiento que usa escuchar(), con un reconocedor
+simulado u offline, y mide la latencia por etapa (calibración, fin de voz,
+reconocimiento), el WER contra las transcripciones de referencia y con qué
+frecuencia se recortó el inicio de la voz. Con --supresion repite la
+corrida con la supresión de ruido y compara los fallos de reconocimiento
+(frases con voz que el motor no entendió) y el costo de la supresión.
+Solo un motor real (--motor google o vosk) sobre grabaciones mide si la
+supresión mejora el reconocimiento; con el reconocedor simulado y
+--snr-minima la comparación es un chequeo sintético de SNR, que la
+supresión sube por construcción.
+
+Fixtures: una carpeta con audios (.wav, .flac, .aiff) y, junto a cada uno,
+un .txt con el mismo nombre y la transcripción de referencia. Sin carpeta
+se generan fixtures sintéticos (voz armónica sobre ruido, con una
+consonante inicial débil) cuyo inicio y fin de voz se conocen.
+
+Uso:
+    python -m src.benchmark_asr
+    python -m src.benchmark_asr --fixtures grabaciones/ --motor vosk
+    python -m src.benchmark_asr --fixtures grabaciones/ --motor google --velocidad 1
+    python -m src.benchmark_asr --json logs/benchmark_asr.jsonl
+    python -m src.benchmark_asr --supresion --ruido 8 --snr-minima 15
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+import numpy as np
+import speech_recognition as sr
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.captura import FuenteAudio, ServicioCaptura
+from src.calibracion import PisoRuido
+from src.palabra_clave import normalizar
+from src.vad import pcm_a_float, float_a_pcm
+from src.supresion_ruido import suprimir_ruido
+from src.reconocimiento import (
+    ReconocedorASR, TranscriptorStreaming, MOTORES, VoskASR, reconocer_frase, ErrorReconocimiento
+)
+from src.benchmark_voz import resumir
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES = {".wav", ".flac", ".aiff", ".aif"}
+SILENCIO_FINAL = 1.0   # segundos agregados al final de cada fixture (para cerrar la frase)
+TOLERANCIA_RECORTE = 0.01  # segundos: la frase empieza después de la voz = inicio recortado
+
+COMANDOS = [
+    "busca en google el clima de mañana",
+    "abre firefox",
+    "pon en youtube música para estudiar",
+    "qué hora es",
+    "resume la fotosíntesis",
+    "busca en youtube recetas de pasta",
+]
+
+
+# ============== MICRÓFONO VIRTUAL ==============
+class FuenteWAV(FuenteAudio):
+    """
+    Micrófono virtual: entrega el PCM de una grabación en bloques, al
+    ritmo real o acelerado, y lleva la cuenta de la posición reproducida
+    """
+
+    def __init__(self, pcm, frecuencia, ancho_muestra=2, nombre="replay",
+                 bloque=None, velocidad=0.0, silencio_final=SILENCIO_FINAL):
+        """
+        Args:
+            pcm: Audio PCM mono
+            frecuencia: Frecuencia de muestreo
+            ancho_muestra: Bytes por muestra
+            nombre: Nombre del dispositivo (clave del piso de ruido)
+            bloque: Muestras por lectura (por defecto las del micrófono real)
+            velocidad: 1 = tiempo real, 2 = el doble de rápido, 0 = sin esperas
+            silencio_final: Segundos de silencio agregados al final
+        """
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.nombre = nombre
+        self.bloque = bloque or self.bloque
+        self.velocidad = velocidad
+        self.pcm = pcm + b"\0" * (int(silencio_final * frecuencia) * ancho_muestra)
+        self._pos = 0
+        self._t0 = None
+
+    @classmethod
+    def desde_archivo(cls, ruta, **kwargs):
+        """Abre un WAV/FLAC/AIFF con SpeechRecognition (convierte a mono)"""
+        with sr.AudioFile(str(ruta)) as archivo:
+            pcm = archivo.stream.read()
+            return cls(pcm, archivo.SAMPLE_RATE, archivo.SAMPLE_WIDTH, nombre=f"replay:{Path(ruta).name}", **kwargs)
+
+    @property
+    def posicion(self) -> float:
+        """Segundos de audio ya entregados a la captura"""
+        return self._pos / (self.frecuencia * self.ancho_muestra)
+
+    def abrir(self):
+        self._pos = 0
+        self._t0 = time.monotonic()
+
+    def leer(self) -> bytes:
+        bytes_bloque = self.bloque * self.ancho_muestra
+        datos = self.pcm[self._pos:self._pos + bytes_bloque]
+        if self.velocidad > 0 and datos:
+            # Como un micrófono: el bloque está listo cuando terminó de "sonar"
+            listo = self._t0 + (self._pos + len(datos)) / (self.frecuencia * self.ancho_muestra) / self.velocidad
+            espera = listo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        self._pos += len(datos)
+        return datos
+
+
+class PisoRuidoReplay(PisoRuido):
+    """Piso de ruido sin persistencia que anota cuándo terminó la calibración"""
+
+    def __init__(self, fuente):
+        super().__init__(fuente.nombre)
+        self.piso = None  # cada fixture calibra desde cero
+        self.fuente = fuente
+        self.calibrado_en = None  # posición del audio al terminar la calibración
+
+    def observar(self, rms, duracion, es_voz):
+        super().observar(rms, duracion, es_voz)
+        if self.calibrado_en is None and self.calibrado:
+            self.calibrado_en = self.fuente.posicion
+
+    def guardar(self):
+        pass
+
+
+# ============== RECONOCEDOR SIMULADO ==============
+class ReconocedorGuion(ReconocedorASR):
+    """
+    Reconocedor simulado: tras una latencia fija devuelve la transcripción
+    de referencia del fixture en curso. Aísla la captura y el VAD: el WER
+    que queda viene de frases partidas, perdidas o espurias.
+
+    Con snr_minima descarta las frases cuya SNR estimada (snr_estimada) es
+    menor: un chequeo sintético de SNR, no de precisión. La supresión de
+    ruido atenúa los marcos débiles y con eso sube esa SNR por
+    construcción, así que menos frases descartadas con supresión no dice
+    nada del reconocimiento; eso solo se mide con --motor google o vosk
+    sobre grabaciones.
+    """
+    nombre = "guion"
+    offline = True
+
+    def __init__(self, latencia=0.3, snr_minima=None):
+        self.latencia = latencia
+        self.snr_minima = snr_minima
+        self.texto = ""
+
+    def disponible(self) -> bool:
+        return True
+
+    def reconocer(self, frase):
+        time.sleep(self.latencia)
+        if self.snr_minima is not None and snr_estimada(frase.audio, frase.frecuencia,
+                                                        frase.ancho_muestra) < self.snr_minima:
+            return None
+        return self.texto or None
+
+
+def snr_estimada(pcm, frecuencia, ancho_muestra=2):
+    """
+    Relación señal/ruido de una frase sin referencia limpia: potencia de
+    sus marcos de 10 ms más fuertes (percentil 90) frente a la de los más
+    débiles (percentil 10), en dB
+    """
+    n = max(1, frecuencia // 100)
+    x = pcm_a_float(pcm, ancho_muestra)
+    marcos = x[:len(x) - len(x) % n].reshape(-1, n)
+    if len(marcos) < 2:
+        return float("inf")
+    potencia = np.mean(marcos * marcos, axis=1)
+    return float(10 * np.log10(np.percentile(potencia, 90) / max(np.percentile(potencia, 10), 1e-6)))
+
+
+# ============== FIXTURES ==============
+class Fixture:
+    """Grabación de prueba con su transcripción y los límites de la voz"""
+
+    def __init__(self, nombre, pcm, frecuencia, ancho_muestra, referencia, voz=None):
+        self.nombre = nombre
+        self.pcm = pcm
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.referencia = referencia
+        # (inicio, fin) de la voz en segundos; sin anotar se estima del audio completo
+        self.voz = voz or limites_voz(pcm, frecuencia, ancho_muestra)
+
+
+def limites_voz(pcm, frecuencia, ancho_muestra=2):
+    """
+    Inicio y fin de la voz mirando la grabación completa (no causal, a
+    diferencia del VAD): marcos de 10 ms con energía clara sobre el ruido
+
+    Returns:
+        tuple: (inicio, fin) en segundos, o None si no hay voz
+    """
+    n = max(1, frecuencia // 100)
+    x = pcm_a_float(pcm, ancho_muestra)
+    marcos = x[:len(x) - len(x) % n].reshape(-1, n)
+    if not len(marcos):
+        return None
+    rms = np.sqrt(np.mean(marcos * marcos, axis=1))
+    piso, pico = np.percentile(rms, 10), np.percentile(rms, 99)
+    voz = np.flatnonzero(rms > max(3 * piso, piso + 0.05 * (pico - piso)))
+    if not len(voz):
+        return None
+    return float(voz[0] * n / frecuencia), float((voz[-1] + 1) * n / frecuencia)
+
+
+def cargar_fixtures(carpeta):
+    """
+    Lee los audios de una carpeta y sus transcripciones (.txt homónimo)
+
+    Returns:
+        list: Fixture ordenados por nombre
+    """
+    fixtures = []
+    for ruta in sorted(Path(carpeta).iterdir()):
+        if ruta.suffix.lower() not in EXTENSIONES:
+            continue
+        transcripcion = ruta.with_suffix(".txt")
+        if not transcripcion.exists():
+            logger.warning(f"{ruta.name} sin transcripción ({transcripcion.name}), se omite")
+            continue
+        fuente = FuenteWAV.desde_archivo(ruta, silencio_final=0)
+        fixtures.append(Fixture(ruta.name, fuente.pcm, fuente.frecuencia, fuente.ancho_muestra,
+                                transcripcion.read_text(encoding="utf-8").strip()))
+    return fixtures
+
+
+def _voz_sintetica(n, frecuencia, f0, amplitud):
+    """Voz armónica con tono y sílabas variables"""
+    t = np.arange(n) / frecuencia
+    fase = 2 * np.pi * np.cumsum(f0 * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))) / frecuencia
+    x = sum(np.sin(k * fase) / k for k in range(1, 20))
+    x *= 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return amplitud * x / np.max(np.abs(x))
+
+
+def fixtures_sinteticos(cantidad=12, frecuencia=16000, semilla=0, ruido=1.0):
+    """
+    Fixtures generados: silencio con ruido, una consonante débil (por
+    debajo del umbral del VAD, la que el pre-roll debe conservar) y voz
+
+    Args:
+        cantidad: Número de fixtures
+        frecuencia: Frecuencia de muestreo
+        semilla: Semilla del generador
+        ruido: Escala del ruido de fondo (1 = oficina tranquila; con más,
+               se agrega el zumbido grave de un ventilador)
+
+    Returns:
+        list: Fixture con los límites de la voz exactos
+    """
+    rng = np.random.default_rng(semilla)
+    fixtures = []
+    for i in range(cantidad):
+        texto = COMANDOS[i % len(COMANDOS)]
+        nivel = rng.uniform(20, 120) * ruido
+        previo = rng.uniform(1.3, 2.0)
+        consonante = rng.uniform(0.05, 0.12)
+        voz = 0.35 + 0.07 * len(texto.split())
+        amplitud = rng.uniform(3000, 9000)
+
+        partes = [
+            np.zeros(int(previo * frecuencia)),
+            np.convolve(rng.standard_normal(int(consonante * frecuencia)), np.ones(4) / 4, "same") * amplitud / 12,
+            _voz_sintetica(int(voz * frecuencia), frecuencia, rng.uniform(110, 220), amplitud),
+            np.zeros(int(0.3 * frecuencia)),
+        ]
+        x = np.concatenate(partes)
+        x += rng.standard_normal(len(x)) * nivel
+        if ruido > 1:
+            t = np.arange(len(x)) / frecuencia
+            zumbido = np.convolve(rng.standard_normal(len(x)), np.ones(16) / 4, "same")
+            x += nivel * (zumbido + np.sin(2 * np.pi * rng.uniform(90, 130) * t))
+        fixtures.append(Fixture(f"sintetico_{i:02d}", float_a_pcm(x), frecuencia, 2, texto,
+                                voz=(previo, previo + consonante + voz)))
+    return fixtures
+
+
+# ============== MÉTRICAS ==============
+def errores_palabras(referencia, hipotesis):
+    """
+    Distancia de edición por palabras (sustituciones + borrados + inserciones)
+
+    Returns:
+        tuple: (errores, palabras de la referencia)
+    """
+    ref = normalizar(referencia).split()
+    hip = normalizar(hipotesis or "").split()
+    fila = list(range(len(hip) + 1))
+    for i, palabra in enumerate(ref, 1):
+        previa, fila[0] = fila[0], i
+        for j, otra in enumerate(hip, 1):
+            previa, fila[j] = fila[j], min(fila[j] + 1, fila[j - 1] + 1, previa + (palabra != otra))
+    return fila[-1], len(ref)
+
+
+# ============== EJECUCIÓN ==============
+def reproducir_fixture(fixture, motores, transcriptor=None, velocidad=0.0, supresion=False):
+    """
+    Pasa un fixture por captura → VAD → reconocimiento, como escuchar()
+
+    Args:
+        supresion: Suprimir el ruido de cada frase antes de reconocerla
+
+    Returns:
+        dict: Frases detectadas, texto reconocido y latencias del fixture
+    """
+    fuente = FuenteWAV(fixture.pcm, fixture.frecuencia, fixture.ancho_muestra,
+                       nombre=f"replay:{fixture.nombre}", velocidad=velocidad)
+    captura = ServicioCaptura(fuente)
+    captura.ruido = PisoRuidoReplay(fuente)
+
+    publicadas = {}  # id_frase -> (posición del audio, perf_counter) al cerrarse
+    lock = threading.Lock()
+
+    def al_segmentar(evento, id_frase, datos):
+        if evento == "fin" and datos:
+            with lock:
+                publicadas[id_frase] = (fuente.posicion, time.perf_counter())
+
+    captura.agregar_oyente(al_segmentar)
+    if transcriptor is not None:
+        captura.agregar_oyente(transcriptor.evento)
+
+    frases, textos = [], []
+    captura.iniciar()
+    try:
+        while True:
+            activo = captura.activo
+            frase = captura.siguiente_frase(timeout=0.05)
+            if frase is None:
+                if not activo:
+                    break
+                continue
+            costo = None
+            if supresion:
+                t0 = time.perf_counter()
+                limpia = suprimir_ruido(frase)
+                costo = (time.perf_counter() - t0) / frase.duracion
+            else:
+                limpia = frase
+            try:
+                texto = reconocer_frase(limpia, motores, transcriptor=transcriptor, limpiar=False)
+            except ErrorReconocimiento as e:
+                logger.warning(f"{fixture.nombre}: {e}")
+                texto = None
+            listo = time.perf_counter()
+            with lock:
+                posicion, cerrada = publicadas.get(frase.id, (None, listo))
+            frases.append({
+                "inicio": _ubicar(fuente.pcm, frase.audio, fixture.frecuencia, fixture.ancho_muestra),
+                "cierre": posicion,
+                "reconocimiento": listo - cerrada,
+                "texto": texto,
+                "supresion": costo,
+            })
+            if texto:
+                textos.append(texto)
+    finally:
+        captura.detener()
+        if transcriptor is not None:
+            captura.quitar_oyente(transcriptor.evento)
+
+    return {
+        "frases": frases,
+        "hipotesis": " ".join(textos),
+        "calibracion": captura.ruido.calibrado_en,
+    }
+
+
+def _ubicar(pcm, audio, frecuencia, ancho_muestra):
+    """Segundo del fixture donde empieza el audio de una frase (None si no aparece)"""
+    pos = pcm.find(audio)
+    while pos > 0 and pos % ancho_muestra:
+        pos = pcm.find(audio, pos + 1)
+    return pos / (frecuencia * ancho_muestra) if pos >= 0 else None
+
+
+def ejecutar_benchmark(fixtures, motor="guion", latencia=0.3, velocidad=0.0, modelo_vosk=None,
+                       supresion=False, snr_minima=None):
+    """
+    Reproduce todos los fixtures y agrega las métricas
+
+    Returns:
+        dict: Latencias por etapa (ms), WER, tasas de recorte y pérdida,
+              fallos de reconocimiento y costo de la supresión de ruido
+    """
+    if motor == "guion":
+        reconocedor = ReconocedorGuion(latencia, snr_minima)
+    elif motor == "vosk" and modelo_vosk:
+        reconocedor = VoskASR(modelo_vosk)
+    else:
+        reconocedor = MOTORES[motor]
+    if not reconocedor.disponible():
+        raise SystemExit(f"Motor ASR '{motor}' no disponible")
+    transcriptor = (TranscriptorStreaming(reconocedor, fixtures[0].frecuencia)
+                    if reconocedor.streaming and fixtures else None)
+
+    calibracion, fin_voz, reconocimiento, total = [], [], [], []
+    errores = palabras = recortadas = perdidas = espurias = fallos = 0
+    costos = []
+    detalle = []
+    for fixture in fixtures:
+        if isinstance(reconocedor, ReconocedorGuion):
+            reconocedor.texto = fixture.referencia
+        r = reproducir_fixture(fixture, [reconocedor], transcriptor, velocidad, supresion)
+        costos.extend(f["supresion"] for f in r["frases"] if f["supresion"] is not None)
+
+        if r["calibracion"] is not None:
+            calibracion.append(r["calibracion"])
+        e, n = errores_palabras(fixture.referencia, r["hipotesis"])
+        errores, palabras = errores + e, palabras + n
+
+        # La frase principal es la que contiene el inicio de la voz (o la primera después)
+        inicio_voz, fin = fixture.voz or (None, None)
+        principal = None
+        for frase in r["frases"]:
+            if inicio_voz is None or frase["inicio"] is None:
+                continue
+            if frase["cierre"] is not None and frase["cierre"] < inicio_voz:
+                espurias += 1
+            elif principal is None:
+                principal = frase
+        if principal is None:
+            perdidas += 1
+        else:
+            if principal["inicio"] > inicio_voz + TOLERANCIA_RECORTE:
+                recortadas += 1
+            if principal["cierre"] is not None:
+                fin_voz.append(max(0.0, principal["cierre"] - fin))
+                total.append(fin_voz[-1] + principal["reconocimiento"])
+            reconocimiento.append(principal["reconocimiento"])
+            if not principal["texto"]:
+                fallos += 1
+        detalle.append({"fixture": fixture.nombre, "referencia": fixture.referencia,
+                        "hipotesis": r["hipotesis"], "errores": e, "frases": len(r["frases"])})
+
+    con_voz = sum(1 for f in fixtures if f.voz)
+    return {
+        "calibracion": resumir(calibracion),
+        "fin_de_voz": resumir(fin_voz),
+        "reconocimiento": resumir(reconocimiento),
+        "total": resumir(total),
+        "wer": errores / palabras if palabras else float("nan"),
+        "recorte_inicio": recortadas / max(1, con_voz - perdidas),
+        "perdidas": perdidas,
+        "espurias": espurias,
+        "fallos": fallos,
+        # Con el reconocedor simulado los "fallos" son frases bajo la SNR mínima
+        "chequeo_snr": motor == "guion" and snr_minima is not None,
+        # Costo de la supresión en fracción de la duración de la frase (no en ms)
+        "supresion": {"n": len(costos), "media": float(np.mean(costos)) if costos else float("nan"),
+                      "max": max(costos) if costos else float("nan")},
+        "fixtures": len(fixtures),
+        "detalle": detalle,
+    }
+
+
+def imprimir_resultados(resultados):
+    """Imprime la tabla de latencias y las métricas de precisión"""
+    nombres = {
+        "calibracion": "Calibración (audio)",
+        "fin_de_voz": "Fin de voz → frase cerrada",
+        "reconocimiento": "Frase cerrada → texto",
+        "total": "Fin de voz → texto",
+    }
+    print(f"{'Etapa':<32}{'n':>5}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    print("-" * 77)
+    for clave, nombre in nombres.items():
+        r = resultados[clave]
+        print(f"{nombre:<32}{r['n']:>5}{r['p50']:>10.1f}{r['p90']:>10.1f}"
+              f"{r['p99']:>10.1f}{r['max']:>10.1f}")
+    print("(milisegundos)\n")
+    print(f"WER:                 {resultados['wer'] * 100:.1f}%")
+    print(f"Inicio recortado:    {resultados['recorte_inicio'] * 100:.1f}% de las frases")
+    print(f"Frases perdidas:     {resultados['perdidas']} de {resultados['fixtures']}")
+    print(f"Frases espurias:     {resultados['espurias']}")
+    etiqueta = "Bajo la SNR mínima:" if resultados["chequeo_snr"] else "Sin reconocer:"
+    print(f"{etiqueta:<21}{resultados['fallos']} de {resultados['fixtures'] - resultados['perdidas']}")
+    if resultados["supresion"]["n"]:
+        print(f"Supresión de ruido:  {resultados['supresion']['media'] * 100:.1f}% del tiempo real "
+              f"(máx {resultados['supresion']['max'] * 100:.1f}%)")
+    for d in resultados["detalle"]:
+        if d["errores"]:
+            print(f"  ✗ {d['fixture']}: '{d['hipotesis']}' (esperado '{d['referencia']}')")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas del reconocimiento (ASR)")
+    parser.add_argument("--fixtures", help="Carpeta con audios y sus .txt (sin ella: sintéticos)")
+    parser.add_argument("--sinteticos", type=int, default=12, help="Cantidad de fixtures sintéticos")
+    parser.add_argument("--motor", choices=["guion", *MOTORES], default="guion",
+                        help="guion = simulado (devuelve la referencia)")
+    parser.add_argument("--modelo-vosk", help="Carpeta del modelo Vosk (por defecto VOSK_MODEL)")
+    parser.add_argument("--latencia", type=float, default=0.3,
+                        help="Segundos del reconocedor simulado")
+    parser.add_argument("--velocidad", type=float, default=0.0,
+                        help="1 = tiempo real, 0 = tan rápido como se pueda")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--ruido", type=float, default=1.0,
+                        help="Escala del ruido de fondo de los sintéticos")
+    parser.add_argument("--supresion", action="store_true",
+                        help="Comparar sin y con supresión de ruido")
+    parser.add_argument("--snr-minima", type=float,
+                        help="dB de SNR estimada por debajo de los cuales el reconocedor "
+                             "simulado descarta la frase (chequeo sintético)")
+    parser.add_argument("--json", help="Archivo JSONL donde agregar los resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.fixtures:
+        fixtures = cargar_fixtures(args.fixtures)
+    else:
+        fixtures = fixtures_sinteticos(args.sinteticos, semilla=args.semilla, ruido=args.ruido)
+    if not fixtures:
+        raise SystemExit("No hay fixtures")
+
+    print(f"🏁 Benchmark ASR ({len(fixtures)} fixtures, motor {args.motor}, "
+          f"velocidad {args.velocidad or 'máxima'})\n")
+    resultados = ejecutar_benchmark(fixtures, args.motor, args.latencia, args.velocidad,
+                                    args.modelo_vosk, snr_minima=args.snr_minima)
+    imprimir_resultados(resultados)
+    if args.supresion:
+        print("\n🔇 Con supresión de ruido\n")
+        sin_supresion = resultados
+        resultados = ejecutar_benchmark(fixtures, args.motor, args.latencia, args.velocidad,
+                                        args.modelo_vosk, supresion=True, snr_minima=args.snr_minima)
+        imprimir_resultados(resultados)
+        if resultados["chequeo_snr"]:
+            print(f"\nBajo la SNR mínima: {sin_supresion['fallos']} → {resultados['fallos']} "
+                  f"(chequeo sintético: la supresión sube la SNR estimada por construcción; "
+                  f"la precisión se mide con --motor google o vosk sobre grabaciones)")
+        else:
+            print(f"\nSin reconocer: {sin_supresion['fallos']} → {resultados['fallos']} "
+                  f"(WER {sin_supresion['wer'] * 100:.1f}% → {resultados['wer'] * 100:.1f}%)")
+        resultados = {"sin_supresion": sin_supresion, "con_supresion": resultados}
+
+    if args.json:
+        registro = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "config": dict(vars(args)), "resultados": resultados}
+        registro["config"].pop("json")
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\n📝 Resultados agregados a {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Micro-benchmark del enrutador de intenciones - Costo por comando
+Compara el enrutador compilado (src.intenciones) con el recorrido lineal
+que hacía procesar_comando (any(frase in comando …) por intención y otra
+pasada para quitar el prefijo) a medida que crece la cantidad de frases
+disparadoras. Los disparadores extra son frases sintéticas con palabras
+reales, así comparten prefijos como los de verdad.
+
+También mide la búsqueda aproximada con comandos que el ASR entendió mal:
+cuántos se resuelven en local (en vez de ir a la IA) y cuánto tarda, y
+comprueba que el registro completo (con el clasificador) manda a la IA
+los comandos que dejan al manejador sin argumento ("busca en").
+
+Uso:
+    python -m src.benchmark_intenciones
+    python -m src.benchmark_intenciones --tamanos 10 100 1000 10000 --repeticiones 2000
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.intenciones import EnrutadorIntenciones
+from src.habilidades import HABILIDADES, RegistroHabilidades
+from src.benchmark_voz import percentil
+
+logger = logging.getLogger(__name__)
+
+INTENCIONES_BASE = [(h.nombre, h.disparadores) for h in HABILIDADES]
+
+COMANDOS = [
+    "busca en google el clima de mañana en buenos aires",
+    "pon en youtube música para estudiar",
+    "abre firefox",
+    "qué es la fotosíntesis y por qué es importante para las plantas",
+    "cuéntame un chiste",
+    "wikipedia de albert einstein",
+    "hola aura cómo estás hoy",
+    "eso es todo",
+]
+
+# Errores típicos del reconocimiento: (comando, intención esperada o None)
+COMANDOS_ASR = [
+    ("busca en yutub música para estudiar", "youtube"),
+    ("pon en you tube queen", "youtube"),
+    ("reproduce en yutube a bad bunny", "youtube"),
+    ("buscar en gogle el clima", "google"),
+    ("busca en googel recetas de pasta", "google"),
+    ("googlear vuelos baratos", "google"),
+    ("wikipedía de albert einstein", "wikipedia"),
+    ("wikipedya sobre roma", "wikipedia"),
+    ("busca en wikipedya la luna", "wikipedia"),
+    ("busca en tu memoria lo que te dije", None),
+    ("qué es una sierra", None),
+    ("cierre la puerta del garaje", None),
+    ("pon una canción alegre", None),
+]
+
+# Destino en el registro completo: (comando, habilidad esperada o None = IA).
+# Sin disparador exacto y sin argumento no hay qué buscar: va a la IA
+COMANDOS_REGISTRO = [
+    ("busca", None),
+    ("busca en", None),
+    ("búscame por favor", None),
+    ("busca en goglea", None),
+    ("ponme algo", None),
+    ("lanza", None),
+    ("busca en gogle el clima", "google"),
+    ("ponme música de queen", "youtube"),
+    ("lanza firefox", "abrir"),
+    ("adiós", "exit"),
+]
+
+VERBOS = ["busca", "pon", "abre", "muestra", "lee", "reproduce", "envía", "traduce", "calcula", "recuerda"]
+COMPLEMENTOS = ["en", "la", "el", "mi", "un", "una", "del", "de la"]
+SUSTANTIVOS = ["agenda", "música", "correo", "alarma", "nota", "lista", "mapa", "foto", "clima",
+               "noticia", "receta", "tarea", "película", "cámara", "luz", "ventana", "archivo"]
+
+
+# ============== DISPARADORES SINTÉTICOS ==============
+def disparadores_sinteticos(cantidad, semilla=0):
+    """
+    Frases "verbo complemento sustantivo [n]" distintas entre sí
+
+    Returns:
+        list: (intención, [frase]) de a una frase por intención
+    """
+    rng = random.Random(semilla)
+    frases = set()
+    while len(frases) < cantidad:
+        frase = f"{rng.choice(VERBOS)} {rng.choice(COMPLEMENTOS)} {rng.choice(SUSTANTIVOS)} {rng.randrange(cantidad)}"
+        frases.add(frase)
+    return [(f"extra_{i}", [frase]) for i, frase in enumerate(sorted(frases))]
+
+
+# ============== RECORRIDO LINEAL (ANTERIOR) ==============
+def buscar_lineal(intenciones, comando):
+    """
+    Como procesar_comando antes del enrutador: cada intención en orden,
+    any(frase in comando) y otra pasada para quitar el prefijo
+
+    Returns:
+        tuple: (intención, argumento) o None
+    """
+    for nombre, frases in intenciones:
+        if any(frase in comando for frase in frases):
+            for frase in frases:
+                if frase in comando:
+                    return nombre, comando.replace(frase, "").strip()
+    return None
+
+
+# ============== MEDICIÓN ==============
+def medir(funcion, comandos, repeticiones):
+    """Microsegundos por comando (mejor de 3 corridas)"""
+    mejor = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            for comando in comandos:
+                funcion(comando)
+        mejor = min(mejor, (time.perf_counter() - t0) / (repeticiones * len(comandos)))
+    return mejor * 1e6
+
+
+def ejecutar_benchmark(tamanos, repeticiones=1000, semilla=0):
+    """
+    Mide ambos enrutadores con cada cantidad de disparadores extra
+
+    Returns:
+        list: dict por tamaño con disparadores, compilación (ms) y µs por comando
+    """
+    filas = []
+    for tamano in tamanos:
+        intenciones = INTENCIONES_BASE + disparadores_sinteticos(tamano, semilla)
+        t0 = time.perf_counter()
+        enrutador = EnrutadorIntenciones(intenciones)
+        compilacion = time.perf_counter() - t0
+
+        # Mismo resultado que el recorrido lineal en los comandos de prueba
+        for comando in COMANDOS:
+            c = enrutador.buscar(comando)
+            esperado = buscar_lineal(intenciones, comando)
+            if (c.intencion if c else None) != (esperado[0] if esperado else None):
+                logger.warning(f"'{comando}': {c} vs lineal {esperado}")
+
+        # El recorrido lineal es lento con muchos disparadores: menos repeticiones
+        rep_lineal = max(10, repeticiones * 100 // max(100, tamano))
+        filas.append({
+            "disparadores": len(enrutador.disparadores),
+            "compilacion_ms": compilacion * 1000,
+            "compilado_us": medir(enrutador.buscar, COMANDOS, repeticiones),
+            "lineal_us": medir(lambda comando: buscar_lineal(intenciones, comando), COMANDOS, rep_lineal),
+        })
+    return filas
+
+
+def medir_aproximado(repeticiones=200):
+    """
+    Resuelve COMANDOS_ASR con y sin búsqueda aproximada
+
+    Returns:
+        dict: Comandos resueltos en local, falsos positivos y µs por comando
+    """
+    enrutador = EnrutadorIntenciones(
+        INTENCIONES_BASE, aproximadas=[h.nombre for h in HABILIDADES if h.aproximada]
+    )
+    exactos = aproximados = falsos = 0
+    tiempos = []
+    for comando, esperada in COMANDOS_ASR:
+        exacta = enrutador.buscar(comando, aproximado=False)
+        c = enrutador.buscar(comando)
+        obtenida = c.intencion if c else None
+        if esperada is None:
+            falsos += obtenida is not None
+        else:
+            exactos += bool(exacta and exacta.intencion == esperada)
+            aproximados += obtenida == esperada
+            if obtenida != esperada:
+                logger.warning(f"'{comando}': {obtenida} (esperada {esperada})")
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            enrutador.buscar(comando)
+        tiempos.append((time.perf_counter() - t0) / repeticiones * 1e6)
+    return {
+        "comandos": sum(1 for _, e in COMANDOS_ASR if e),
+        "exactos": exactos,
+        "aproximados": aproximados,
+        "falsos_positivos": falsos,
+        "p50_us": percentil(tiempos, 50),
+        "max_us": max(tiempos),
+    }
+
+
+def verificar_registro():
+    """
+    Resuelve COMANDOS_REGISTRO con el registro completo (sin ejecutar las
+    habilidades)
+
+    Returns:
+        dict: Comandos en su destino y los que no, con lo obtenido
+    """
+    registro = RegistroHabilidades(HABILIDADES)
+    errados = []
+    for comando, esperada in COMANDOS_REGISTRO:
+        habilidad, _, origen = registro.resolver(comando)
+        obtenida = habilidad.nombre if habilidad else None
+        if obtenida != esperada:
+            errados.append({"comando": comando, "obtenida": obtenida, "esperada": esperada, "origen": origen})
+    return {"comandos": len(COMANDOS_REGISTRO), "correctos": len(COMANDOS_REGISTRO) - len(errados),
+            "errados": errados}
+
+
+def imprimir_resultados(filas):
+    """Imprime la tabla por cantidad de disparadores"""
+    print(f"{'Disparadores':>12}{'Compilación':>14}{'Compilado':>12}{'Lineal':>12}")
+    print("-" * 50)
+    for f in filas:
+        print(f"{f['disparadores']:>12}{f['compilacion_ms']:>11.1f} ms"
+              f"{f['compilado_us']:>9.2f} µs{f['lineal_us']:>9.1f} µs")
+    print("(por comando)")
+
+
+def imprimir_aproximado(r):
+    """Imprime los comandos con errores de ASR resueltos en local"""
+    print(f"Con errores de ASR:  {r['exactos']} de {r['comandos']} sin búsqueda aproximada, "
+          f"{r['aproximados']} con ella ({r['falsos_positivos']} falsos positivos)")
+    print(f"Tiempo por comando:  p50 {r['p50_us']:.0f} µs, máx {r['max_us']:.0f} µs")
+
+
+def imprimir_registro(r):
+    """Imprime los comandos que el registro no mandó a su destino"""
+    print(f"Registro completo:   {r['correctos']} de {r['comandos']} comandos en su destino")
+    for e in r["errados"]:
+        print(f"  ✗ '{e['comando']}': {e['obtenida'] or 'IA'} por {e['origen']} "
+              f"(esperada {e['esperada'] or 'IA'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark del enrutador de intenciones")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[0, 10, 100, 1000, 10000],
+                        help="Disparadores sintéticos agregados a los reales")
+    parser.add_argument("--repeticiones", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", help="Archivo JSONL donde agregar los resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"🏁 Benchmark de intenciones ({len(COMANDOS)} comandos)\n")
+    filas = ejecutar_benchmark(args.tamanos, args.repeticiones, args.semilla)
+    imprimir_resultados(filas)
+    print()
+    aproximado = medir_aproximado()
+    imprimir_aproximado(aproximado)
+    destinos = verificar_registro()
+    imprimir_registro(destinos)
+
+    if args.json:
+        registro = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": dict(vars(args)),
+                    "resultados": filas, "aproximado": aproximado, "registro": destinos}
+        registro["config"].pop("json")
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\n📝 Resultados agregados a {args.json}")
+
+
+if __name__ == "__main__":
+    main()
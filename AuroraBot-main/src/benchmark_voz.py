@@ -0,0 +1,365 @@
+"""
+Benchmark del camino de voz de Aura - Sin red ni altavoces
+Mide tiempo hasta el primer audio, huecos entre oraciones y latencia de
+interrupción usando un sintetizador y un reproductor falsos sobre la cola
+real del ServicioVoz.
+
+Uso:
+    python -m src.benchmark_voz
+    python -m src.benchmark_voz --enunciados 20 --latencia-caracter 0.004
+    python -m src.benchmark_voz --modo segmentos --json logs/benchmark_tts.jsonl
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.sintesis import BackendTTS, SintesisParalela, leer_wav, wav_desde_pcm
+from src.servicio_voz import ServicioVoz, TTS_INTERRUMPIDO
+
+logger = logging.getLogger(__name__)
+
+TEXTOS = [
+    "Claro, ya abrí el navegador.",
+    "La fotosíntesis es el proceso por el cual las plantas convierten la luz en energía. "
+    "Ocurre en los cloroplastos. Libera oxígeno como subproducto.",
+    "Hoy está nublado en la ciudad, con una temperatura de dieciocho grados. "
+    "Se esperan lluvias ligeras por la tarde, así que conviene llevar paraguas.",
+    "Listo. Reproduciendo la canción en YouTube.",
+    "Python es un lenguaje de programación interpretado, de tipado dinámico y multiparadigma. "
+    "Fue creado por Guido van Rossum a finales de los años ochenta. "
+    "Hoy es uno de los lenguajes más usados en ciencia de datos y automatización.",
+]
+
+
+# ============== SINTETIZADOR FALSO ==============
+class SintetizadorFalso(BackendTTS):
+    """
+    Motor TTS simulado: tarda una latencia fija más una por carácter y
+    devuelve silencio WAV con la duración que tendría la voz real
+    """
+    nombre = "falso"
+    formato = "wav"
+    offline = True
+    FRECUENCIA = 16000
+
+    def __init__(self, latencia_base=0.15, latencia_caracter=0.002,
+                 audio_caracter=0.06, variacion=0.2, escala=1.0):
+        """
+        Args:
+            latencia_base: Segundos fijos por petición de síntesis
+            latencia_caracter: Segundos de síntesis por carácter
+            audio_caracter: Segundos de audio producidos por carácter
+            variacion: Variación aleatoria relativa de la latencia (0.2 = ±20%)
+            escala: Factor aplicado a todos los tiempos (para acortar la corrida)
+        """
+        self.latencia_base = latencia_base * escala
+        self.latencia_caracter = latencia_caracter * escala
+        self.audio_caracter = audio_caracter * escala
+        self.variacion = variacion
+
+    def disponible(self) -> bool:
+        return True
+
+    def sintetizar(self, texto) -> bytes:
+        latencia = self.latencia_base + self.latencia_caracter * len(texto)
+        time.sleep(latencia * random.uniform(1 - self.variacion, 1 + self.variacion))
+        muestras = int(self.FRECUENCIA * self.audio_caracter * len(texto))
+        return wav_desde_pcm(b"\0\0" * muestras, self.FRECUENCIA)
+
+
+# ============== REPRODUCTOR FALSO ==============
+class ProcesoFalso:
+    """
+    Reproductor simulado con la interfaz de subprocess.Popen que usa el
+    servicio: "reproduce" el audio en tiempo real y registra cuándo empieza
+    cada segmento y cuándo se detiene
+    """
+
+    def __init__(self, cmd, stdin=None):
+        self.cmd = cmd
+        self.returncode = None
+        self.segmentos = []      # (inicio, duración) de cada bloque de audio
+        self.detenido_en = None  # Instante de terminate()
+        self._bytes_por_segundo = None
+        self._fin_audio = None
+        self._detenido = threading.Event()
+        self._lock = threading.Lock()
+        self.stdin = self if stdin is not None else None
+        if stdin is None:
+            # Reproductor por archivo: el último argumento es el audio
+            self.write(Path(cmd[-1]).read_bytes())
+
+    # --- stdin ---
+    def write(self, datos):
+        with self._lock:
+            if self._detenido.is_set():
+                raise BrokenPipeError("reproductor detenido")
+            if self._bytes_por_segundo is None:
+                canales, ancho, frecuencia, datos = leer_wav(datos)
+                self._bytes_por_segundo = canales * ancho * frecuencia
+            ahora = time.perf_counter()
+            inicio = max(ahora, self._fin_audio or ahora)
+            duracion = len(datos) / self._bytes_por_segundo
+            self.segmentos.append((inicio, duracion))
+            self._fin_audio = inicio + duracion
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    # --- proceso ---
+    def poll(self):
+        if self._detenido.is_set() or (self._fin_audio and time.perf_counter() >= self._fin_audio):
+            self.returncode = 0
+        return self.returncode
+
+    def wait(self, timeout=None):
+        restante = (self._fin_audio or 0) - time.perf_counter()
+        if timeout is not None:
+            restante = min(restante, timeout)
+        if restante > 0:
+            self._detenido.wait(restante)
+        return self.poll()
+
+    def terminate(self):
+        if self.detenido_en is None:
+            self.detenido_en = time.perf_counter()
+        self._detenido.set()
+
+
+class ReproductorFalso:
+    """Fábrica de ProcesoFalso que conserva todos los procesos lanzados"""
+
+    def __init__(self):
+        self.procesos = []
+
+    def __call__(self, cmd, stdin=None):
+        proceso = ProcesoFalso(cmd, stdin)
+        self.procesos.append(proceso)
+        return proceso
+
+    def reiniciar(self):
+        self.procesos = []
+
+    def segmentos(self):
+        """Segmentos reproducidos, en orden, de todos los procesos"""
+        return sorted(s for p in self.procesos for s in p.segmentos)
+
+
+# ============== ESTADÍSTICAS ==============
+def percentil(valores, p):
+    """Percentil p (0-100) con interpolación lineal"""
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    pos = (len(ordenados) - 1) * p / 100
+    base = int(pos)
+    siguiente = min(base + 1, len(ordenados) - 1)
+    return ordenados[base] + (ordenados[siguiente] - ordenados[base]) * (pos - base)
+
+
+def resumir(valores):
+    """Resumen en milisegundos: n, p50, p90, p99 y máximo"""
+    ms = [v * 1000 for v in valores]
+    return {
+        "n": len(ms),
+        "p50": percentil(ms, 50),
+        "p90": percentil(ms, 90),
+        "p99": percentil(ms, 99),
+        "max": max(ms) if ms else float("nan"),
+    }
+
+
+def _huecos(segmentos):
+    """Silencios entre segmentos consecutivos"""
+    return [max(0.0, inicio - (prev_inicio + prev_dur))
+            for (prev_inicio, prev_dur), (inicio, _) in zip(segmentos, segmentos[1:])]
+
+
+# ============== ESCENARIOS ==============
+def medir_enunciados(servicio, reproductor, backend, cantidad):
+    """
+    Pronuncia enunciados de a uno y mide el primer audio y los huecos
+
+    Returns:
+        tuple: (lista de TTFA, lista de huecos entre oraciones)
+    """
+    ttfa, huecos = [], []
+    for i in range(cantidad):
+        reproductor.reiniciar()
+        texto = TEXTOS[i % len(TEXTOS)]
+        t0 = time.perf_counter()
+        servicio.hablar(texto, backend).result()
+        segmentos = reproductor.segmentos()
+        if segmentos:
+            ttfa.append(segmentos[0][0] - t0)
+            huecos.extend(_huecos(segmentos))
+    return ttfa, huecos
+
+
+def medir_rafaga(servicio, reproductor, backend, cantidad):
+    """
+    Encola varios enunciados de golpe y mide el silencio entre uno y otro
+
+    Returns:
+        list: Huecos entre el final de un enunciado y el inicio del siguiente
+    """
+    reproductor.reiniciar()
+    cortes = []  # Procesos lanzados al terminar cada enunciado
+    futuros = []
+    for i in range(cantidad):
+        futuro = servicio.hablar(f"{TEXTOS[i % len(TEXTOS)]} ({i})", backend)
+        # El callback corre en el worker, antes de tomar el siguiente enunciado
+        futuro.add_done_callback(lambda _: cortes.append(len(reproductor.procesos)))
+        futuros.append(futuro)
+    for futuro in futuros:
+        futuro.result()
+
+    huecos = []
+    for anterior, corte in zip(cortes, cortes[1:]):
+        fin = reproductor.procesos[anterior - 1].segmentos if anterior else []
+        inicio = reproductor.procesos[anterior].segmentos if anterior < corte else []
+        if fin and inicio:
+            ini, dur = fin[-1]
+            huecos.append(max(0.0, inicio[0][0] - (ini + dur)))
+    return huecos
+
+
+def medir_interrupciones(servicio, reproductor, backend, cantidad, escala):
+    """
+    Interrumpe enunciados largos en un instante aleatorio
+
+    Returns:
+        tuple: (latencias hasta el silencio, latencias hasta resolver el Future)
+    """
+    silencio, resolucion = [], []
+    iniciado = threading.Event()
+    oyente = lambda evento, texto: evento == "iniciado" and iniciado.set()
+    servicio.agregar_oyente(oyente)
+    try:
+        for i in range(cantidad):
+            reproductor.reiniciar()
+            iniciado.clear()
+            futuro = servicio.hablar(f"{TEXTOS[-1]} ({i})", backend)
+            if not iniciado.wait(10):
+                continue
+            time.sleep(random.uniform(0.1, 1.0) * escala)
+
+            t0 = time.perf_counter()
+            servicio.detener()
+            resultado = futuro.result()
+            t_resuelto = time.perf_counter()
+
+            detenidos = [p.detenido_en for p in reproductor.procesos if p.detenido_en]
+            if resultado == TTS_INTERRUMPIDO and detenidos:
+                silencio.append(max(0.0, min(detenidos) - t0))
+                resolucion.append(t_resuelto - t0)
+    finally:
+        servicio.quitar_oyente(oyente)
+    return silencio, resolucion
+
+
+def ejecutar_benchmark(enunciados=10, interrupciones=10, modo="stream", workers=4,
+                       latencia_base=0.15, latencia_caracter=0.002, escala=0.25):
+    """
+    Ejecuta todos los escenarios del benchmark
+
+    Returns:
+        dict: Resumen por métrica (milisegundos)
+    """
+    backend = SintetizadorFalso(latencia_base, latencia_caracter, escala=escala)
+    reproductor = ReproductorFalso()
+    servicio = ServicioVoz(
+        sintesis=SintesisParalela(backend, max_workers=workers),
+        reproductor=("reproductor-falso -", modo == "stream"),
+        lanzar_proceso=reproductor
+    )
+    try:
+        ttfa, huecos = medir_enunciados(servicio, reproductor, backend, enunciados)
+        entre_enunciados = medir_rafaga(servicio, reproductor, backend, min(enunciados, 5))
+        silencio, resolucion = medir_interrupciones(
+            servicio, reproductor, backend, interrupciones, escala)
+    finally:
+        servicio.sintesis.cerrar()
+
+    return {
+        "ttfa": resumir(ttfa),
+        "hueco_oraciones": resumir(huecos),
+        "hueco_enunciados": resumir(entre_enunciados),
+        "interrupcion_silencio": resumir(silencio),
+        "interrupcion_future": resumir(resolucion),
+    }
+
+
+def imprimir_resultados(resultados):
+    """Imprime la tabla de percentiles"""
+    nombres = {
+        "ttfa": "Tiempo hasta el primer audio",
+        "hueco_oraciones": "Hueco entre oraciones",
+        "hueco_enunciados": "Hueco entre enunciados",
+        "interrupcion_silencio": "Interrupción → silencio",
+        "interrupcion_future": "Interrupción → Future",
+    }
+    print(f"{'Métrica':<32}{'n':>5}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    print("-" * 77)
+    for clave, nombre in nombres.items():
+        r = resultados[clave]
+        print(f"{nombre:<32}{r['n']:>5}{r['p50']:>10.1f}{r['p90']:>10.1f}"
+              f"{r['p99']:>10.1f}{r['max']:>10.1f}")
+    print("(milisegundos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del camino de voz (TTS)")
+    parser.add_argument("--enunciados", type=int, default=10)
+    parser.add_argument("--interrupciones", type=int, default=10)
+    parser.add_argument("--modo", choices=["stream", "segmentos"], default="stream",
+                        help="Reproductor por stdin o un proceso por segmento")
+    parser.add_argument("--workers", type=int, default=4, help="Hilos de síntesis")
+    parser.add_argument("--latencia-base", type=float, default=0.15,
+                        help="Segundos fijos por petición de síntesis")
+    parser.add_argument("--latencia-caracter", type=float, default=0.002,
+                        help="Segundos de síntesis por carácter")
+    parser.add_argument("--escala", type=float, default=0.25,
+                        help="Factor de tiempo para acortar la corrida (1 = tiempo real)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", help="Archivo JSONL donde agregar los resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(args.semilla)
+
+    print(f"🏁 Benchmark TTS (modo {args.modo}, {args.workers} workers, escala {args.escala})\n")
+    resultados = ejecutar_benchmark(
+        enunciados=args.enunciados,
+        interrupciones=args.interrupciones,
+        modo=args.modo,
+        workers=args.workers,
+        latencia_base=args.latencia_base,
+        latencia_caracter=args.latencia_caracter,
+        escala=args.escala,
+    )
+    imprimir_resultados(resultados)
+
+    if args.json:
+        registro = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "config": dict(vars(args)), "resultados": resultados}
+        registro["config"].pop("json")
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\n📝 Resultados agregados a {args.json}")
+
+
+if __name__ == "__main__":
+    main()
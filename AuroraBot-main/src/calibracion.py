@@ -0,0 +1,113 @@
+"""
+Calibración de ruido ambiente - Piso de ruido continuo y persistente
+Reemplaza a adjust_for_ambient_noise (un segundo muerto antes de cada
+escucha): el piso se mide una vez al abrir el micrófono, se sigue
+actualizando con los bloques sin voz y se guarda por dispositivo.
+"""
+import json
+import time
+import logging
+import threading
+
+from config.settings import (
+    ENERGY_THRESHOLD, ENERGY_RATIO, ENERGY_MIN_THRESHOLD,
+    AMBIENT_NOISE_DURATION, CALIBRATION_FILE
+)
+
+logger = logging.getLogger(__name__)
+
+# Constantes de seguimiento del piso (por observación)
+ALFA_SUBIDA = 0.02   # el ruido que sube se sigue despacio (podría ser voz suave)
+ALFA_BAJADA = 0.2    # el que baja, rápido
+GUARDAR_CADA = 60.0  # segundos entre escrituras del archivo de calibración
+
+
+def _leer_archivo():
+    try:
+        return json.loads(CALIBRATION_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+class PisoRuido:
+    """Estimación continua del ruido de fondo de un dispositivo"""
+
+    def __init__(self, dispositivo="default", ratio=ENERGY_RATIO,
+                 minimo=ENERGY_MIN_THRESHOLD, duracion_inicial=AMBIENT_NOISE_DURATION):
+        """
+        Args:
+            dispositivo: Nombre del micrófono (clave de persistencia)
+            ratio: Umbral de voz = piso x ratio
+            minimo: Umbral mínimo de energía
+            duracion_inicial: Segundos de la calibración inicial de la sesión
+        """
+        self.dispositivo = dispositivo
+        self.ratio = ratio
+        self.minimo = minimo
+        self.duracion_inicial = duracion_inicial
+
+        self.piso = None
+        self._muestras_iniciales = []
+        self._tiempo_inicial = 0.0
+        self._calibrado = threading.Event()
+        self._ultimo_guardado = 0.0
+
+        guardado = _leer_archivo().get(dispositivo)
+        if guardado and guardado.get("piso"):
+            self.piso = float(guardado["piso"])
+            logger.info(f"Calibración cargada para '{dispositivo}': piso {self.piso:.0f}")
+
+    @property
+    def calibrado(self) -> bool:
+        """True cuando terminó la calibración inicial de esta sesión"""
+        return self._calibrado.is_set()
+
+    def umbral(self) -> float:
+        """Energía RMS a partir de la cual un bloque se considera voz"""
+        if self.piso is None:
+            return ENERGY_THRESHOLD
+        return max(self.minimo, self.piso * self.ratio)
+
+    def observar(self, rms, duracion, es_voz):
+        """
+        Incorpora un bloque al estimador
+
+        Args:
+            rms: Energía RMS del bloque
+            duracion: Segundos de audio del bloque
+            es_voz: Si el bloque pertenece a una frase (no se usa como ruido)
+        """
+        if not self._calibrado.is_set():
+            # Calibración inicial: mediana de los bloques sin voz
+            if not es_voz:
+                self._muestras_iniciales.append(rms)
+            self._tiempo_inicial += duracion
+            if self._tiempo_inicial >= self.duracion_inicial and self._muestras_iniciales:
+                muestras = sorted(self._muestras_iniciales)
+                self.piso = muestras[len(muestras) // 2]
+                self._muestras_iniciales = []
+                self._calibrado.set()
+                logger.info(f"Calibración inicial '{self.dispositivo}': piso {self.piso:.0f}, "
+                            f"umbral {self.umbral():.0f}")
+                self.guardar()
+            return
+
+        if es_voz:
+            return
+        alfa = ALFA_SUBIDA if rms > self.piso else ALFA_BAJADA
+        self.piso += alfa * (rms - self.piso)
+
+        if time.monotonic() - self._ultimo_guardado >= GUARDAR_CADA:
+            self.guardar()
+
+    def guardar(self):
+        """Persiste el piso de ruido de este dispositivo"""
+        if self.piso is None:
+            return
+        self._ultimo_guardado = time.monotonic()
+        datos = _leer_archivo()
+        datos[self.dispositivo] = {"piso": round(self.piso, 1), "fecha": time.strftime("%Y-%m-%d %H:%M:%S")}
+        try:
+            CALIBRATION_FILE.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la calibración: {e}")
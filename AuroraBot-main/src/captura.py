@@ -0,0 +1,425 @@
+"""
+Captura de audio de Aura - Micrófono persistente con buffer circular
+El dispositivo se abre una sola vez; un hilo lee bloques sin pausa, los
+guarda en un buffer circular y los segmenta en frases con el VAD. escuchar() solo
+consume frases ya segmentadas, así la captura sigue mientras se reconoce
+la frase anterior.
+
+Todos los modos de escucha (modo voz, botón del widget, micrófono del
+chat) comparten este único dueño del dispositivo a través de concesiones
+con prioridad: cambiar de modo no reabre el micrófono ni pierde audio.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from queue import Queue, Empty, Full
+
+import speech_recognition as sr
+
+from config.settings import (
+    PHRASE_TIME_LIMIT, VAD_HANGOVER_MS, BARGE_IN,
+    MIC_DEVICE_INDEX, CAPTURE_CHUNK, CAPTURE_BUFFER_SECONDS, CAPTURE_MAX_FRASES
+)
+
+from src.calibracion import PisoRuido
+from src.eco import CanceladorEco, get_referencia_eco
+from src.supresion_ruido import PerfilRuido
+from src.vad import SegmentadorVAD
+
+logger = logging.getLogger(__name__)
+
+# Prioridades de las concesiones del micrófono (la mayor recibe las frases)
+PRIORIDAD_FONDO = 0     # escucha continua: modo voz y palabra clave
+PRIORIDAD_PULSAR = 10   # escucha a pedido: botón del micrófono, chat, registro
+
+
+# ============== FUENTES DE AUDIO ==============
+class FuenteAudio:
+    """Origen de bloques PCM mono (micrófono real o virtual)"""
+    nombre = "fuente"
+    frecuencia = 16000
+    ancho_muestra = 2
+    bloque = CAPTURE_CHUNK  # muestras por lectura
+
+    def abrir(self):
+        """Abre el dispositivo (una sola vez por sesión)"""
+
+    def leer(self) -> bytes:
+        """Lee un bloque; bloquea hasta tenerlo. b"" indica fin del audio"""
+        raise NotImplementedError
+
+    def cerrar(self):
+        """Libera el dispositivo"""
+
+
+class FuenteMicrofono(FuenteAudio):
+    """Micrófono del sistema a través de PyAudio (vía SpeechRecognition)"""
+
+    def __init__(self, device_index=MIC_DEVICE_INDEX, bloque=CAPTURE_CHUNK):
+        self.device_index = device_index
+        self.bloque = bloque
+        self._mic = None
+
+    def abrir(self):
+        try:
+            self._mic = sr.Microphone(device_index=self.device_index, chunk_size=self.bloque)
+            self._mic.__enter__()
+        except AttributeError as e:
+            # SpeechRecognition lanza AttributeError si falta PyAudio
+            raise OSError(f"PyAudio no disponible: {e}")
+        self.frecuencia = self._mic.SAMPLE_RATE
+        self.ancho_muestra = self._mic.SAMPLE_WIDTH
+        try:
+            pa = self._mic.audio
+            info = (pa.get_device_info_by_index(self.device_index)
+                    if self.device_index is not None else pa.get_default_input_device_info())
+            self.nombre = info.get("name", "default")
+        except Exception:
+            self.nombre = "default"
+        logger.info(f"Micrófono abierto: {self.nombre} ({self.frecuencia} Hz)")
+
+    def leer(self) -> bytes:
+        return self._mic.stream.read(self.bloque)
+
+    def cerrar(self):
+        if self._mic is not None:
+            try:
+                self._mic.__exit__(None, None, None)
+            except Exception:
+                pass
+            self._mic = None
+
+
+# ============== FRASES ==============
+class Frase:
+    """Segmento de voz listo para reconocer"""
+
+    def __init__(self, audio, frecuencia, ancho_muestra, inicio, fin, id=0, perfil_ruido=None):
+        self.id = id          # Número de frase de la sesión de captura
+        self.audio = audio
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.inicio = inicio  # time.monotonic() del primer bloque
+        self.fin = fin        # time.monotonic() del último bloque
+        self.perfil_ruido = perfil_ruido  # PerfilRuido de la captura (supresión de ruido)
+
+    @property
+    def duracion(self) -> float:
+        return len(self.audio) / (self.frecuencia * self.ancho_muestra)
+
+    def audio_data(self) -> sr.AudioData:
+        """La frase como sr.AudioData (para los reconocedores de SpeechRecognition)"""
+        return sr.AudioData(self.audio, self.frecuencia, self.ancho_muestra)
+
+    def con_audio(self, audio):
+        """Copia de la frase con otro audio del mismo formato (p. ej. sin ruido)"""
+        return Frase(audio, self.frecuencia, self.ancho_muestra, self.inicio, self.fin, self.id)
+
+
+# ============== CONCESIONES ==============
+class Concesion:
+    """
+    Permiso de un modo de escucha para consumir las frases del micrófono
+
+    Solo la concesión vigente (la de mayor prioridad; entre iguales, la
+    más reciente) recibe frases. Las demás conservan las que ya tenían y
+    vuelven a recibir cuando se libera la que las desplazó, sin que el
+    dispositivo se cierre. Se usa como context manager o con liberar().
+    """
+
+    def __init__(self, captura, nombre, prioridad, orden):
+        self.captura = captura
+        self.nombre = nombre
+        self.prioridad = prioridad
+        self.orden = orden
+        self.frases = Queue(maxsize=CAPTURE_MAX_FRASES)
+        self.liberada = False
+
+    @property
+    def vigente(self) -> bool:
+        return self.captura.concesion_vigente() is self
+
+    def siguiente_frase(self, timeout=None, desde=None, interrumpir=None, omitir_id=None):
+        """Próxima frase de esta concesión (ver ServicioCaptura.siguiente_frase)"""
+        return self.captura._esperar_frase(self.frases, timeout, desde, interrumpir, omitir_id)
+
+    def liberar(self):
+        self.captura._liberar(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.liberar()
+
+    def __repr__(self):
+        return f"Concesion({self.nombre!r}, prioridad={self.prioridad})"
+
+
+# ============== SERVICIO DE CAPTURA ==============
+class ServicioCaptura:
+    """
+    Dueño del micrófono: lee bloques continuamente en un hilo propio,
+    mantiene los últimos segundos en un buffer circular y publica las
+    frases detectadas en una cola acotada
+    """
+
+    def __init__(self, fuente=None, umbral=None, max_frase=PHRASE_TIME_LIMIT):
+        """
+        Args:
+            fuente: FuenteAudio (por defecto el micrófono del sistema)
+            umbral: Energía RMS fija a partir de la cual un marco puede ser voz
+                    (None = umbral dinámico según el piso de ruido)
+            max_frase: Duración máxima de una frase en segundos
+        """
+        self.fuente = fuente or FuenteMicrofono()
+        self.umbral = umbral
+        self.max_frase = max_frase
+
+        self._hilo = None
+        self._activo = threading.Event()
+        self._lock = threading.Lock()
+        self.error = None
+        self.ruido = None  # PisoRuido del dispositivo abierto
+        self.eco = None    # CanceladorEco (barge-in) del dispositivo abierto
+        self.perfil_ruido = None  # PerfilRuido (espectro del ruido) de la sesión
+
+        self.anillo = deque()  # (instante, bloque) de los últimos CAPTURE_BUFFER_SECONDS
+        self._frases = Queue(maxsize=CAPTURE_MAX_FRASES)
+        self.segmentador = None  # SegmentadorVAD del dispositivo abierto
+        self._id_frase = 0
+        self._oyentes = []       # Callbacks (evento, id_frase, datos) del segmentador
+        self._concesiones = []   # Concesion activas (la vigente recibe las frases)
+        self._orden = 0
+
+    # ============== CICLO DE VIDA ==============
+    @property
+    def activo(self) -> bool:
+        return self._activo.is_set()
+
+    def iniciar(self):
+        """
+        Abre el dispositivo y arranca el hilo de captura (idempotente)
+
+        Raises:
+            OSError: Si el dispositivo no se puede abrir
+        """
+        with self._lock:
+            if self._activo.is_set():
+                return
+            self.fuente.abrir()
+            if self.ruido is None or self.ruido.dispositivo != self.fuente.nombre:
+                self.ruido = PisoRuido(self.fuente.nombre)
+            if BARGE_IN:
+                self.eco = CanceladorEco(get_referencia_eco(), self.fuente.frecuencia,
+                                         self.fuente.ancho_muestra)
+            self.segmentador = SegmentadorVAD(
+                self.fuente.frecuencia, self.fuente.ancho_muestra, self.ruido,
+                max_frase=self.max_frase, umbral_fijo=self.umbral,
+                oyente=self._evento_vad, eco=self.eco
+            )
+            self.perfil_ruido = PerfilRuido(self.fuente.frecuencia, self.segmentador.n)
+            self.segmentador.perfil = self.perfil_ruido
+            self.error = None
+            self._activo.set()
+            bloques = CAPTURE_BUFFER_SECONDS * self.fuente.frecuencia / self.fuente.bloque
+            self.anillo = deque(maxlen=max(1, int(bloques)))
+            self._hilo = threading.Thread(target=self._bucle, daemon=True, name="captura-audio")
+            self._hilo.start()
+
+    def detener(self):
+        """Detiene la captura y libera el dispositivo"""
+        self._activo.clear()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout=1)
+        self._hilo = None
+        if self.ruido is not None:
+            self.ruido.guardar()
+
+    def agregar_oyente(self, callback):
+        """
+        Suscribe un callback a los eventos de segmentación
+
+        Args:
+            callback: Función (evento, id_frase, datos) con evento en "inicio",
+                      "audio" o "fin" (ver SegmentadorVAD). Se llama desde el
+                      hilo de captura: debe retornar enseguida.
+        """
+        self._oyentes.append(callback)
+
+    def quitar_oyente(self, callback):
+        """Cancela la suscripción de un callback"""
+        try:
+            self._oyentes.remove(callback)
+        except ValueError:
+            pass
+
+    # ============== CONCESIONES ==============
+    def adquirir(self, nombre, prioridad=PRIORIDAD_PULSAR) -> Concesion:
+        """
+        Pide las frases del micrófono para un modo de escucha
+
+        Args:
+            nombre: Quién escucha (para los logs)
+            prioridad: PRIORIDAD_FONDO o PRIORIDAD_PULSAR (mayor desplaza a menor)
+
+        Returns:
+            Concesion: Liberarla al terminar (o usarla con 'with')
+        """
+        with self._lock:
+            self._orden += 1
+            concesion = Concesion(self, nombre, prioridad, self._orden)
+            self._concesiones.append(concesion)
+            vigente = self._vigente()
+        logger.debug(f"Micrófono: {concesion} adquirida (vigente: {vigente})")
+        return concesion
+
+    def concesion_vigente(self):
+        """La concesión que recibe las frases ahora, o None"""
+        with self._lock:
+            return self._vigente()
+
+    def _vigente(self):
+        if not self._concesiones:
+            return None
+        return max(self._concesiones, key=lambda c: (c.prioridad, c.orden))
+
+    def _liberar(self, concesion):
+        with self._lock:
+            if concesion.liberada:
+                return
+            concesion.liberada = True
+            self._concesiones.remove(concesion)
+            vigente = self._vigente()
+        logger.debug(f"Micrófono: {concesion} liberada (vigente: {vigente})")
+
+    def umbral_actual(self) -> float:
+        """Umbral de energía de voz vigente"""
+        return self.segmentador.umbral()
+
+    # ============== CONSUMO ==============
+    def siguiente_frase(self, timeout=None, desde=None, interrumpir=None, omitir_id=None):
+        """
+        Espera la próxima frase segmentada (de la cola sin concesión: solo
+        recibe frases mientras ningún modo tiene una Concesion)
+
+        Si al vencer el timeout hay una frase en curso, se espera a que
+        termine (como el timeout de inicio de frase de SpeechRecognition).
+
+        Args:
+            timeout: Segundos máximos esperando que empiece una frase (None = sin límite)
+            desde: Descarta frases que terminaron antes de este instante (time.monotonic)
+            interrumpir: threading.Event opcional que corta la espera
+            omitir_id: Número de una frase que ya se atendió (p. ej. por
+                       despacho anticipado) y debe descartarse
+
+        Returns:
+            Frase: La frase, o None si venció el timeout o se interrumpió
+
+        Raises:
+            OSError: Si la captura se detuvo por un error del dispositivo
+        """
+        return self._esperar_frase(self._frases, timeout, desde, interrumpir, omitir_id)
+
+    def _esperar_frase(self, cola, timeout, desde, interrumpir, omitir_id):
+        limite = None if timeout is None else time.monotonic() + timeout
+        espera = 0.25 if interrumpir is None else 0.02
+        while True:
+            if interrumpir is not None and interrumpir.is_set():
+                return None
+            if limite is not None:
+                restante = limite - time.monotonic()
+                segmentador = self.segmentador
+                if restante <= 0 and segmentador is not None and segmentador.en_frase:
+                    # Hay una frase en curso: darle hasta max_frase para terminar
+                    limite = ((segmentador.inicio_frase or time.monotonic()) + self.max_frase
+                              + VAD_HANGOVER_MS / 1000 + 0.5)
+                    continue
+                if restante <= 0:
+                    return None
+            else:
+                restante = None
+
+            try:
+                frase = cola.get(timeout=min(restante, espera) if restante is not None else espera)
+            except Empty:
+                if not self._activo.is_set() and self.error is not None:
+                    raise OSError(self.error)
+                continue
+
+            if desde is not None and frase.fin < desde:
+                continue
+            if omitir_id is not None and frase.id == omitir_id:
+                continue
+            return frase
+
+    # ============== HILO DE CAPTURA ==============
+    def _bucle(self):
+        try:
+            while self._activo.is_set():
+                bloque = self.fuente.leer()
+                if not bloque:
+                    break
+                ahora = time.monotonic()
+                if self.eco is not None:
+                    # No adaptar el filtro mientras habla el usuario (doble habla)
+                    self.eco.adaptar = not self.segmentador.en_frase
+                    bloque = self.eco.cancelar(bloque, ahora)
+                self.anillo.append((ahora, bloque))
+                for frase in self.segmentador.procesar(bloque, ahora):
+                    self._publicar(*frase)
+        except Exception as e:
+            logger.error(f"Error de captura de audio: {e}")
+            self.error = str(e)
+        finally:
+            frase = self.segmentador.cerrar(time.monotonic())
+            if frase:
+                self._publicar(*frase)
+            self._activo.clear()
+            self.fuente.cerrar()
+
+    def _evento_vad(self, evento, datos):
+        """Numera las frases y reenvía los eventos del segmentador"""
+        if evento == "inicio":
+            self._id_frase += 1
+        for callback in list(self._oyentes):
+            try:
+                callback(evento, self._id_frase, datos)
+            except Exception as e:
+                logger.error(f"Error en oyente de captura ({evento}): {e}")
+
+    def _publicar(self, audio, inicio, fin):
+        """Encola una frase segmentada para la concesión vigente"""
+        frase = Frase(audio, self.fuente.frecuencia, self.fuente.ancho_muestra,
+                      inicio, fin, self._id_frase, self.perfil_ruido)
+        vigente = self.concesion_vigente()
+        cola = vigente.frases if vigente is not None else self._frases
+        try:
+            cola.put_nowait(frase)
+        except Full:
+            # Nadie consume: se descarta la frase más vieja
+            try:
+                cola.get_nowait()
+            except Empty:
+                pass
+            cola.put_nowait(frase)
+
+
+# ============== INSTANCIA GLOBAL ==============
+_captura_instance = None
+
+
+def get_servicio_captura() -> ServicioCaptura:
+    """
+    Obtiene o crea el servicio global de captura
+
+    Returns:
+        ServicioCaptura: Instancia compartida por todos los modos de escucha
+    """
+    global _captura_instance
+
+    if _captura_instance is None:
+        _captura_instance = ServicioCaptura()
+
+    return _captura_instance
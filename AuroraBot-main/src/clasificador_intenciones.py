@@ -0,0 +1,319 @@
+"""
+Clasificador de intenciones - Comandos sin disparador explícito
+"Ponme música de Queen" o "quiero ver videos de gatos" no contienen
+ningún disparador de src.habilidades y terminaban en la IA. Un modelo
+lineal chico (regresión logística multiclase sobre n-gramas de
+caracteres) decide entre las habilidades y "ia" (conversación, preguntas)
+antes de llamar a la IA. Se entrena con el corpus etiquetado de
+data/intenciones.tsv al primer uso, en NumPy y en CPU: tarda menos de
+un cuarto de segundo y clasificar un comando, decenas de microsegundos.
+
+Los n-gramas de caracteres toleran conjugaciones y errores del ASR
+("reprodúceme", "pone") sin listas de sinónimos; el vocabulario sale
+del corpus (sin hash), así el modelo es el mismo en cada arranque.
+
+Uso (validación cruzada sobre el corpus):
+    python -m src.clasificador_intenciones
+    python -m src.clasificador_intenciones --umbral 0.7 "ponme algo de jazz"
+"""
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter
+
+import numpy as np
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import INTENT_CORPUS, INTENT_CONFIDENCE
+
+from src.difuso import normalizar
+
+logger = logging.getLogger(__name__)
+
+INTENCION_IA = "ia"      # etiqueta de lo que sigue yendo a la IA
+NGRAMAS = (2, 3, 4)      # largos de los n-gramas de caracteres
+REGULARIZACION = 1e-4    # peso de la penalización L2
+ITERACIONES = 200
+TASA_APRENDIZAJE = 2.0
+MOMENTO = 0.9
+
+# Conversación que empieza con las muletillas de las habilidades; no está en
+# el corpus, sirve para comprobar que el umbral no la desvía de la IA
+CONVERSACION_AMBIGUA = [
+    "quiero escuchar tu opinión sobre mi proyecto",
+    "quiero escuchar una historia tuya",
+    "quiero oír tu opinión",
+    "quiero ver si puedes ayudarme",
+    "quiero saber qué piensas de mí",
+    "necesito ayuda con la presentación de mañana",
+    "necesito un consejo sobre mi jefe",
+    "necesito que me escuches",
+    "pon atención a esta pregunta",
+    "pon cuidado en lo que dices",
+    "ponme un ejemplo de sujeto y predicado",
+    "me pones triste",
+    "muéstrame tu lado divertido",
+    "busca la manera de explicarlo más fácil",
+    "lanza una adivinanza",
+    "inicia un juego conmigo",
+    "arranca con una historia de miedo",
+    "enciende tu lado creativo y escribe una canción",
+    "carga mucho estrés mi trabajo qué hago",
+    "reproduce exactamente lo que te acabo de decir",
+]
+
+
+# ============== CORPUS ==============
+def cargar_corpus(ruta=INTENT_CORPUS) -> list:
+    """
+    Lee el corpus etiquetado (intención<TAB>frase, # para comentarios)
+
+    Returns:
+        list: Pares (intención, frase)
+    """
+    ejemplos = []
+    with open(ruta, encoding="utf-8") as f:
+        for numero, linea in enumerate(f, 1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            intencion, separador, frase = linea.partition("\t")
+            if not separador or not frase.strip():
+                logger.warning(f"{ruta}:{numero}: línea sin intención<TAB>frase")
+                continue
+            ejemplos.append((intencion.strip(), frase.strip()))
+    return ejemplos
+
+
+# ============== CARACTERÍSTICAS ==============
+def ngramas(texto) -> Counter:
+    """N-gramas de caracteres del texto normalizado, con espacios de borde"""
+    relleno = f" {normalizar(texto)} "
+    return Counter(relleno[i:i + n] for n in NGRAMAS for i in range(len(relleno) - n + 1))
+
+
+# ============== MODELO ==============
+class ClasificadorIntenciones:
+    """Regresión logística multiclase sobre n-gramas de caracteres"""
+
+    def __init__(self, regularizacion=REGULARIZACION, iteraciones=ITERACIONES,
+                 tasa=TASA_APRENDIZAJE):
+        self.regularizacion = regularizacion
+        self.iteraciones = iteraciones
+        self.tasa = tasa
+        self.intenciones = []    # Clases, en el orden de las columnas de pesos
+        self.vocabulario = {}    # n-grama → fila de pesos
+        self.pesos = None
+        self.sesgo = None
+        self.tiempo_entrenamiento = 0.0
+
+    def vector(self, texto) -> tuple:
+        """
+        Características de un texto: log(1 + frecuencia) por n-grama
+        conocido, con norma L2 = 1
+
+        Returns:
+            tuple: (índices, valores) de los n-gramas presentes en el vocabulario
+        """
+        conteo = ngramas(texto)
+        indices = [self.vocabulario[g] for g in conteo if g in self.vocabulario]
+        valores = np.log1p([conteo[g] for g in conteo if g in self.vocabulario])
+        norma = np.sqrt(np.dot(valores, valores))
+        return np.array(indices, dtype=np.intp), (valores / norma if norma else valores)
+
+    def entrenar(self, ejemplos):
+        """
+        Ajusta el modelo por descenso de gradiente con momento (lote completo)
+
+        Args:
+            ejemplos: Pares (intención, frase)
+        """
+        t0 = time.perf_counter()
+        self.intenciones = sorted({intencion for intencion, _ in ejemplos})
+        self.vocabulario = {g: i for i, g in enumerate(sorted(
+            {g for _, frase in ejemplos for g in ngramas(frase)}
+        ))}
+        x = np.zeros((len(ejemplos), len(self.vocabulario)), dtype=np.float32)
+        for fila, (_, frase) in enumerate(ejemplos):
+            indices, valores = self.vector(frase)
+            x[fila, indices] = valores
+        y = np.zeros((len(ejemplos), len(self.intenciones)), dtype=np.float32)
+        y[np.arange(len(ejemplos)), [self.intenciones.index(i) for i, _ in ejemplos]] = 1
+
+        pesos = np.zeros((len(self.vocabulario), len(self.intenciones)), dtype=np.float32)
+        sesgo = np.zeros(len(self.intenciones), dtype=np.float32)
+        paso_pesos, paso_sesgo = np.zeros_like(pesos), np.zeros_like(sesgo)
+        for _ in range(self.iteraciones):
+            error = (_softmax(x @ pesos + sesgo) - y) / len(ejemplos)
+            paso_pesos = MOMENTO * paso_pesos - self.tasa * (x.T @ error + self.regularizacion * pesos)
+            paso_sesgo = MOMENTO * paso_sesgo - self.tasa * error.sum(axis=0)
+            pesos += paso_pesos
+            sesgo += paso_sesgo
+        self.pesos, self.sesgo = pesos, sesgo
+        self.tiempo_entrenamiento = time.perf_counter() - t0
+        logger.info(f"Clasificador de intenciones: {len(ejemplos)} frases, "
+                    f"{len(self.vocabulario)} n-gramas, {len(self.intenciones)} intenciones "
+                    f"en {self.tiempo_entrenamiento * 1000:.0f} ms")
+
+    def probabilidades(self, texto) -> dict:
+        """Probabilidad de cada intención para el texto"""
+        indices, valores = self.vector(texto)
+        p = _softmax(valores @ self.pesos[indices] + self.sesgo)
+        return dict(zip(self.intenciones, p.tolist()))
+
+    def predecir(self, texto) -> tuple:
+        """
+        Returns:
+            tuple: (intención más probable, probabilidad)
+        """
+        indices, valores = self.vector(texto)
+        p = _softmax(valores @ self.pesos[indices] + self.sesgo)
+        mejor = int(np.argmax(p))
+        return self.intenciones[mejor], float(p[mejor])
+
+
+def _softmax(z) -> np.ndarray:
+    z = np.exp(z - z.max(axis=-1, keepdims=True))
+    return z / z.sum(axis=-1, keepdims=True)
+
+
+# ============== INSTANCIA GLOBAL ==============
+_clasificador_instance = None
+_clasificador_lock = threading.Lock()
+
+
+def get_clasificador_intenciones():
+    """
+    Obtiene o crea el clasificador global, entrenado con INTENT_CORPUS
+
+    Returns:
+        ClasificadorIntenciones: Listo para predecir, o None si no hay corpus
+    """
+    global _clasificador_instance
+
+    with _clasificador_lock:
+        if _clasificador_instance is None:
+            clasificador = ClasificadorIntenciones()
+            try:
+                clasificador.entrenar(cargar_corpus())
+            except OSError as e:
+                logger.warning(f"Clasificador de intenciones desactivado: {e}")
+                clasificador = False
+            _clasificador_instance = clasificador
+
+    return _clasificador_instance or None
+
+
+# ============== EVALUACIÓN ==============
+def validacion_cruzada(ejemplos, umbral=INTENT_CONFIDENCE, pliegues=5, semilla=0) -> dict:
+    """
+    Entrena con k-1 pliegues del corpus y clasifica el restante
+
+    Una frase se "resuelve en local" si la intención más probable no es
+    "ia" y llega al umbral: son las llamadas a la IA que se evitan.
+
+    Returns:
+        dict: Aciertos, cobertura, errores en local y tiempos
+    """
+    orden = list(ejemplos)
+    random.Random(semilla).shuffle(orden)
+    aciertos = locales = correctas = invadidas = 0
+    comandos = sum(1 for intencion, _ in orden if intencion != INTENCION_IA)
+    entrenamiento, inferencia = [], []
+    for k in range(pliegues):
+        prueba = orden[k::pliegues]
+        modelo = ClasificadorIntenciones()
+        modelo.entrenar([e for i, e in enumerate(orden) if i % pliegues != k])
+        entrenamiento.append(modelo.tiempo_entrenamiento)
+        for esperada, frase in prueba:
+            t0 = time.perf_counter()
+            intencion, p = modelo.predecir(frase)
+            inferencia.append(time.perf_counter() - t0)
+            aciertos += intencion == esperada
+            if intencion != INTENCION_IA and p >= umbral:
+                if esperada == INTENCION_IA:
+                    invadidas += 1
+                else:
+                    locales += 1
+                    correctas += intencion == esperada
+    return {
+        "frases": len(orden),
+        "exactitud": aciertos / len(orden),
+        "comandos": comandos,
+        "resueltos_local": locales,
+        "correctos_local": correctas,
+        "ia_desviadas": invadidas,
+        "entrenamiento_ms": float(np.mean(entrenamiento)) * 1000,
+        "inferencia_us": float(np.median(inferencia)) * 1e6,
+    }
+
+
+def desviadas(modelo, frases=CONVERSACION_AMBIGUA, umbral=INTENT_CONFIDENCE) -> list:
+    """
+    Frases de conversación que el modelo resolvería en local
+
+    Returns:
+        list: (frase, intención, probabilidad) de las que no irían a la IA
+    """
+    resultado = []
+    for frase in frases:
+        intencion, p = modelo.predecir(frase)
+        if intencion != INTENCION_IA and p >= umbral:
+            resultado.append((frase, intencion, p))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evalúa el clasificador de intenciones")
+    parser.add_argument("frases", nargs="*", help="Frases a clasificar con el modelo completo")
+    parser.add_argument("--umbral", type=float, default=INTENT_CONFIDENCE)
+    parser.add_argument("--pliegues", type=int, default=5)
+    parser.add_argument("--corpus", default=str(INTENT_CORPUS))
+    parser.add_argument("--json", help="Archivo JSONL donde agregar los resultados")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    ejemplos = cargar_corpus(args.corpus)
+    print(f"🏁 Clasificador de intenciones ({len(ejemplos)} frases, "
+          f"{', '.join(f'{i}: {n}' for i, n in sorted(Counter(i for i, _ in ejemplos).items()))})\n")
+    r = validacion_cruzada(ejemplos, args.umbral, args.pliegues)
+    print(f"Exactitud ({args.pliegues} pliegues): {r['exactitud']:.1%}")
+    print(f"Umbral {args.umbral:.2f}: {r['resueltos_local']} de {r['comandos']} comandos resueltos sin la IA "
+          f"({r['resueltos_local'] / max(1, r['comandos']):.0%} de llamadas evitadas), "
+          f"{r['resueltos_local'] - r['correctos_local']} con la habilidad equivocada")
+    print(f"Conversación desviada de la IA: {r['ia_desviadas']} de {r['frases'] - r['comandos']}")
+    modelo = ClasificadorIntenciones()
+    modelo.entrenar(ejemplos)
+    ambiguas = desviadas(modelo, umbral=args.umbral)
+    r["ambiguas_desviadas"] = len(ambiguas)
+    print(f"Conversación con muletillas desviada: {len(ambiguas)} de {len(CONVERSACION_AMBIGUA)}")
+    for frase, intencion, p in ambiguas:
+        print(f"  ⚠️  {frase!r} → {intencion} ({p:.2f})")
+    print(f"Entrenamiento: {r['entrenamiento_ms']:.0f} ms   Inferencia: {r['inferencia_us']:.0f} µs por frase")
+
+    if args.frases:
+        print()
+        for frase in args.frases:
+            intencion, p = modelo.predecir(frase)
+            destino = intencion if intencion != INTENCION_IA and p >= args.umbral else "→ IA"
+            print(f"  {frase!r}: {intencion} ({p:.2f}) {destino}")
+
+    if args.json:
+        registro = {"fecha": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": dict(vars(args)),
+                    "resultados": r}
+        registro["config"].pop("json")
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        print(f"\n📝 Resultados agregados a {args.json}")
+
+
+if __name__ == "__main__":
+    main()
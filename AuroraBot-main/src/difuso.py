@@ -0,0 +1,127 @@
+"""
+Coincidencia aproximada - Índice de trigramas con distancia de edición acotada
+El reconocimiento de voz entrega "busca en yutub", "wikipedía" o "abre
+firfox": a la búsqueda exacta se le escapan y el comando termina en la
+IA. Las frases conocidas (disparadores, nombres de programas) se indexan
+una vez por sus trigramas de caracteres; una consulta solo compara con las
+frases que comparten suficientes trigramas (cada edición destruye a lo
+sumo tres) y la distancia de Levenshtein se calcula con un tope, cortando
+en cuanto se supera. Tildes y mayúsculas no cuentan como errores.
+"""
+import unicodedata
+from itertools import chain
+from collections import Counter, defaultdict
+
+CARACTERES_POR_ERROR = 5  # una edición permitida cada 5 caracteres (frases de <5: exactas)
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin tildes y con espacios simples"""
+    descompuesto = unicodedata.normalize("NFKD", (texto or "").lower())
+    return " ".join("".join(c for c in descompuesto if not unicodedata.combining(c)).split())
+
+
+def trigramas(texto) -> set:
+    """Trigramas de caracteres del texto con relleno (los bordes también cuentan)"""
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def distancia_permitida(frase) -> int:
+    """Errores tolerados al comparar con una frase según su largo"""
+    return len(frase) // CARACTERES_POR_ERROR
+
+
+def distancia_acotada(a, b, maximo) -> int:
+    """
+    Distancia de Levenshtein, o maximo + 1 si la supera
+
+    Solo se calculan las celdas a menos de maximo de la diagonal y se corta
+    en cuanto toda una fila supera el tope.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    if len(a) > len(b):
+        a, b = b, a
+    fuera = maximo + 1
+    previa = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        desde, hasta = max(1, i - maximo), min(len(b), i + maximo)
+        fila = [fuera] * (len(b) + 1)
+        fila[0] = i if i <= maximo else fuera
+        caracter = a[i - 1]
+        for j in range(desde, hasta + 1):
+            fila[j] = min(previa[j] + 1, fila[j - 1] + 1, previa[j - 1] + (caracter != b[j - 1]))
+        if min(fila[desde - 1:hasta + 1]) > maximo:
+            return fuera
+        previa = fila
+    return min(previa[len(b)], fuera)
+
+
+class IndiceTrigramas:
+    """Frases conocidas indexadas por trigramas para buscarlas con errores"""
+
+    def __init__(self, frases):
+        """
+        Args:
+            frases: Textos a indexar (se comparan normalizados)
+        """
+        self.frases = []       # Textos originales
+        self._normalizadas = []
+        self._trigramas = []
+        self._indice = defaultdict(list)
+        for frase in frases:
+            normalizada = normalizar(frase)
+            if not normalizada:
+                continue
+            i = len(self.frases)
+            self.frases.append(frase)
+            self._normalizadas.append(normalizada)
+            self._trigramas.append(len(trigramas(normalizada)))
+            for trigrama in trigramas(normalizada):
+                self._indice[trigrama].append(i)
+        # Largos de consulta que pueden estar dentro de la distancia de alguna frase
+        self.largo_minimo = min((len(f) - distancia_permitida(f) for f in self._normalizadas), default=0)
+        self.largo_maximo = max((len(f) + distancia_permitida(f) for f in self._normalizadas), default=0)
+
+    def __len__(self):
+        return len(self.frases)
+
+    def buscar(self, texto, maximo=None, normalizado=False):
+        """
+        Frase más parecida al texto dentro de la distancia permitida
+
+        Args:
+            texto: Consulta
+            maximo: Tope de ediciones (además de la distancia_permitida de
+                    cada frase)
+            normalizado: El texto ya pasó por normalizar()
+
+        Returns:
+            tuple: (frase, distancia), o None si ninguna está lo bastante cerca
+        """
+        consulta = texto if normalizado else normalizar(texto)
+        if not self.largo_minimo <= len(consulta) <= self.largo_maximo:
+            return None
+        propios = trigramas(consulta)
+        comunes = Counter(chain.from_iterable(self._indice.get(t, ()) for t in propios))
+
+        mejor = None
+        for i, compartidos in comunes.items():
+            frase = self._normalizadas[i]
+            tope = distancia_permitida(frase)
+            if maximo is not None:
+                tope = min(tope, maximo)
+            if mejor is not None:
+                tope = min(tope, mejor[1] - 1)
+            # Cada edición destruye a lo sumo tres trigramas de cada lado
+            if tope < 0 or compartidos < max(len(propios), self._trigramas[i]) - 3 * tope:
+                continue
+            d = distancia_acotada(consulta, frase, tope)
+            if d <= tope:
+                mejor = (i, d)
+                if d == 0:
+                    break
+        if mejor is None:
+            return None
+        return self.frases[mejor[0]], mejor[1]
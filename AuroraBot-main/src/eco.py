@@ -0,0 +1,275 @@
+"""
+Eco del TTS - Referencia de reproducción y cancelación en el micrófono
+Para escuchar mientras Aura habla (barge-in) el micrófono no puede
+confundir la voz de Aura con la del usuario. El servicio de voz registra
+aquí qué suena y cuándo; la captura lo usa para:
+  - Clips WAV (motores offline): restar el eco con un filtro adaptativo
+    NLMS en frecuencia (FDAF), alineado con un retardo estimado por GCC-PHAT.
+  - Clips MP3 (gTTS, sin decodificador): no hay forma de onda de
+    referencia; mientras suena se exige energía por encima del eco aprendido.
+"""
+import time
+import logging
+import threading
+
+import numpy as np
+
+from config.settings import (
+    ECHO_RATIO, ECHO_FILTER_TAPS, ECHO_NLMS_MU, ECHO_MAX_DELAY_MS, ECHO_TAIL_MS
+)
+
+from src.vad import pcm_a_float, float_a_pcm
+
+logger = logging.getLogger(__name__)
+
+# Seguimiento del eco residual mientras suena el TTS: sigue los picos de la
+# envolvente (sube rápido, baja lento) para no abrir frases entre sílabas
+ALFA_SUBIDA = 0.2
+ALFA_BAJADA = 0.05
+APRENDIZAJE = 0.3        # segundos de la primera reproducción sin barge-in (mide el eco)
+HISTORIAL_RETARDO = 0.5  # segundos de señal para estimar el retardo
+ESTIMAR_CADA = 0.5       # segundos entre estimaciones del retardo
+
+
+# ============== REFERENCIA ==============
+class ReferenciaReproduccion:
+    """Línea de tiempo (time.monotonic) de los clips que suenan por el parlante"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clips = []  # [inicio, fin, muestras float o None, frecuencia]
+
+    def registrar(self, inicio, duracion, pcm=None, frecuencia=None, ancho_muestra=2, canales=1):
+        """
+        Registra un clip que empieza a sonar
+
+        Args:
+            inicio: time.monotonic() en que se entregó al reproductor
+            duracion: Segundos de audio
+            pcm: PCM del clip (None si no se conoce la forma de onda, p. ej. MP3)
+            frecuencia, ancho_muestra, canales: Formato del PCM
+        """
+        muestras = None
+        if pcm:
+            muestras = pcm_a_float(pcm[:len(pcm) - len(pcm) % (ancho_muestra * canales)], ancho_muestra)
+            if canales > 1:
+                muestras = muestras.reshape(-1, canales).mean(axis=1)
+        with self._lock:
+            self._clips.append([inicio, inicio + duracion, muestras, frecuencia])
+            limite = time.monotonic() - 5.0
+            self._clips = [c for c in self._clips if c[1] > limite]
+
+    def cortar(self, instante=None):
+        """El audio dejó de sonar en este instante (TTS detenido)"""
+        instante = time.monotonic() if instante is None else instante
+        with self._lock:
+            for clip in self._clips:
+                clip[1] = min(clip[1], instante)
+
+    def sonando(self, desde, hasta) -> bool:
+        """Si algún clip suena en el intervalo"""
+        with self._lock:
+            return any(c[0] < hasta and c[1] > desde for c in self._clips)
+
+    def senal(self, desde, n, frecuencia):
+        """
+        Forma de onda de referencia de n muestras a partir de un instante
+
+        Returns:
+            tuple: (np.ndarray con ceros donde no suena nada o None si lo que
+                    suena no tiene forma de onda conocida, sonando bool)
+        """
+        hasta = desde + n / frecuencia
+        tiempos = desde + np.arange(n) / frecuencia
+        salida = np.zeros(n)
+        sonando, conocida = False, True
+        with self._lock:
+            clips = [c for c in self._clips if c[0] < hasta and c[1] > desde]
+        for inicio, fin, muestras, fr in clips:
+            sonando = True
+            if muestras is None:
+                conocida = False
+                continue
+            mascara = (tiempos >= inicio) & (tiempos < fin)
+            if mascara.any():
+                posiciones = (tiempos[mascara] - inicio) * fr
+                salida[mascara] += np.interp(posiciones, np.arange(len(muestras)), muestras, right=0.0)
+        return (salida if conocida else None), sonando
+
+
+# ============== CANCELADOR ==============
+class CanceladorEco:
+    """
+    Quita el eco del TTS de los bloques del micrófono y mide el eco
+    residual para que el VAD solo abra frases con voz del usuario
+    """
+
+    def __init__(self, referencia, frecuencia, ancho_muestra=2, taps=ECHO_FILTER_TAPS,
+                 mu=ECHO_NLMS_MU, max_retardo_ms=ECHO_MAX_DELAY_MS, ratio=ECHO_RATIO):
+        """
+        Args:
+            referencia: ReferenciaReproduccion compartida con el servicio de voz
+            frecuencia: Frecuencia de muestreo del micrófono
+            ancho_muestra: Bytes por muestra del micrófono
+            taps: Largo del filtro adaptativo (y del bloque FDAF)
+            mu: Paso de adaptación NLMS (0-1)
+            max_retardo_ms: Retardo acústico máximo que se busca
+            ratio: La voz del usuario debe superar el eco residual x ratio
+        """
+        self.referencia = referencia
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.n = taps
+        self.mu = mu
+        self.ratio = ratio
+        self.max_retardo = int(max_retardo_ms * frecuencia / 1000)
+        self.cola = ECHO_TAIL_MS / 1000
+
+        self.adaptar = True     # la captura lo apaga durante la voz del usuario
+        self.retardo = 0        # muestras entre la entrega al reproductor y el micrófono
+        self.eco = None         # RMS del eco residual aprendido
+
+        self._W = np.zeros(2 * self.n, dtype=complex)
+        self._P = None          # potencia de la referencia por bin (normalización NLMS)
+        self._x_previo = np.zeros(self.n)
+        self._t0 = None         # instante de la muestra 0 del micrófono
+        self._muestras = 0
+        self._hist_mic = np.zeros(0)
+        self._hist_ref = np.zeros(0)
+        self._proxima_estimacion = 0.0
+        self._candidato = None  # retardo nuevo pendiente de confirmar
+        self._estimado = False  # ya hubo una estimación del retardo
+        self._aprendiendo = []
+        self._sonando_hasta = 0.0
+
+    # ============== ESTADO PARA EL VAD ==============
+    def activo(self, instante) -> bool:
+        """Si el eco del TTS puede estar llegando al micrófono en este instante"""
+        return instante <= self._sonando_hasta + self.cola
+
+    def umbral(self) -> float:
+        """Energía mínima de la voz del usuario mientras suena el TTS"""
+        if self.eco is None:
+            return float("inf")  # todavía se está midiendo el eco
+        return self.eco * self.ratio
+
+    def observar(self, rms, duracion):
+        """Incorpora un marco sin voz del usuario al estimador de eco residual"""
+        if self.eco is None:
+            self._aprendiendo.append(rms)
+            if len(self._aprendiendo) * duracion >= APRENDIZAJE:
+                self.eco = float(np.percentile(self._aprendiendo, 90))
+                self._aprendiendo = []
+                logger.info(f"Eco del TTS medido: RMS {self.eco:.0f}")
+            return
+        alfa = ALFA_SUBIDA if rms > self.eco else ALFA_BAJADA
+        self.eco += alfa * (rms - self.eco)
+
+    # ============== CANCELACIÓN ==============
+    def cancelar(self, bloque, instante):
+        """
+        Args:
+            bloque: Bytes PCM del micrófono
+            instante: time.monotonic() del final del bloque
+
+        Returns:
+            bytes: El bloque sin el eco que se pudo cancelar (mismo formato)
+        """
+        d = pcm_a_float(bloque, self.ancho_muestra)
+        n = len(d)
+        # Reloj de muestras continuo: evita el jitter de los instantes de lectura
+        if self._t0 is None or abs(self._t0 + (self._muestras + n) / self.frecuencia - instante) > 0.05:
+            self._t0 = instante - (self._muestras + n) / self.frecuencia
+        desde = self._t0 + self._muestras / self.frecuencia
+        self._muestras += n
+
+        ref, sonando = self.referencia.senal(desde - self.retardo / self.frecuencia, n, self.frecuencia)
+        if not sonando:
+            self._x_previo = np.zeros(self.n)
+            return bloque
+        self._sonando_hasta = instante
+        if ref is None:
+            return bloque  # MP3: solo compuerta de energía
+
+        self._estimar_retardo(d, desde, instante)
+        return float_a_pcm(self._fdaf(d, ref), self.ancho_muestra)
+
+    def _fdaf(self, d, x):
+        """Filtro adaptativo en frecuencia (overlap-save con restricción de gradiente)"""
+        N = self.n
+        salida = np.empty_like(d)
+        for i in range(0, len(d) - len(d) % N, N):
+            xb, db = x[i:i + N], d[i:i + N]
+            X = np.fft.fft(np.concatenate((self._x_previo, xb)))
+            y = np.real(np.fft.ifft(X * self._W))[N:]
+            e = db - y
+            salida[i:i + N] = e
+            if self.adaptar and np.any(xb):
+                potencia = np.abs(X) ** 2
+                self._P = potencia if self._P is None else 0.9 * self._P + 0.1 * potencia
+                # Regularización relativa: los bins casi vacíos de la voz no disparan el paso
+                normal = self._P + 0.01 * self._P.mean() + 1e-6
+                E = np.fft.fft(np.concatenate((np.zeros(N), e)))
+                gradiente = np.real(np.fft.ifft(np.conj(X) * E / normal))[:N]
+                self._W += self.mu * np.fft.fft(np.concatenate((gradiente, np.zeros(N))))
+            self._x_previo = xb
+        resto = len(d) % N
+        if resto:
+            salida[-resto:] = d[-resto:]
+        return salida
+
+    def _estimar_retardo(self, d, desde, instante):
+        """Retardo acústico por correlación cruzada GCC-PHAT micrófono/referencia"""
+        ref_cero, _ = self.referencia.senal(desde, len(d), self.frecuencia)
+        if ref_cero is None:
+            return
+        largo = int(HISTORIAL_RETARDO * self.frecuencia)
+        self._hist_mic = np.concatenate((self._hist_mic, d))[-largo:]
+        self._hist_ref = np.concatenate((self._hist_ref, ref_cero))[-largo:]
+        if instante < self._proxima_estimacion or len(self._hist_mic) < largo:
+            return
+        self._proxima_estimacion = instante + ESTIMAR_CADA
+        if not self.adaptar or not np.any(self._hist_ref):
+            return
+
+        n_fft = 1 << (2 * largo - 1).bit_length()
+        cruzado = np.fft.rfft(self._hist_mic, n_fft) * np.conj(np.fft.rfft(self._hist_ref, n_fft))
+        correlacion = np.fft.irfft(cruzado / (np.abs(cruzado) + 1e-9), n_fft)[:self.max_retardo + 1]
+        pico = int(np.argmax(correlacion))
+        if correlacion[pico] <= 4 * np.mean(np.abs(correlacion)):
+            return
+        # Un poco antes del pico: la respuesta del recinto queda dentro del filtro
+        nuevo = max(0, pico - self.n // 8)
+        if abs(nuevo - self.retardo) <= self.n // 4:
+            self._candidato = None
+            return
+        # La voz es casi periódica: un pico aislado puede ser un múltiplo del
+        # tono, así que un retardo ya estimado solo cambia si dos estimaciones coinciden
+        confirmado = self._candidato is not None and abs(nuevo - self._candidato) <= self.n // 4
+        if not self._estimado or confirmado:
+            self._estimado = True
+            logger.debug(f"Retardo del eco: {nuevo / self.frecuencia * 1000:.0f} ms")
+            self.retardo = nuevo
+            self._W[:] = 0
+            self._candidato = None
+        else:
+            self._candidato = nuevo
+
+
+# ============== INSTANCIA GLOBAL ==============
+_referencia_instance = None
+
+
+def get_referencia_eco() -> ReferenciaReproduccion:
+    """
+    Obtiene o crea la referencia global de reproducción
+
+    Returns:
+        ReferenciaReproduccion: Compartida por el servicio de voz y la captura
+    """
+    global _referencia_instance
+
+    if _referencia_instance is None:
+        _referencia_instance = ReferenciaReproduccion()
+
+    return _referencia_instance
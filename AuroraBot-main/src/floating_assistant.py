@@ -4,14 +4,17 @@ Widget Flotante de Aurora con Activación por Voz - CORREGIDO
 Burbuja persistente que escucha al hacer click
 AHORA CON SOPORTE COMPLETO PARA BÚSQUEDAS WEB
 """
-import time
 import threading
 from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt, QTimer, QPoint, QPropertyAnimation, QEasingCurve, Signal, QThread, Property
 from PySide6.QtGui import QPainter, QColor, QRadialGradient, QCursor, QFont
 from PySide6.QtWidgets import QWidget, QApplication, QLabel, QVBoxLayout
 
-from src.main import escuchar, procesar_comando, hablar, stop_tts, tts_is_playing
+from src.main import (
+    escuchar, procesar_comando, hablar, stop_tts, tts_is_playing,
+    prioridad_para, PRIORIDAD_URGENTE, adquirir_microfono
+)
+from src.senales_voz import get_senales_tts, get_senales_transcripcion
 
 
 # ============== WORKER PARA ESCUCHAR ==============
@@ -33,9 +36,10 @@ class ListenWorker(QThread):
         # Detener cualquier TTS activo antes de escuchar
         if tts_is_playing():
             stop_tts()
-            time.sleep(0.1)
         
-        comando = escuchar()
+        # Desplaza al modo voz continuo (si está activo) solo durante esta frase
+        with adquirir_microfono("widget flotante") as concesion:
+            comando = escuchar(concesion=concesion)
         
         self.listening_stopped.emit()
         
@@ -78,19 +82,15 @@ class ProcessWorker(QThread):
                 self.status_changed.emit("💬 Respondiendo...")
                 self.response_ready.emit(respuesta_texto)
                 
-                # Hablar la respuesta
-                hablar(respuesta_texto)
-                
-                # Esperar a que termine de hablar
-                while tts_is_playing():
-                    time.sleep(0.1)
+                # Hablar la respuesta y esperar a que termine de sonar
+                hablar(respuesta_texto, prioridad=prioridad_para(respuesta_dict)).result()
                 
                 self.status_changed.emit("✅ Listo")
             else:
                 # Caso de error inesperado
                 respuesta_texto = "Error interno: La respuesta del procesador es inválida."
                 self.response_ready.emit(respuesta_texto)
-                hablar(respuesta_texto)
+                hablar(respuesta_texto, prioridad=PRIORIDAD_URGENTE)
                 self.status_changed.emit("❌ Error")
                 
         except Exception as e:
@@ -159,6 +159,12 @@ class FloatingVoiceWidget(QWidget):
         # Label de estado (opcional, se puede ocultar)
         self.status_label = None
         self.create_status_label()
+        
+        # Estado de la voz (eventos del TTS)
+        senales = get_senales_tts()
+        senales.iniciado.connect(lambda _: self.show_status("🔊 Hablando...", 0))
+        senales.terminado.connect(lambda _: self.status_label.hide())
+        senales.interrumpido.connect(lambda _: self.show_status("⏹ Interrumpido", 1500))
     
     # ============== PROPIEDAD ANIMABLE ==============
     def getPulseScale(self):
@@ -345,10 +351,20 @@ class FloatingVoiceWidget(QWidget):
         self.listen_worker.command_received.connect(self.on_command_received)
         self.listen_worker.status_changed.connect(self.show_status)
         self.listen_worker.listening_stopped.connect(self.stop_listening_animation)
+        get_senales_transcripcion().parcial.connect(self.mostrar_parcial)
         self.listen_worker.start()
     
+    def mostrar_parcial(self, texto):
+        """Muestra la transcripción parcial mientras se escucha"""
+        if self.is_listening:
+            self.show_status(f"💭 {texto[-40:]}", 0)
+    
     def stop_listening_animation(self):
         """Detiene la animación de escucha"""
+        try:
+            get_senales_transcripcion().parcial.disconnect(self.mostrar_parcial)
+        except (RuntimeError, TypeError):
+            pass
         self.is_listening = False
         self.pulse_animation.stop()
         self._pulse_scale = 1.0
@@ -0,0 +1,372 @@
+"""
+Habilidades de Aura - Registro declarativo de comandos
+Cada habilidad declara sus frases disparadoras, cómo extraer el argumento
+del comando y la ruta ("modulo:funcion") de su manejador. El enrutador de
+intenciones se construye con esos datos y el módulo del manejador se
+importa recién la primera vez que se usa: arrancar Aura no escanea los
+programas instalados (habilidades_sistema) ni carga wikipedia/pywhatkit
+(habilidades_web) hasta que se piden.
+
+Agregar una habilidad es agregar un Habilidad(...) a HABILIDADES (o
+llamar a get_registro_habilidades().registrar desde otro módulo).
+
+Los comandos sin disparador ("ponme música de Queen") pasan por el
+clasificador de intenciones (src.clasificador_intenciones) antes de ir
+a la IA; solo se consideran las habilidades que declaran muletillas.
+"""
+import re
+import time
+import logging
+import importlib
+import threading
+from collections import Counter
+
+from config.settings import EXIT_COMMANDS, INTENT_CLASSIFIER, INTENT_CONFIDENCE
+
+from src.intenciones import EnrutadorIntenciones, Coincidencia
+
+logger = logging.getLogger(__name__)
+
+# Prefijos de comandos explícitos
+PREFIJOS_GOOGLE = ["busca en google", "buscar en google", "googlea"]
+PREFIJOS_YOUTUBE = ["busca en youtube", "buscar en youtube", "pon en youtube", "reproduce en youtube"]
+PREFIJOS_WIKIPEDIA = ["busca en wikipedia", "buscar en wikipedia", "wikipedia"]
+PREFIJOS_ABRIR = ["abre", "abrir"]
+
+# Muletillas: cómo se piden las mismas cosas sin el disparador
+MULETILLAS_GOOGLE = ["busca", "búscame", "buscar", "busca en internet", "busca en la web",
+                     "buscar en internet", "investiga", "averigua", "encuentra", "encuéntrame",
+                     "quiero saber", "mira en internet", "consulta en internet"]
+MULETILLAS_YOUTUBE = ["ponme", "me pones", "puedes poner", "reproduce", "reprodúceme",
+                      "quiero ver", "quiero escuchar", "quiero oír", "muéstrame"]
+MULETILLAS_ABRIR = ["lanza", "ejecuta", "inicia", "arranca", "ábreme", "carga el programa",
+                    "pon en marcha", "quiero usar", "necesito abrir"]
+PALABRAS_ANTES_MULETILLA = 2  # "aura, ponme …", "por favor busca …"
+# Palabras que solas no son un argumento ("busca en", "ponme algo")
+PALABRAS_VACIAS = frozenset({
+    "a", "al", "de", "del", "en", "con", "por", "para", "sobre", "y", "o", "que",
+    "el", "la", "lo", "los", "las", "un", "una", "unos", "unas",
+    "me", "te", "mi", "algo", "eso", "esto", "favor",
+})
+
+
+# ============== EXTRACTORES DE ARGUMENTOS ==============
+def argumento(coincidencia) -> str:
+    """Lo que sigue al disparador ("busca en google [el clima]")"""
+    return coincidencia.argumento
+
+
+def comando_completo(coincidencia) -> str:
+    """El comando entero (el manejador extrae lo que necesita)"""
+    return coincidencia.texto
+
+
+def tema_wikipedia(coincidencia) -> str:
+    """"wikipedia de X", "wikipedia sobre X" o "X en wikipedia" → X"""
+    termino = coincidencia.argumento or re.sub(r"\s+en$", "", coincidencia.previo)
+    return re.sub(r"^(?:de|sobre)\s+", "", termino).strip()
+
+
+# ============== HABILIDADES ==============
+class Habilidad:
+    """Comando que Aura resuelve sin la IA"""
+
+    def __init__(self, nombre, disparadores, manejador=None, extraer=argumento, accion=None,
+                 mensaje="{resultado}", continuar=True, opcional=False, consulta=True,
+                 anticipable=False, aproximada=True, muletillas=(), palabras_antes=None,
+                 palabras_despues=None):
+        """
+        Args:
+            nombre: Identificador (la intención del enrutador)
+            disparadores: Frases que la activan (como palabras completas)
+            manejador: "modulo:funcion" que recibe el argumento (None = solo responde)
+            extraer: Función (Coincidencia) → argumento del manejador
+            accion: Valor de "action" en la respuesta
+            mensaje: Plantilla de la respuesta con {termino} y {resultado}
+            continuar: False si la habilidad termina el asistente
+            opcional: Si el manejador no devuelve nada, el comando sigue a la IA
+            consulta: Incluir el argumento como "query" en la respuesta
+            anticipable: Se puede despachar desde una transcripción parcial
+                         (empieza con el disparador y ya tiene argumento)
+            aproximada: Los disparadores se reconocen también con errores del
+                        ASR ("busca en yutub"); no en las que es caro equivocar
+            muletillas: Frases con que empieza el comando cuando no usa un
+                        disparador ("ponme", "quiero ver"). Habilitan el
+                        clasificador de intenciones para esta habilidad y
+                        se quitan del argumento
+            palabras_antes: Máximo de palabras antes del disparador (None =
+                            cualquiera); con palabras_despues, exige que el
+                            disparador sea casi todo el comando
+            palabras_despues: Máximo de palabras después del disparador
+        """
+        self.nombre = nombre
+        self.disparadores = list(disparadores)
+        self.manejador = manejador
+        self.extraer = extraer
+        self.accion = accion or nombre
+        self.mensaje = mensaje
+        self.continuar = continuar
+        self.opcional = opcional
+        self.consulta = consulta
+        self.anticipable = anticipable
+        self.aproximada = aproximada
+        self.muletillas = list(muletillas)
+        self.palabras_antes = palabras_antes
+        self.palabras_despues = palabras_despues
+        self._funcion = None
+        self._muletillas = None
+
+    def funcion(self):
+        """El manejador, importando su módulo la primera vez"""
+        if self._funcion is None and self.manejador:
+            modulo, _, nombre = self.manejador.partition(":")
+            t0 = time.perf_counter()
+            self._funcion = getattr(importlib.import_module(modulo), nombre)
+            logger.info(f"Habilidad '{self.nombre}': {modulo} cargado en "
+                        f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+        return self._funcion
+
+    def admite(self, coincidencia) -> bool:
+        """El disparador está donde la habilidad lo acepta (no en medio de otra frase)"""
+        if self.palabras_antes is not None and len(coincidencia.previo.split()) > self.palabras_antes:
+            return False
+        if self.palabras_despues is not None and len(coincidencia.argumento.split()) > self.palabras_despues:
+            return False
+        return True
+
+    def falta_argumento(self, coincidencia) -> bool:
+        """
+        El manejador no tendría con qué trabajar: el argumento está vacío o
+        son solo palabras vacías ("busca en" → "en")
+        """
+        if not self.manejador:
+            return False
+        palabras = re.findall(r"\w+", self.extraer(coincidencia).lower())
+        return all(palabra in PALABRAS_VACIAS for palabra in palabras)
+
+    def coincidencia_clasificada(self, comando) -> Coincidencia:
+        """
+        Coincidencia de un comando que el clasificador asignó a esta habilidad
+
+        El argumento es lo que sigue a la muletilla ("ponme [música de
+        Queen]"), o el comando entero si no empieza con una.
+        """
+        if self._muletillas is None:
+            self._muletillas = EnrutadorIntenciones([(self.nombre, self.muletillas)])
+        c = self._muletillas.buscar(comando, aproximado=False)
+        if c is None or len(c.previo.split()) > PALABRAS_ANTES_MULETILLA:
+            return Coincidencia(self.nombre, None, comando.strip(), 0, 0)
+        return Coincidencia(self.nombre, c.disparador, c.argumento, 0, 0)
+
+    def ejecutar(self, coincidencia):
+        """
+        Corre el manejador con el argumento del comando
+
+        Returns:
+            tuple: (respuesta_dict, continuar), o None si la habilidad es
+                   opcional y no resolvió el comando
+        """
+        termino = self.extraer(coincidencia)
+        resultado = self.funcion()(termino) if self.manejador else None
+        if self.opcional and not resultado:
+            return None
+        respuesta = {"action": self.accion,
+                     "message": self.mensaje.format(termino=termino, resultado=resultado)}
+        if self.consulta:
+            respuesta["query"] = termino
+        return respuesta, self.continuar
+
+    def __repr__(self):
+        return f"Habilidad({self.nombre!r}, {self.manejador!r})"
+
+
+# Orden = prioridad entre disparadores que empiezan en la misma posición
+HABILIDADES = [
+    # Salir solo si es todo el comando ("adiós aura", "bueno, eso es todo"):
+    # "terminar la tarea es difícil" o "cómo salir de deudas" van a la IA
+    Habilidad("exit", EXIT_COMMANDS, mensaje="¡Hasta luego! Fue un placer ayudarte.",
+              continuar=False, consulta=False, aproximada=False,
+              palabras_antes=PALABRAS_ANTES_MULETILLA, palabras_despues=1),
+    Habilidad("google", PREFIJOS_GOOGLE, "src.habilidades_web:buscar_en_google_directo",
+              accion="open_google", mensaje="Listo, busqué '{termino}'.", anticipable=True,
+              muletillas=MULETILLAS_GOOGLE),
+    Habilidad("youtube", PREFIJOS_YOUTUBE, "src.habilidades_web:buscar_en_youtube",
+              accion="play_youtube", mensaje="Reproduciendo '{termino}'.", anticipable=True,
+              muletillas=MULETILLAS_YOUTUBE),
+    Habilidad("wikipedia", PREFIJOS_WIKIPEDIA, "src.habilidades_web:resumir_wikipedia",
+              extraer=tema_wikipedia, accion="wikipedia_summary"),
+    Habilidad("abrir", PREFIJOS_ABRIR, "src.habilidades_sistema:abrir_programa",
+              extraer=comando_completo, accion="system", opcional=True, consulta=False,
+              aproximada=False,  # el nombre del programa sí se busca aproximado
+              muletillas=MULETILLAS_ABRIR),
+]
+
+
+# ============== REGISTRO ==============
+class RegistroHabilidades:
+    """Habilidades registradas y el enrutador compilado a partir de ellas"""
+
+    def __init__(self, habilidades=(), clasificar=INTENT_CLASSIFIER, umbral=INTENT_CONFIDENCE):
+        """
+        Args:
+            habilidades: Habilidades iniciales
+            clasificar: Usar el clasificador de intenciones sin disparador
+            umbral: Probabilidad mínima para aceptar lo que clasificó
+        """
+        self._lock = threading.Lock()
+        self._habilidades = {}
+        self._enrutador = None
+        self.clasificar_intenciones = clasificar
+        self.umbral = umbral
+        self.origenes = Counter()  # Comandos por cómo se resolvieron (o "ia")
+        for habilidad in habilidades:
+            self.registrar(habilidad)
+
+    def registrar(self, habilidad):
+        """Agrega (o reemplaza) una habilidad; el enrutador se recompila al usarse"""
+        with self._lock:
+            self._habilidades[habilidad.nombre] = habilidad
+            self._enrutador = None
+
+    @property
+    def habilidades(self) -> list:
+        return list(self._habilidades.values())
+
+    def enrutador(self) -> EnrutadorIntenciones:
+        with self._lock:
+            if self._enrutador is None:
+                self._enrutador = EnrutadorIntenciones(
+                    [(h.nombre, h.disparadores) for h in self._habilidades.values()],
+                    aproximadas=[h.nombre for h in self._habilidades.values() if h.aproximada]
+                )
+            return self._enrutador
+
+    def buscar(self, comando, aproximado=True):
+        """
+        Args:
+            comando: Texto del usuario
+            aproximado: Aceptar disparadores con errores de reconocimiento
+
+        Returns:
+            tuple: (Habilidad, Coincidencia), o (None, None) si ningún disparador aparece
+        """
+        enrutador = self.enrutador()
+        coincidencia = enrutador.buscar(comando, aproximado)
+        # Un disparador fuera de lugar no cuenta: se sigue buscando después de él
+        while coincidencia is not None and not self._habilidades[coincidencia.intencion].admite(coincidencia):
+            texto, fin = coincidencia.texto, coincidencia.fin
+            siguiente = enrutador.buscar(texto[fin:], aproximado=False)
+            if siguiente is None:
+                return None, None
+            desplazamiento = fin + len(texto[fin:]) - len(texto[fin:].lstrip())
+            coincidencia = Coincidencia(siguiente.intencion, siguiente.disparador, texto,
+                                        siguiente.inicio + desplazamiento, siguiente.fin + desplazamiento)
+        if coincidencia is None:
+            return None, None
+        if coincidencia.distancia:
+            logger.info(f"Comando '{comando}' → {coincidencia.intencion} "
+                        f"(disparador aproximado, {coincidencia.distancia} errores)")
+        return self._habilidades[coincidencia.intencion], coincidencia
+
+    def clasificar(self, comando):
+        """
+        Habilidad de un comando sin disparador según el clasificador de intenciones
+
+        Returns:
+            tuple: (Habilidad, Coincidencia), o (None, None) si el comando es
+                   para la IA o la confianza no llega al umbral
+        """
+        if not self.clasificar_intenciones:
+            return None, None
+        # Como los manejadores: NumPy y el entrenamiento recién al primer uso
+        from src.clasificador_intenciones import get_clasificador_intenciones
+        clasificador = get_clasificador_intenciones()
+        if clasificador is None:
+            return None, None
+        intencion, probabilidad = clasificador.predecir(comando)
+        habilidad = self._habilidades.get(intencion)
+        if habilidad is None or not habilidad.muletillas or probabilidad < self.umbral:
+            logger.debug(f"Comando '{comando}' → IA (clasificador: {intencion}, p={probabilidad:.2f})")
+            return None, None
+        logger.info(f"Comando '{comando}' → {intencion} (clasificador, p={probabilidad:.2f})")
+        return habilidad, habilidad.coincidencia_clasificada(comando)
+
+    def resolver(self, comando):
+        """
+        Habilidad de un comando sin ejecutarla: disparador exacto o
+        aproximado y, si no hay, el clasificador. Lo que no vino de un
+        disparador exacto y deja al manejador sin argumento ("busca",
+        "busca en goglea") va a la IA
+
+        Returns:
+            tuple: (Habilidad, Coincidencia, origen), o (None, None, "ia")
+        """
+        habilidad, coincidencia = self.buscar(comando)
+        if habilidad is not None:
+            origen = "aproximado" if coincidencia.distancia else "disparador"
+        else:
+            habilidad, coincidencia = self.clasificar(comando)
+            origen = "clasificador"
+        if habilidad is None:
+            return None, None, "ia"
+        if origen != "disparador" and habilidad.falta_argumento(coincidencia):
+            logger.info(f"Comando '{comando}' → IA ({habilidad.nombre} por {origen}, sin argumento)")
+            return None, None, "ia"
+        return habilidad, coincidencia, origen
+
+    def despachar(self, comando):
+        """
+        Resuelve un comando con la habilidad que le corresponde
+
+        Returns:
+            tuple: (respuesta_dict, continuar), o None si ninguna habilidad lo resolvió
+        """
+        habilidad, coincidencia, origen = self.resolver(comando)
+        resultado = habilidad.ejecutar(coincidencia) if habilidad is not None else None
+        self._anotar("ia" if resultado is None else origen)
+        return resultado
+
+    def _anotar(self, origen):
+        with self._lock:
+            self.origenes[origen] += 1
+        if origen in ("aproximado", "clasificador"):
+            logger.info(f"Llamadas a la IA evitadas: {self.llamadas_ia_evitadas():.0%} "
+                        f"({self.origenes['aproximado'] + self.origenes['clasificador']} comandos)")
+
+    def llamadas_ia_evitadas(self) -> float:
+        """
+        Fracción de los comandos sin disparador exacto (los que antes iban
+        a la IA) que se resolvieron en local
+        """
+        with self._lock:
+            evitadas = self.origenes["aproximado"] + self.origenes["clasificador"]
+            total = evitadas + self.origenes["ia"]
+        return evitadas / total if total else 0.0
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "disparador": self.origenes["disparador"],
+                "aproximado": self.origenes["aproximado"],
+                "clasificador": self.origenes["clasificador"],
+                "ia": self.origenes["ia"],
+            }
+
+
+# ============== INSTANCIA GLOBAL ==============
+_registro_instance = None
+
+
+def get_registro_habilidades() -> RegistroHabilidades:
+    """
+    Obtiene o crea el registro global de habilidades
+
+    Returns:
+        RegistroHabilidades: Con las HABILIDADES de Aura
+    """
+    global _registro_instance
+
+    if _registro_instance is None:
+        _registro_instance = RegistroHabilidades(HABILIDADES)
+
+    return _registro_instance
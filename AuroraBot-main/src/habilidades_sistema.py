@@ -10,6 +10,8 @@ import platform
 import os
 from pathlib import Path
 
+from src.difuso import IndiceTrigramas
+
 logger = logging.getLogger(__name__)
 
 # Detectar sistema operativo
@@ -87,6 +89,7 @@ COMANDOS_BASE = {
 
 # Cache de programas detectados
 _programas_cache = None
+_indice_programas = (None, None)  # (programas, IndiceTrigramas de sus nombres) para errores del ASR
 
 
 def detectar_programas_instalados():
@@ -278,6 +281,17 @@ def buscar_programa_por_nombre(nombre_busqueda):
             if palabra in nombre:
                 return nombre, comando
     
+    # 4. Búsqueda aproximada (errores del reconocimiento: "faierfox", "fire fox")
+    global _indice_programas
+    if _indice_programas[0] is not programas:
+        _indice_programas = (programas, IndiceTrigramas(programas.keys()))
+    for consulta in (nombre_busqueda, nombre_busqueda.replace(" ", "")):
+        encontrado = _indice_programas[1].buscar(consulta)
+        if encontrado:
+            nombre = encontrado[0]
+            logger.info(f"Programa aproximado: '{nombre_busqueda}' → '{nombre}'")
+            return nombre, programas[nombre]
+    
     return None, None
 
 
@@ -296,8 +310,9 @@ def abrir_programa(comando, hablar=None, escuchar_confirmacion=None):
     """
     try:
         # Extraer el nombre del programa
-        nombre_app = comando.replace('abre', '').replace('abrir', '').strip()
-        nombre_app = nombre_app.replace('el', '').replace('la', '').replace('los', '').replace('las', '').strip()
+        # (palabras completas: "el" no se borra de "telegram")
+        nombre_app = re.sub(r'\b(?:abre|abrir|el|la|los|las)\b', ' ', comando.lower())
+        nombre_app = ' '.join(nombre_app.split())
         
         if not nombre_app:
             mensaje = "No entendí qué programa quieres abrir."
@@ -0,0 +1,169 @@
+"""
+Intenciones de Aura - Reconocimiento de comandos explícitos en una pasada
+Las frases disparadoras de todas las intenciones ("busca en google",
+"adiós", "abre", …) se compilan una sola vez en una expresión regular con
+forma de trie: en cada posición del comando la búsqueda avanza por un
+prefijo común en lugar de probar las frases una por una, así el costo por
+comando casi no crece al agregar disparadores. Las frases solo coinciden
+como palabras completas ("wikipedia" no aparece en "wikipedias", "exit"
+no en "existe") y gana la que empieza antes en el comando; entre las que
+empiezan en el mismo lugar, la más larga.
+
+Si no aparece ningún disparador, las intenciones que lo admiten se buscan
+de forma aproximada (src.difuso) en las primeras palabras del comando,
+para tolerar errores del reconocimiento ("busca en yutub").
+"""
+import re
+import logging
+
+from src.difuso import IndiceTrigramas, normalizar
+
+logger = logging.getLogger(__name__)
+
+VENTANA_INICIOS = 3  # palabras del comando donde puede empezar un disparador aproximado
+
+
+class Coincidencia:
+    """Intención reconocida en un comando"""
+
+    def __init__(self, intencion, disparador, texto, inicio, fin, distancia=0):
+        self.intencion = intencion    # Nombre de la intención
+        self.disparador = disparador  # Frase disparadora tal como se registró
+        self.texto = texto            # Comando completo
+        self.inicio = inicio          # Posición del disparador en el texto
+        self.fin = fin
+        self.distancia = distancia    # Ediciones entre el texto y el disparador (0 = exacta)
+
+    @property
+    def argumento(self) -> str:
+        """Lo que sigue al disparador ("busca en google [el clima]"), con sus mayúsculas"""
+        return self.texto[self.fin:].strip()
+
+    @property
+    def previo(self) -> str:
+        """Lo que precede al disparador ("[einstein] en wikipedia")"""
+        return self.texto[:self.inicio].strip()
+
+    def __repr__(self):
+        return f"Coincidencia({self.intencion!r}, {self.disparador!r}, argumento={self.argumento!r})"
+
+
+def normalizar_comando(texto) -> str:
+    """Minúsculas y espacios simples (la forma en que se registran los disparadores)"""
+    return " ".join((texto or "").lower().split())
+
+
+def _trie_a_regex(nodo):
+    """
+    Expresión regular equivalente a un trie de frases
+
+    Cada nivel es una alternancia entre caracteres distintos, que el motor
+    de re descarta con una sola comparación. El final de frase se vuelve un
+    grupo opcional codicioso: se prefiere la frase más larga y, si no
+    termina en límite de palabra, se retrocede a la más corta.
+    """
+    hijos = [(r"\s+" if c == " " else re.escape(c)) + _trie_a_regex(sub)
+             for c, sub in sorted(nodo.items()) if c != ""]
+    if not hijos:
+        return ""
+    cuerpo = hijos[0] if len(hijos) == 1 else "(?:" + "|".join(hijos) + ")"
+    if "" in nodo:
+        return "(?:" + cuerpo + ")?"
+    return cuerpo
+
+
+class EnrutadorIntenciones:
+    """Conjunto de intenciones con sus disparadores, compilado una vez"""
+
+    def __init__(self, intenciones, aproximadas=()):
+        """
+        Args:
+            intenciones: Lista de (nombre, frases disparadoras). Si una frase
+                         aparece en varias intenciones, queda en la primera.
+            aproximadas: Nombres de las intenciones que se buscan también con
+                         errores (no conviene en las que tienen efectos caros
+                         de equivocar, como salir)
+        """
+        self.disparadores = {}
+        trie = {}
+        for nombre, frases in intenciones:
+            for frase in frases:
+                frase = normalizar_comando(frase)
+                if not frase or frase in self.disparadores:
+                    continue
+                self.disparadores[frase] = nombre
+                nodo = trie
+                for caracter in frase:
+                    nodo = nodo.setdefault(caracter, {})
+                nodo[""] = {}
+        self._patron = re.compile(r"(?<!\w)(" + _trie_a_regex(trie) + r")(?!\w)") if trie else None
+
+        aproximadas = set(aproximadas)
+        difusos = [frase for frase, nombre in self.disparadores.items() if nombre in aproximadas]
+        self._indice = IndiceTrigramas(difusos) if difusos else None
+        # Una palabra de más o de menos: el ASR separa o junta palabras ("you tube")
+        self._max_palabras = max((len(frase.split()) for frase in difusos), default=0) + 1
+        logger.debug(f"Enrutador compilado: {len(self.disparadores)} disparadores "
+                     f"({len(difusos)} aproximados)")
+
+    def buscar(self, comando, aproximado=True):
+        """
+        Busca la primera intención del comando
+
+        Args:
+            comando: Texto del usuario
+            aproximado: Si no hay disparador exacto, buscar uno con errores
+
+        Returns:
+            Coincidencia: La intención, su disparador y el argumento, o None
+        """
+        if self._patron is None or not comando:
+            return None
+        texto = comando.strip()
+        minusculas = texto.lower()
+        m = self._patron.search(minusculas)
+        if m is None:
+            return self.buscar_aproximado(texto) if aproximado else None
+        if len(minusculas) != len(texto):  # lower() cambió el largo: posiciones del texto en minúsculas
+            texto = minusculas
+        disparador = normalizar_comando(m.group(1))
+        return Coincidencia(self.disparadores[disparador], disparador, texto, m.start(1), m.end(1))
+
+    def buscar_aproximado(self, comando):
+        """
+        Busca un disparador con errores de reconocimiento al inicio del comando
+
+        Se prueban los grupos de palabras que empiezan en las primeras
+        VENTANA_INICIOS palabras; gana la menor distancia y, a igual
+        distancia, el grupo que empieza antes.
+
+        Returns:
+            Coincidencia: Con la distancia al disparador, o None
+        """
+        if self._indice is None:
+            return None
+        palabras = comando.split()
+        normalizadas = normalizar(comando).split()
+        if len(normalizadas) != len(palabras):  # un signo suelto que normalizar() quitó
+            palabras = normalizadas
+        mejor = None
+        for inicio in range(min(VENTANA_INICIOS, len(palabras))):
+            for fin in range(inicio + 1, min(len(palabras), inicio + self._max_palabras) + 1):
+                ventana = " ".join(normalizadas[inicio:fin])
+                if len(ventana) > self._indice.largo_maximo:
+                    break
+                # Solo interesa algo mejor que lo ya encontrado
+                encontrado = self._indice.buscar(ventana, None if mejor is None else mejor[0] - 1,
+                                                 normalizado=True)
+                if encontrado is not None:
+                    mejor = (encontrado[1], encontrado[0], inicio, fin)
+            if mejor is not None and mejor[0] == 0:
+                break
+        if mejor is None:
+            return None
+        distancia, disparador, inicio, fin = mejor
+        texto = " ".join(palabras)
+        desde = len(" ".join(palabras[:inicio])) + (1 if inicio else 0)
+        hasta = len(" ".join(palabras[:fin]))
+        logger.debug(f"Disparador aproximado: '{texto[desde:hasta]}' → '{disparador}' ({distancia})")
+        return Coincidencia(self.disparadores[disparador], disparador, texto, desde, hasta, distancia)
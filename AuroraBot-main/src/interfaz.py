@@ -7,8 +7,7 @@ PARTE 1/3: Imports, Workers, Helpers y Clases Base
 import sys
 import threading
 import logging
-import re
-import time
+from queue import Empty
 
 from PySide6.QtCore import Property
 from PySide6.QtGui import QPixmap
@@ -20,12 +19,13 @@ from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QScrollArea, QFrame, QTextEdit
 )
 
-from config.settings import WINDOW_TITLE
-from src.main import escuchar, procesar_comando, stop_tts, tts_is_playing
+from config.settings import WINDOW_TITLE, WAKE_FOLLOWUP_SECONDS, BARGE_IN
+from src.main import (
+    escuchar, preparar_escucha, procesar_comando, hablar, stop_tts, tts_is_playing,
+    prioridad_para, PRIORIDAD_URGENTE, ReconocimientoContinuo, adquirir_microfono
+)
 from src.cerebro_ia import generar_respuesta
-from gtts import gTTS
-import os
-import platform
+from src.senales_voz import get_senales_transcripcion
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -43,78 +43,6 @@ COLORS = {
     'text_dim': "#ffffff",
 }
 
-# Variables globales para controlar la reproducción de voz
-voz_activa = False
-detener_voz_flag = False
-
-
-def limpiar_texto_para_voz(texto):
-    """Limpia el texto removiendo markdown y emojis para síntesis de voz"""
-    texto = re.sub(r'\*\*(.+?)\*\*', r'\1', texto)
-    texto = re.sub(r'\*(.+?)\*', r'\1', texto)
-    texto = re.sub(r'__(.+?)__', r'\1', texto)
-    texto = re.sub(r'_(.+?)_', r'\1', texto)
-    texto = re.sub(r'~~(.+?)~~', r'\1', texto)
-    texto = re.sub(r'`(.+?)`', r'\1', texto)
-    
-    emoji_pattern = re.compile("["
-        u"\U0001F600-\U0001F64F"
-        u"\U0001F300-\U0001F5FF"
-        u"\U0001F680-\U0001F6FF"
-        u"\U0001F1E0-\U0001F1FF"
-        u"\U00002702-\U000027B0"
-        u"\U000024C2-\U0001F251"
-        "]+", flags=re.UNICODE)
-    texto = emoji_pattern.sub(r'', texto)
-    texto = re.sub(r'\s+', ' ', texto).strip()
-    
-    return texto
-
-
-def hablar_interruptible(texto):
-    """Función de síntesis de voz que puede ser interrumpida"""
-    global voz_activa, detener_voz_flag
-    
-    if detener_voz_flag:
-        return
-    
-    voz_activa = True
-    temp_file = "temp_audio.mp3"
-    
-    try:
-        tts = gTTS(text=texto, lang="es")
-        tts.save(temp_file)
-        
-        sistema = platform.system()
-        
-        if sistema == "Windows":
-            os.system(f'start {temp_file}')
-        elif sistema == "Darwin":
-            os.system(f'afplay {temp_file}')
-        else:
-            os.system(f'mpg123 {temp_file} > /dev/null 2>&1')
-        
-        # Esperar con posibilidad de interrupción
-        duracion = len(texto) * 0.05
-        inicio = time.time()
-        while time.time() - inicio < duracion:
-            if detener_voz_flag:
-                if sistema == "Linux":
-                    os.system("killall mpg123 > /dev/null 2>&1")
-                break
-            time.sleep(0.1)
-        
-    except Exception as e:
-        logger.error(f"Error en hablar_interruptible: {e}")
-    finally:
-        voz_activa = False
-        try:
-            if os.path.exists(temp_file):
-                time.sleep(0.5)
-                os.remove(temp_file)
-        except:
-            pass
-
 
 # ============== WORKER PARA CHAT ==============
 class ChatWorker(QThread):
@@ -137,7 +65,13 @@ class ChatWorker(QThread):
 
 # ============== WORKER PARA VOZ ==============
 class VoiceWorker(QThread):
-    """Thread para modo voz continuo con interrupción"""
+    """
+    Thread para modo voz continuo con interrupción
+    
+    Procesa los comandos que deja la etapa de reconocimiento
+    (ReconocimientoContinuo), que sigue escuchando mientras aquí se
+    procesa y se responde.
+    """
     message_received = Signal(str)
     response_ready = Signal(str)
     status_updated = Signal(str)
@@ -146,42 +80,50 @@ class VoiceWorker(QThread):
     def __init__(self):
         super().__init__()
         self.running = True
-        self.pausar_escucha = False
+        self.escucha_habilitada = threading.Event()
+        self.escucha_habilitada.set()
+        self.reconocimiento = ReconocimientoContinuo(
+            habilitada=self.escucha_habilitada,
+            al_cambiar_estado=self.status_updated.emit
+        )
+    
+    def _responder(self, texto, prioridad):
+        """
+        Pronuncia la respuesta. Con BARGE_IN no se espera a que termine: se
+        sigue escuchando mientras suena (sin palabra clave) para que el
+        usuario pueda interrumpir hablando
+
+        Returns:
+            Future: Se completa cuando la respuesta terminó de sonar
+        """
+        futuro = hablar(texto, prioridad=prioridad)
+        if not BARGE_IN:
+            futuro.result()
+            self.reconocimiento.atento_por(WAKE_FOLLOWUP_SECONDS)
+            return futuro
+        futuro.add_done_callback(lambda _: self.reconocimiento.atento_por(WAKE_FOLLOWUP_SECONDS))
+        return futuro
     
     def run(self):
-        global voz_activa, detener_voz_flag
-        
+        self.reconocimiento.start()
         while self.running:
-            if voz_activa or self.pausar_escucha:
-                time.sleep(0.1)
+            try:
+                comando = self.reconocimiento.comandos.get(timeout=0.2)
+            except Empty:
                 continue
-            
-            self.status_updated.emit("🎤 Escuchando...")
-            comando = escuchar()
+            if not self.running:
+                break
             
             if comando == "ERROR_MIC":
                 self.status_updated.emit("❌ Error de micrófono")
                 break
             
-            if not comando:
-                continue
-            
             # Interrumpir si está hablando
-            if voz_activa:
-                detener_voz_flag = True
-                time.sleep(0.3)
-                detener_voz_flag = False
+            if tts_is_playing():
+                stop_tts()
             
             self.message_received.emit(f"Tú: {comando}")
             
-            # Comandos de salida
-            if any(palabra in comando for palabra in ["adiós", "adios", "eso es todo", "termina"]):
-                respuesta_texto = "Hasta luego. Fue un placer ayudarte." # Ya es un string
-                self.response_ready.emit(respuesta_texto) # Emitir el texto para la interfaz
-                hablar_interruptible(limpiar_texto_para_voz(respuesta_texto))
-                self.should_stop.emit()
-                break
-            
             self.status_updated.emit("🧠 Procesando...")
             
             # Desempaqueta la respuesta (diccionario) y el booleano (continuar)
@@ -199,8 +141,9 @@ class VoiceWorker(QThread):
                 
                 self.status_updated.emit("💬 Respondiendo...")
 
-                # La función de hablar/limpiar SÓLO acepta strings
-                hablar_interruptible(limpiar_texto_para_voz(respuesta_texto))
+                # hablar SÓLO acepta strings; quita URLs, código y markdown
+                # (el texto completo ya se emitió para el chat)
+                futuro = self._responder(respuesta_texto, prioridad_para(respuesta_dict))
                 
                 # Manejar la acción (opcional: si quieres que la interfaz reaccione a 'open_google', etc.)
                 # if elemento_de_accion == "open_google": ...
@@ -209,20 +152,22 @@ class VoiceWorker(QThread):
                 # Caso de error inesperado o respuesta no dict (aunque ya se maneja en procesar_comando)
                 respuesta_texto = "Error interno: La respuesta del procesador es inválida."
                 self.response_ready.emit(respuesta_texto)
-                hablar_interruptible(limpiar_texto_para_voz(respuesta_texto))
+                futuro = self._responder(respuesta_texto, PRIORIDAD_URGENTE)
 
-            # Verificar si se debe detener la escucha continua
+            # Verificar si se debe detener la escucha continua (la habilidad
+            # de salida: "adiós", "eso es todo"); la despedida suena completa
             if not continuar:
+                futuro.result()
                 self.should_stop.emit()
                 break
         
+        self.reconocimiento.detener()
         self.status_updated.emit("💤 Modo voz desactivado")
     
     def stop(self):
-        global detener_voz_flag
-        detener_voz_flag = True
         self.running = False
-        time.sleep(0.3)
+        self.reconocimiento.detener()
+        stop_tts()
 
 
 # ============== WORKER PARA ESCUCHAR (FLOTANTE) ==============
@@ -244,9 +189,10 @@ class ListenWorker(QThread):
         # Detener cualquier TTS activo antes de escuchar
         if tts_is_playing():
             stop_tts()
-            time.sleep(0.1)
         
-        comando = escuchar()
+        # Desplaza al modo voz continuo (si está activo) solo durante esta frase
+        with adquirir_microfono("ventana") as concesion:
+            comando = escuchar(concesion=concesion)
         
         self.listening_stopped.emit()
         
@@ -278,19 +224,16 @@ class ProcessWorker(QThread):
     
     def run(self):
         try:
-            from src.main import hablar
+            from src.main import hablar, prioridad_para
             respuesta, _ = procesar_comando(self.comando)
             
             if respuesta:
+                mensaje = respuesta.get("message", "") if isinstance(respuesta, dict) else str(respuesta)
                 self.status_changed.emit("💬 Respondiendo...")
-                self.response_ready.emit(respuesta)
-                
-                # Hablar la respuesta
-                hablar(respuesta)
+                self.response_ready.emit(mensaje)
                 
-                # Esperar a que termine de hablar
-                while tts_is_playing():
-                    time.sleep(0.1)
+                # Hablar la respuesta y esperar a que termine de sonar
+                hablar(mensaje, prioridad=prioridad_para(respuesta)).result()
                 
                 self.status_changed.emit("✅ Listo")
             else:
@@ -857,6 +800,9 @@ class AuroraWindow(QWidget):
         self.animated_bg = None
         self.typing_indicator = None
         self.mic_recording = False
+        self.dictando_chat = False
+        # Una sola conexión: mostrar_parcial_chat ignora lo que llega fuera del dictado
+        get_senales_transcripcion().parcial.connect(self.mostrar_parcial_chat)
         self.configurar_ventana()
         self.crear_interfaz()
         self.mostrar_selector_modo()
@@ -896,6 +842,7 @@ class AuroraWindow(QWidget):
             self.floating_voice_widget = FloatingVoiceWidget()
             self.floating_voice_widget.restore_window.connect(self.restore_from_floating)
         
+        preparar_escucha()
         self.floating_voice_widget.show()
         # La ventana NO se oculta
     
@@ -1272,8 +1219,15 @@ class AuroraWindow(QWidget):
     
     def iniciar_grabacion_chat(self):
         """Inicia la grabación de voz en el chat"""
+        # El texto aparece en el input mientras se habla (motor streaming)
+        self.dictando_chat = True
+        
         def escuchar_comando():
-            comando = escuchar()
+            try:
+                with adquirir_microfono("chat") as concesion:
+                    comando = escuchar(concesion=concesion)
+            finally:
+                self.dictando_chat = False
             
             def actualizar_ui():
                 if not self.chat_input:
@@ -1291,6 +1245,11 @@ class AuroraWindow(QWidget):
         
         threading.Thread(target=escuchar_comando, daemon=True).start()
     
+    def mostrar_parcial_chat(self, texto):
+        """Muestra la transcripción parcial en el input del chat"""
+        if self.dictando_chat and self.chat_input:
+            self.chat_input.setText(texto)
+    
     def detener_grabacion_chat(self):
         """Detiene la grabación (ya manejado por el toggle)"""
         pass
@@ -1310,10 +1269,8 @@ class AuroraWindow(QWidget):
     def mostrar_modo_voz(self):
         self.limpiar_layout()
         
-        threading.Thread(
-            target=lambda: hablar_interruptible(limpiar_texto_para_voz("Modo voz activado. Presiona el botón para hablar.")),
-            daemon=True
-        ).start()
+        preparar_escucha()
+        hablar("Modo voz activado. Presiona el botón para hablar.")
         
         container = QWidget()
         container.setStyleSheet(f"background-color: {COLORS['background']};")
@@ -1413,8 +1370,7 @@ class AuroraWindow(QWidget):
     
     def detener_voz(self):
         """Detiene el modo voz (funciona incluso si está hablando)"""
-        global detener_voz_flag
-        detener_voz_flag = True
+        stop_tts()
         
         if self.voice_worker:
             self.voice_worker.stop()
@@ -1426,9 +1382,6 @@ class AuroraWindow(QWidget):
         
         self.voice_status.setText("Presiona el botón para reactivar")
         self.voice_status.setStyleSheet(f"color: {COLORS['text_dim']}; background: transparent;")
-        
-        time.sleep(0.3)
-        detener_voz_flag = False
 
 
 # ============== MAIN ==============
@@ -2,178 +2,120 @@
 Motor principal de Aura - Manejo de voz y procesamiento de comandos
 ARCHIVO COMPLETO CON TODAS LAS FUNCIONES
 """
-import speech_recognition as sr
-from gtts import gTTS
-import os
-import platform
 import time
 import logging
 import threading
-import subprocess
-from queue import Queue, Empty
-from pathlib import Path
+from queue import Queue, Full
 
 from config.settings import (
-    VOICE_LANG, TTS_LANG, TEMP_AUDIO_FILE,
-    ENERGY_THRESHOLD, DYNAMIC_ENERGY, LISTEN_TIMEOUT,
-    PHRASE_TIME_LIMIT, AMBIENT_NOISE_DURATION,
-    EXIT_COMMANDS, get_audio_player
+    LISTEN_TIMEOUT, EARLY_DISPATCH, BARGE_IN,
+    WAKE_WORD, WAKE_WORD_ENABLED, COMMAND_QUEUE_SIZE
 )
 
 from src.cerebro_ia import generar_respuesta
-from src.habilidades_sistema import abrir_programa
-from src.habilidades_web import (
-    abrir_pagina_web, 
-    buscar_en_google,
-    buscar_en_youtube, 
-    resumir_wikipedia, 
-    buscar_en_google_directo
+from src.sintesis import backends_disponibles, medir_factor_tiempo_real
+from src.texto_voz import preparar_para_voz
+from src.red_tts import get_cliente_gtts
+from src.captura import get_servicio_captura, PRIORIDAD_FONDO, PRIORIDAD_PULSAR
+from src.palabra_clave import get_detector_palabra_clave
+from src.reconocimiento import (
+    reconocer_frase, iniciar_transcripcion, motores_activos, ErrorReconocimiento,
+    agregar_oyente_parcial, quitar_oyente_parcial, PrefijoEstable
 )
+from src.servicio_voz import get_servicio_voz, PRIORIDAD_URGENTE, PRIORIDAD_NORMAL
+from src.habilidades import get_registro_habilidades
 
 logger = logging.getLogger(__name__)
 
-# TTS worker globals
-_tts_queue = Queue()
-_tts_worker_thread = None
-_tts_process = None
-_tts_stop_event = threading.Event()
-_tts_lock = threading.Lock()
-_tts_playing_flag = threading.Event()
+# Respuestas que deben sonar antes que cualquier otra (errores y confirmaciones)
+ACCIONES_URGENTES = {"error", "exit", "open_google", "play_youtube", "system"}
 
+# Frase ya despachada a partir de una hipótesis parcial (no se vuelve a reconocer)
+_frase_anticipada = None
 
-def _find_player_command():
-    """Encuentra un reproductor de audio disponible"""
-    players = get_audio_player()
-    if not players:
-        return None
-    if isinstance(players, list):
-        for cmd in players:
-            player_name = cmd.split()[0]
-            if os.system(f'which {player_name} > /dev/null 2>&1') == 0:
-                return cmd
-    else:
-        player_name = players.split()[0]
-        if os.system(f'which {player_name} > /dev/null 2>&1') == 0:
-            return players
-    return None
+# Captura a la que ya se conectó la interrupción por voz (barge-in)
+_captura_barge_in = None
 
 
-def _tts_worker():
-    """Worker thread para TTS no bloqueante"""
-    global _tts_process
-    while True:
-        try:
-            text = _tts_queue.get()
-        except Exception:
-            break
-        if text is None:
-            break
-        try:
-            _tts_stop_event.clear()
-            _tts_playing_flag.clear()
-            tmp = Path(TEMP_AUDIO_FILE)
-            
-            # Generar audio
-            tts = gTTS(text=text, lang=TTS_LANG)
-            tts.save(str(tmp))
-            player_cmd = _find_player_command()
-            
-            if player_cmd is None:
-                # fallback
-                if os.system("which ffplay > /dev/null 2>&1") == 0:
-                    cmd = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", str(tmp)]
-                elif os.system("which mpg123 > /dev/null 2>&1") == 0:
-                    cmd = ["mpg123", str(tmp)]
-                else:
-                    logger.error("No audio player found")
-                    _tts_playing_flag.clear()
-                    try:
-                        tmp.unlink()
-                    except Exception:
-                        pass
-                    continue
-            else:
-                cmd = player_cmd.split() + [str(tmp)]
-            
-            with _tts_lock:
-                try:
-                    _tts_process = subprocess.Popen(cmd)
-                except Exception as e:
-                    logger.error(f"Error launching player: {e}")
-                    _tts_process = None
-                    try:
-                        tmp.unlink()
-                    except Exception:
-                        pass
-                    continue
-                _tts_playing_flag.set()
-            
-            # loop while playing
-            while True:
-                if _tts_stop_event.is_set():
-                    with _tts_lock:
-                        try:
-                            if _tts_process and _tts_process.poll() is None:
-                                _tts_process.terminate()
-                        except Exception:
-                            pass
-                        _tts_process = None
-                        _tts_playing_flag.clear()
-                    break
-                with _tts_lock:
-                    if _tts_process is None:
-                        break
-                    if _tts_process.poll() is not None:
-                        _tts_playing_flag.clear()
-                        _tts_process = None
-                        break
-                time.sleep(0.05)
-            try:
-                tmp.unlink()
-            except Exception:
-                pass
-        except Exception as e:
-            logger.exception(f"TTS worker error: {e}")
-            _tts_playing_flag.clear()
-            try:
-                tmp.unlink()
-            except Exception:
-                pass
-            continue
+def agregar_oyente_tts(callback):
+    """
+    Suscribe un callback a los eventos del TTS
+    
+    Args:
+        callback: Función (evento, texto) con evento en
+                  "iniciado", "terminado" o "interrumpido".
+                  Se llama desde el hilo del servicio de voz.
+    """
+    get_servicio_voz().agregar_oyente(callback)
 
 
-def _start_tts_worker():
-    """Inicia el worker de TTS"""
-    global _tts_worker_thread
-    if _tts_worker_thread is None or not _tts_worker_thread.is_alive():
-        _tts_worker_thread = threading.Thread(target=_tts_worker, daemon=True)
-        _tts_worker_thread.start()
+def quitar_oyente_tts(callback):
+    """Cancela la suscripción de un callback a los eventos del TTS"""
+    get_servicio_voz().quitar_oyente(callback)
+
+
+def nuevo_turno():
+    """
+    Marca el inicio de un nuevo turno del usuario: las respuestas
+    encoladas de turnos anteriores se descartan sin pronunciarse
+    
+    Returns:
+        int: Número del nuevo turno
+    """
+    return get_servicio_voz().nuevo_turno()
+
+
+def prioridad_para(respuesta_dict) -> int:
+    """
+    Prioridad TTS para una respuesta de procesar_comando
+    
+    Args:
+        respuesta_dict: dict con la key 'action'
+        
+    Returns:
+        int: PRIORIDAD_URGENTE para errores y confirmaciones, PRIORIDAD_NORMAL si no
+    """
+    if isinstance(respuesta_dict, dict) and respuesta_dict.get("action") in ACCIONES_URGENTES:
+        return PRIORIDAD_URGENTE
+    return PRIORIDAD_NORMAL
 
 
-def hablar(texto):
+def hablar(texto, backend=None, prioridad=PRIORIDAD_NORMAL):
     """
     Función de síntesis de voz (TTS) no bloqueante
     
+    Todos los modos (terminal, ventana y widget flotante) hablan a través
+    del mismo servicio de voz, con una sola cola y un solo camino de interrupción.
+    
     Args:
         texto: Texto a pronunciar
+        backend: Motor TTS opcional para este enunciado
+                 ("gtts", "offline", "espeak", "piper"); por defecto TTS_BACKEND
+        prioridad: PRIORIDAD_URGENTE o PRIORIDAD_NORMAL
+    
+    Returns:
+        Future: Se resuelve con TTS_TERMINADO, TTS_INTERRUMPIDO o TTS_DESCARTADO
+                cuando el enunciado deja de sonar (o se descarta)
     """
-    if not texto:
-        return
-    _start_tts_worker()
-    _tts_queue.put(limpiar_para_tts(texto))
+    return get_servicio_voz().hablar(limpiar_para_tts(texto or ""), backend, prioridad)
 
 
 def stop_tts():
-    """Detiene el TTS actual"""
-    _tts_stop_event.set()
-    with _tts_lock:
-        try:
-            if _tts_process and _tts_process.poll() is None:
-                _tts_process.terminate()
-        except Exception:
-            pass
-        _tts_process = None
-    _tts_playing_flag.clear()
+    """Detiene el TTS actual y espera a que el reproductor libere el audio"""
+    get_servicio_voz().detener()
+
+
+def esperar_fin_tts(timeout=None) -> bool:
+    """
+    Bloquea hasta que no quede nada sonando ni pendiente
+    
+    Args:
+        timeout: Segundos máximos de espera (None = sin límite)
+        
+    Returns:
+        bool: True si el TTS quedó inactivo
+    """
+    return get_servicio_voz().esperar_inactivo(timeout)
 
 
 def tts_is_playing() -> bool:
@@ -183,61 +125,338 @@ def tts_is_playing() -> bool:
     Returns:
         bool: True si está reproduciendo
     """
-    return _tts_playing_flag.is_set()
+    return get_servicio_voz().esta_hablando()
 
 
 def limpiar_para_tts(texto: str) -> str:
     """
-    Limpia el texto para TTS
+    Limpia el texto para TTS: quita URLs, citas de fuente, código y markdown
+    y aplica el presupuesto de caracteres por enunciado
     
     Args:
-        texto: Texto a limpiar
+        texto: Texto a limpiar (tal como se muestra en el chat)
         
     Returns:
         str: Texto limpio
     """
-    return texto.replace("\n", " ").strip()
+    return preparar_para_voz(texto)
+
+
+def agregar_oyente_parcial_asr(callback):
+    """
+    Suscribe un callback a las transcripciones parciales
+    
+    Args:
+        callback: Función (id_frase, texto). Se llama desde el hilo del
+                  motor streaming (solo si hay uno, ver src.reconocimiento).
+    """
+    agregar_oyente_parcial(callback)
+
+
+def quitar_oyente_parcial_asr(callback):
+    """Cancela la suscripción de un callback a las transcripciones parciales"""
+    quitar_oyente_parcial(callback)
+
+
+def _interrumpir_por_voz(evento, id_frase, datos):
+    """Oyente de la captura: el usuario empezó a hablar mientras suena el TTS"""
+    if evento == "inicio" and tts_is_playing():
+        logger.info("Barge-in: el usuario habla, se corta el TTS")
+        # Fuera del hilo de captura: detener espera al reproductor
+        threading.Thread(target=stop_tts, daemon=True, name="barge-in").start()
+
+
+def activar_barge_in(captura):
+    """
+    Conecta la interrupción por voz a la captura (una sola vez): con
+    BARGE_IN, una frase que empieza mientras Aura habla corta el TTS y
+    sigue directo al reconocimiento. El eco del propio TTS lo filtra la
+    captura (ver src.eco), así que no dispara la interrupción.
+    
+    Args:
+        captura: ServicioCaptura
+    """
+    global _captura_barge_in
+    
+    if not BARGE_IN or _captura_barge_in is captura:
+        return
+    captura.agregar_oyente(_interrumpir_por_voz)
+    _captura_barge_in = captura
+
+
+def adquirir_microfono(nombre, prioridad=PRIORIDAD_PULSAR):
+    """
+    Pide el micrófono compartido para un modo de escucha
+    
+    El dispositivo lo abre una sola vez el servicio de captura; cada modo
+    recibe las frases mientras su concesión es la de mayor prioridad
+    (la escucha a pedido desplaza al modo voz continuo hasta liberarla).
+    
+    Args:
+        nombre: Quién escucha (para los logs)
+        prioridad: PRIORIDAD_FONDO o PRIORIDAD_PULSAR
+        
+    Returns:
+        Concesion: Pasarla a escuchar(); liberarla al terminar (o usar 'with')
+    """
+    return get_servicio_captura().adquirir(nombre, prioridad)
+
+
+def preparar_escucha():
+    """
+    Abre el micrófono en segundo plano (sin bloquear la UI) para que, al
+    pulsar "hablar", el pre-roll y la calibración ya estén en marcha y el
+    inicio de la frase no se pierda
+    """
+    def abrir():
+        try:
+            captura = get_servicio_captura()
+            captura.iniciar()
+            activar_barge_in(captura)
+        except OSError as e:
+            logger.warning(f"No se pudo abrir el micrófono por adelantado: {e}")
+    
+    threading.Thread(target=abrir, daemon=True, name="preparar-escucha").start()
 
 
-def escuchar():
+def comando_anticipable(texto) -> bool:
+    """
+    Indica si una transcripción parcial ya es un comando completo: empieza
+    con un prefijo de búsqueda explícito y tiene término
+    
+    Args:
+        texto: Transcripción parcial
+        
+    Returns:
+        bool: True si se puede despachar sin esperar el fin de la frase
+    """
+    habilidad, coincidencia = get_registro_habilidades().buscar(texto, aproximado=False)
+    return (habilidad is not None and habilidad.anticipable
+            and coincidencia.inicio == 0 and bool(coincidencia.argumento))
+
+
+def escuchar(desde=None, concesion=None):
     """
     Función de reconocimiento de voz
     
+    Consume la próxima frase del servicio de captura (el micrófono queda
+    abierto entre llamadas y sigue grabando mientras se reconoce) y la
+    transcribe con los motores ASR activos (ver src.reconocimiento).
+    Con BARGE_IN el TTS sigue sonando mientras se escucha y se corta
+    cuando el usuario empieza a hablar; sin él, se detiene antes.
+    Con un motor streaming, un comando de búsqueda cuya transcripción
+    parcial ya es estable se devuelve sin esperar el fin de la frase.
+    
+    Args:
+        desde: Aceptar frases que terminaron después de este instante
+               (time.monotonic). Por defecto solo las que terminen desde
+               ahora; ReconocimientoContinuo pasa el inicio de su escucha
+               para no perder lo dicho mientras se procesaba otro comando.
+        concesion: Concesion del micrófono (ver adquirir_microfono); sin
+                   ella se toma una de escucha a pedido solo para esta frase
+    
     Returns:
-        str: Texto reconocido, None si timeout, o "ERROR_MIC" si hay error
+        str: Texto reconocido, None si timeout o no se entendió,
+             o "ERROR_MIC" si falla el micrófono
     """
-    r = sr.Recognizer()
-    r.energy_threshold = ENERGY_THRESHOLD
-    r.dynamic_energy_threshold = DYNAMIC_ENERGY
+    global _frase_anticipada
+    
+    inicio = time.monotonic() if desde is None else desde
+    captura = get_servicio_captura()
+    propia = concesion is None
+    if propia:
+        concesion = captura.adquirir("escuchar", PRIORIDAD_PULSAR)
+    anticipado = None
+    if EARLY_DISPATCH:
+        anticipado = PrefijoEstable(
+            comando_anticipable,
+            pausa=lambda: captura.segmentador.silencio_actual if captura.segmentador else 0.0
+        )
     
     try:
-        with sr.Microphone() as source:
-            # Detener TTS si está activo
+        captura.iniciar()
+        iniciar_transcripcion(captura)
+        activar_barge_in(captura)
+        
+        # Sin barge-in, el micrófono oiría al propio TTS: detenerlo antes
+        if not BARGE_IN:
             try:
                 if tts_is_playing():
                     stop_tts()
-                    time.sleep(0.05)
             except Exception:
                 pass
+        
+        if anticipado is not None:
+            agregar_oyente_parcial(anticipado.observar)
+        frase = concesion.siguiente_frase(
+            timeout=LISTEN_TIMEOUT, desde=inicio,
+            interrumpir=anticipado.listo if anticipado is not None else None,
+            omitir_id=_frase_anticipada
+        )
+        if anticipado is not None and anticipado.listo.is_set():
+            _frase_anticipada = anticipado.id_frase
+            logger.info(f"Despacho anticipado: '{anticipado.texto}'")
+            return anticipado.texto.lower()
+        if frase is None:
+            return None
+        comando = reconocer_frase(frase)
+        return comando.lower() if comando else None
             
-            r.adjust_for_ambient_noise(source, duration=AMBIENT_NOISE_DURATION)
-            audio = r.listen(source, timeout=LISTEN_TIMEOUT, phrase_time_limit=PHRASE_TIME_LIMIT)
-            comando = r.recognize_google(audio, language=VOICE_LANG)
-            return comando.lower()
-            
-    except sr.WaitTimeoutError:
-        return None
-    except sr.UnknownValueError:
+    except ErrorReconocimiento as e:
+        # Sin red o servicio caído: se pierde esta frase, no el micrófono
+        logger.warning(f"Reconocimiento no disponible: {e}")
         return None
-    except sr.RequestError as e:
-        logger.error(f"Recognition request error: {e}")
-        return "ERROR_MIC"
     except OSError as e:
         logger.error(f"OS error accessing microphone: {e}")
         return "ERROR_MIC"
     except Exception as e:
         logger.exception(f"Unexpected error in escuchar: {e}")
         return "ERROR_MIC"
+    finally:
+        if propia:
+            concesion.liberar()
+        if anticipado is not None:
+            quitar_oyente_parcial(anticipado.observar)
+            anticipado.cancelar()
+
+
+def esperar_palabra_clave(timeout=None, cancelar=None, desde=None, concesion=None):
+    """
+    Espera la palabra clave (WAKE_WORD) sin enviar audio a la nube
+    
+    Args:
+        timeout: Segundos máximos de espera (None = sin límite)
+        cancelar: threading.Event opcional que interrumpe la espera
+        desde: Aceptar frases que terminaron después de este instante (ver escuchar)
+        concesion: Concesion del micrófono (por defecto una de fondo solo para esta espera)
+    
+    Returns:
+        str: El comando dicho en la misma frase que la palabra clave ("" si
+             solo se dijo la palabra clave), None si timeout o cancelado,
+             o "ERROR_MIC" si falla el micrófono
+    """
+    captura = get_servicio_captura()
+    propia = concesion is None
+    if propia:
+        concesion = captura.adquirir("palabra clave", PRIORIDAD_FONDO)
+    
+    try:
+        captura.iniciar()
+        iniciar_transcripcion(captura)
+        activar_barge_in(captura)
+        detector = get_detector_palabra_clave()
+        deteccion = detector.esperar(concesion, timeout=timeout, cancelar=cancelar, desde=desde)
+        if deteccion is None:
+            return None
+        return detector.comando(deteccion) or ""
+    except OSError as e:
+        logger.error(f"OS error accessing microphone: {e}")
+        return "ERROR_MIC"
+    except Exception as e:
+        logger.exception(f"Unexpected error in esperar_palabra_clave: {e}")
+        return "ERROR_MIC"
+    finally:
+        if propia:
+            concesion.liberar()
+
+
+class ReconocimientoContinuo(threading.Thread):
+    """
+    Etapa de reconocimiento del modo voz continuo
+    
+    La captura ya graba y segmenta en su propio hilo; esta etapa consume
+    sus frases sin pausa (palabra clave y reconocimiento) y deja los
+    comandos en una cola acotada que procesa otro hilo. Lo que el usuario
+    dice mientras se procesa o se responde un comando ("…y súbele el
+    volumen") queda en cola y se atiende después, en lugar de perderse.
+    """
+    
+    def __init__(self, habilitada=None, al_cambiar_estado=None, maximo=COMMAND_QUEUE_SIZE):
+        """
+        Args:
+            habilitada: threading.Event que pausa la escucha mientras está apagado
+            al_cambiar_estado: Callback opcional (texto) con el estado de la escucha
+            maximo: Comandos en espera antes de dejar de consumir frases
+        """
+        super().__init__(daemon=True, name="reconocimiento-continuo")
+        self.comandos = Queue(maxsize=maximo)  # str reconocidos, o "ERROR_MIC"
+        self.habilitada = habilitada or threading.Event()
+        if habilitada is None:
+            self.habilitada.set()
+        self.al_cambiar_estado = al_cambiar_estado
+        self.detenido = threading.Event()
+        # Tras un comando se sigue escuchando sin palabra clave hasta este instante
+        self.atento_hasta = 0.0
+        self._ultimo_estado = None
+    
+    def atento_por(self, segundos):
+        """Acepta comandos sin palabra clave durante los próximos segundos"""
+        self.atento_hasta = time.monotonic() + segundos
+    
+    def detener(self):
+        self.detenido.set()
+        self.habilitada.set()  # despertar la espera
+    
+    def requiere_palabra_clave(self) -> bool:
+        # Sin motor local la palabra clave queda desactivada (ver src.palabra_clave)
+        return (WAKE_WORD_ENABLED and time.monotonic() > self.atento_hasta
+                and get_detector_palabra_clave().disponible)
+    
+    def run(self):
+        with adquirir_microfono("modo voz", PRIORIDAD_FONDO) as concesion:
+            self._escuchar(concesion)
+    
+    def _escuchar(self, concesion):
+        desde = time.monotonic()
+        while not self.detenido.is_set():
+            if not self.habilitada.is_set():
+                self.habilitada.wait()
+                desde = time.monotonic()  # lo dicho en pausa no cuenta
+            if not BARGE_IN and not esperar_fin_tts(0):
+                # Sin barge-in el micrófono oiría al TTS: esperar y descartar lo captado
+                esperar_fin_tts()
+                desde = time.monotonic()
+            if self.detenido.is_set():
+                break
+            
+            comando = ""
+            if self.requiere_palabra_clave():
+                # Nada sale a la nube hasta oír la palabra clave
+                self._estado(f"💤 Di '{WAKE_WORD}'...")
+                comando = esperar_palabra_clave(timeout=1.0, cancelar=self.detenido,
+                                                desde=desde, concesion=concesion)
+                if comando is None:
+                    continue
+            
+            if comando == "":
+                if not tts_is_playing():
+                    self._estado("🎤 Escuchando...")
+                comando = escuchar(desde=desde, concesion=concesion)
+            
+            if not comando:
+                continue
+            # Atento hasta que el procesador termine de responder (atento_por)
+            self.atento_hasta = float("inf")
+            self._entregar(comando)
+            if comando == "ERROR_MIC":
+                break
+    
+    def _entregar(self, comando):
+        """Encola un comando (si la cola está llena, espera al procesador)"""
+        while not self.detenido.is_set():
+            try:
+                self.comandos.put(comando, timeout=0.2)
+                return
+            except Full:
+                continue
+    
+    def _estado(self, texto):
+        if self.al_cambiar_estado and texto != self._ultimo_estado:
+            self._ultimo_estado = texto
+            try:
+                self.al_cambiar_estado(texto)
+            except Exception as e:
+                logger.error(f"Error en oyente de estado: {e}")
 
 
 def procesar_comando(comando):
@@ -252,54 +471,17 @@ def procesar_comando(comando):
             - respuesta_dict: dict con keys 'action' y 'message'
             - continuar: bool indicando si debe continuar el loop
     """
+    nuevo_turno()
+    
     if not comando or comando in ["error", "timeout", "ERROR_MIC"]:
         return {"action": "error", "message": "No te escuché bien."}, True
     
-    # Comandos de salida
-    if any(palabra in comando for palabra in EXIT_COMMANDS):
-        return {"action": "exit", "message": "¡Hasta luego! Fue un placer ayudarte."}, False
+    # Comandos explícitos (salir, búsquedas, abrir programas): ver src.habilidades
+    resultado = get_registro_habilidades().despachar(comando)
+    if resultado is not None:
+        return resultado
     
-    # 1. Búsqueda en Google (SOLO comandos explícitos)
-    if any(palabra in comando for palabra in ["busca en google", "buscar en google", "googlea"]):
-        termino = comando
-        for prefix in ["busca en google", "buscar en google", "googlea"]:
-            if prefix in comando:
-                termino = comando.replace(prefix, "").strip()
-                break
-        
-        buscar_en_google_directo(termino)  # Abre directamente sin mensaje
-        return {"action": "open_google", "message": f"Listo, busqué '{termino}'.", "query": termino}, True
-    
-    # 2. Búsqueda en YouTube (SOLO comandos explícitos)
-    elif any(palabra in comando for palabra in ["busca en youtube", "buscar en youtube", "pon en youtube", "reproduce en youtube"]):
-        termino = comando
-        for prefix in ["busca en youtube", "buscar en youtube", "pon en youtube", "reproduce en youtube"]:
-            if prefix in comando:
-                termino = comando.replace(prefix, "").strip()
-                break
-        
-        buscar_en_youtube(termino)  # Abre directamente sin mensaje
-        return {"action": "play_youtube", "message": f"Reproduciendo '{termino}'.", "query": termino}, True
-    
-    # 3. Búsqueda en Wikipedia (SOLO comandos explícitos)
-    elif any(palabra in comando for palabra in ["busca en wikipedia", "buscar en wikipedia", "wikipedia"]):
-        termino = comando
-        for prefix in ["busca en wikipedia", "buscar en wikipedia", "wikipedia"]:
-            if prefix in comando:
-                termino = comando.replace(prefix, "").strip()
-                break
-        
-        termino = termino.replace("de ", "").replace("sobre ", "").strip()
-        texto_resumen = resumir_wikipedia(termino)
-        return {"action": "wikipedia_summary", "message": texto_resumen, "query": termino}, True
-    
-    # 4. Abrir programas del sistema (SOLO cuando dice "abre" o "abrir")
-    elif 'abrir' in comando or 'abre' in comando:
-        resultado = abrir_programa(comando)
-        if resultado:
-            return {"action": "system", "message": resultado}, True
-    
-    # 5. Si no es ningún comando especial, usar la IA
+    # Si no es ningún comando especial, usar la IA
     # (Eliminamos las búsquedas genéricas para evitar confusión)
     try:
         respuesta_ia = generar_respuesta(comando)
@@ -348,7 +530,7 @@ def modo_terminal():
             
             if respuesta:
                 print(f"\n🤖 Aura: {respuesta}\n")
-                hablar(respuesta)
+                hablar(respuesta, prioridad=prioridad_para(respuesta_dict))
             
             if not continuar:
                 break
@@ -364,12 +546,29 @@ def test_sistema():
     
     # Test 1: TTS
     print("\n1️⃣  Test de síntesis de voz...")
-    hablar("Probando sistema de voz")
-    time.sleep(2)
-    print("✅ Test completado")
+    resultado = hablar("Probando sistema de voz").result(timeout=30)
+    print(f"✅ Test completado ({resultado})")
+    
+    # Test 1b: Factor de tiempo real por motor TTS
+    print("\n🎛️  Factor de tiempo real (RTF) por motor TTS...")
+    for backend in backends_disponibles():
+        try:
+            rtf, t_sintesis, t_audio = medir_factor_tiempo_real(
+                backend, "Hola, soy Aura. Este es un texto de prueba para medir la síntesis."
+            )
+            print(f"   • {backend.nombre:7s} RTF={rtf:.3f}  "
+                  f"(síntesis {t_sintesis:.2f}s / audio {t_audio:.2f}s)")
+        except Exception as e:
+            print(f"   ❌ {backend.nombre}: {e}")
+    
+    red = get_cliente_gtts().metricas.resumen()
+    if red["peticiones"]:
+        print(f"\n🔌 Red gTTS: {red['peticiones']} peticiones, {red['conexiones']} conexiones nuevas, "
+              f"{red['reutilizadas']} reutilizadas (~{red['ahorro_estimado_ms']:.0f} ms de handshake ahorrados)")
     
     # Test 2: Reconocimiento de voz
     print("\n2️⃣  Test de reconocimiento de voz...")
+    print(f"   Motores ASR: {', '.join(m.nombre for m in motores_activos())}")
     print("   (Di algo en 5 segundos)")
     comando = escuchar()
     if comando:
@@ -401,6 +600,17 @@ def test_sistema():
     mensaje = respuesta.get("message", "")
     print(f"✅ {mensaje[:100]}...")
     
+    # Test 7: Comando sin disparador (clasificador de intenciones)
+    print("\n7️⃣  Test de comando sin disparador...")
+    respuesta, _ = procesar_comando("ponme música de Queen")
+    print(f"✅ [{respuesta.get('action')}] {respuesta.get('message', '')[:100]}")
+    
+    registro = get_registro_habilidades()
+    origenes = registro.resumen()
+    print(f"\n🧭 Comandos: {origenes['disparador']} por disparador, {origenes['aproximado']} aproximados, "
+          f"{origenes['clasificador']} por el clasificador, {origenes['ia']} a la IA "
+          f"({registro.llamadas_ia_evitadas():.0%} de llamadas a la IA evitadas)")
+    
     print("\n" + "=" * 60)
     print("🎉 Tests completados")
     print("=" * 60)
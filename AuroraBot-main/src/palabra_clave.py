@@ -0,0 +1,501 @@
+"""
+Palabra clave ("hola aura") - Detección local sobre la captura continua
+En modo voz continuo cada ruido terminaba en una petición a Google y, a
+veces, en una llamada al LLM. Este detector revisa en el equipo el inicio
+de cada frase que entrega el VAD y solo deja pasar al reconocimiento
+completo lo que viene después de la palabra clave.
+
+Motores locales (el primero disponible con WAKE_WORD_ENGINE=auto):
+  - vosk:       gramática restringida a la palabra clave (necesita VOSK_MODEL)
+  - plantillas: MFCC + DTW contra grabaciones del usuario
+                (python -m src.palabra_clave --registrar)
+Sin ninguno, la palabra clave se desactiva (se escucha como con
+WAKE_WORD_ENABLED=0) y se avisa en el log. El motor "nube" (las frases
+cortas van a Google) solo se usa con WAKE_WORD_ENGINE=nube.
+"""
+import json
+import time
+import logging
+import unicodedata
+
+import numpy as np
+
+from config.settings import (
+    WAKE_WORD, WAKE_WORD_ENGINE, WAKE_TEMPLATES_DIR, WAKE_MAX_SECONDS, WAKE_DTW_THRESHOLD
+)
+
+from src.vad import pcm_a_float
+from src.reconocimiento import MOTORES, VOSK_AVAILABLE, reconocer_frase, ErrorReconocimiento
+
+if VOSK_AVAILABLE:
+    from vosk import KaldiRecognizer
+
+logger = logging.getLogger(__name__)
+
+# Parámetros de los MFCC
+MARCO_MS = 25
+PASO_MS = 10
+N_FILTROS = 26
+N_COEFICIENTES = 12
+RESTO_MINIMO = 0.6  # segundos tras la palabra clave para buscar un comando en la misma frase
+
+
+def normalizar(texto) -> str:
+    """Minúsculas, sin tildes ni signos (para comparar transcripciones)"""
+    texto = unicodedata.normalize("NFD", texto.lower())
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    return " ".join("".join(c if c.isalnum() else " " for c in texto).split())
+
+
+def quitar_palabra_clave(texto, palabra=WAKE_WORD):
+    """
+    Returns:
+        str: Lo que se dijo después de la palabra clave (con su ortografía
+             original), o None si la palabra clave no aparece
+    """
+    tokens = [(t, normalizar(t)) for t in texto.split()]
+    tokens = [(t, n) for t, n in tokens if n]
+    clave = normalizar(palabra).split()
+    normalizados = [n for _, n in tokens]
+    for i in range(len(tokens) - len(clave) + 1):
+        if normalizados[i:i + len(clave)] == clave:
+            return " ".join(t for t, _ in tokens[i + len(clave):]).strip(" ,.;:!¡?¿")
+    return None
+
+
+# ============== MFCC + DTW ==============
+_bancos = {}
+
+
+def _banco_mel(frecuencia, n_fft):
+    """Matriz de filtros triangulares en escala mel (N_FILTROS x n_fft//2+1)"""
+    clave = (frecuencia, n_fft)
+    if clave not in _bancos:
+        mel = lambda f: 2595 * np.log10(1 + f / 700)
+        hz = lambda m: 700 * (10 ** (m / 2595) - 1)
+        puntos = hz(np.linspace(mel(100), mel(min(4000, frecuencia / 2)), N_FILTROS + 2))
+        bins = np.fft.rfftfreq(n_fft, 1.0 / frecuencia)
+        banco = np.zeros((N_FILTROS, len(bins)))
+        for i in range(N_FILTROS):
+            izq, centro, der = puntos[i:i + 3]
+            subida = (bins - izq) / (centro - izq)
+            bajada = (der - bins) / (der - centro)
+            banco[i] = np.maximum(0, np.minimum(subida, bajada))
+        n = np.arange(N_FILTROS)
+        dct = np.cos(np.pi / N_FILTROS * (n + 0.5)[None, :] * np.arange(1, N_COEFICIENTES + 1)[:, None])
+        _bancos[clave] = (banco, dct)
+    return _bancos[clave]
+
+
+def normalizar_mfcc(mfcc, referencia=None) -> np.ndarray:
+    """
+    Media 0 y varianza 1 por coeficiente (quita el color del micrófono)
+
+    Args:
+        mfcc: Matriz (n_marcos, N_COEFICIENTES)
+        referencia: Marcos de los que se toman media y desvío (por defecto mfcc)
+    """
+    referencia = mfcc if referencia is None else referencia
+    return (mfcc - referencia.mean(axis=0)) / (referencia.std(axis=0) + 1e-6)
+
+
+def caracteristicas_mfcc(audio, frecuencia, ancho_muestra=2, normalizar=True) -> np.ndarray:
+    """
+    MFCC de un audio
+
+    Args:
+        audio: Bytes PCM mono
+        frecuencia: Frecuencia de muestreo
+        ancho_muestra: Bytes por muestra
+        normalizar: Aplicar normalizar_mfcc a todo el audio
+
+    Returns:
+        np.ndarray: Matriz (n_marcos, N_COEFICIENTES)
+    """
+    x = pcm_a_float(audio, ancho_muestra)
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1]) if len(x) else x
+    largo = int(frecuencia * MARCO_MS / 1000)
+    paso = int(frecuencia * PASO_MS / 1000)
+    if len(x) < largo:
+        return np.zeros((0, N_COEFICIENTES))
+    n_marcos = 1 + (len(x) - largo) // paso
+    indices = np.arange(largo)[None, :] + paso * np.arange(n_marcos)[:, None]
+    marcos = x[indices] * np.hamming(largo)
+
+    n_fft = 1 << (largo - 1).bit_length()
+    banco, dct = _banco_mel(frecuencia, n_fft)
+    potencia = np.abs(np.fft.rfft(marcos, n_fft, axis=1)) ** 2
+    mfcc = np.log(potencia @ banco.T + 1e-6) @ dct.T
+    return normalizar_mfcc(mfcc) if normalizar else mfcc
+
+
+def distancia_dtw(plantilla, frase):
+    """
+    DTW con inicio fijo y final abierto: alinea la plantilla completa con
+    el comienzo de la frase (la frase puede seguir con un comando)
+
+    Args:
+        plantilla: MFCC de la palabra clave (L x d)
+        frase: MFCC del inicio de la frase (N x d)
+
+    Returns:
+        tuple: (distancia media por paso, marco de la frase donde termina la palabra)
+    """
+    L, N = len(plantilla), len(frase)
+    desde, hasta = max(1, int(0.6 * L)), min(N, int(1.6 * L))
+    if L == 0 or hasta < desde:
+        return float("inf"), 0
+    costo = np.sqrt(((plantilla[:, None, :] - frase[None, :hasta, :]) ** 2).mean(axis=2))
+
+    # Cada fila se resuelve vectorizada: x_j = c_j + min(a_j, x_{j-1})
+    # equivale a x = S + min.acumulado(a - S_{j-1}) con S = suma acumulada de c
+    fila = np.cumsum(costo[0])
+    for i in range(1, L):
+        a = fila.copy()
+        a[1:] = np.minimum(fila[1:], fila[:-1])
+        suma = np.cumsum(costo[i])
+        previa = np.concatenate(([0.0], suma[:-1]))
+        fila = suma + np.minimum.accumulate(a - previa)
+
+    finales = np.arange(desde - 1, hasta)
+    normalizada = fila[finales] / (L + finales + 1)
+    mejor = int(np.argmin(normalizada))
+    return float(normalizada[mejor]), int(finales[mejor] + 1)
+
+
+# ============== DETECCIONES ==============
+class Deteccion:
+    """Palabra clave encontrada al inicio de una frase"""
+
+    def __init__(self, frase, motor, fin, texto=None):
+        self.frase = frase
+        self.motor = motor  # "vosk", "plantillas" o "nube"
+        self.fin = fin      # segundos desde el inicio de la frase hasta el final de la palabra
+        self.texto = texto  # transcripción completa de la frase, si el motor la produjo
+
+    @property
+    def tiene_resto(self) -> bool:
+        """Si después de la palabra clave se siguió hablando en la misma frase"""
+        if self.texto is not None:
+            return bool(quitar_palabra_clave(self.texto))
+        return self.frase.duracion - self.fin >= RESTO_MINIMO
+
+
+def _prefijo(frase, segundos=WAKE_MAX_SECONDS):
+    n = int(segundos * frase.frecuencia) * frase.ancho_muestra
+    return frase.audio[:n]
+
+
+def _desde_voz(audio, frecuencia, ancho_muestra=2):
+    """
+    Recorta el silencio inicial (el pre-roll del VAD varía de frase en
+    frase y desalinearía el DTW, que fija el inicio)
+
+    Returns:
+        tuple: (audio recortado, segundos recortados)
+    """
+    x = pcm_a_float(audio, ancho_muestra)
+    paso = int(frecuencia * PASO_MS / 1000)
+    n = len(x) // paso
+    if n == 0:
+        return audio, 0.0
+    rms = np.sqrt(np.mean(x[:n * paso].reshape(n, paso) ** 2, axis=1))
+    primero = int(np.argmax(rms > 0.1 * rms.max()))
+    inicio = max(0, primero - 3) * paso  # margen de 30 ms antes del ataque
+    return audio[inicio * ancho_muestra:], inicio / frecuencia
+
+
+class DetectorVosk:
+    """Vosk con gramática cerrada: solo distingue la palabra clave de [unk]"""
+    nombre = "vosk"
+
+    def __init__(self, motor, palabra=WAKE_WORD):
+        self.motor = motor
+        self.palabra = normalizar(palabra)
+        self.gramatica = json.dumps([self.palabra, "[unk]"])
+
+    def detectar(self, frase):
+        rec = KaldiRecognizer(self.motor.modelo(), frase.frecuencia, self.gramatica)
+        rec.SetWords(True)
+        rec.AcceptWaveform(_prefijo(frase))
+        resultado = json.loads(rec.FinalResult())
+        if self.palabra not in normalizar(resultado.get("text", "")):
+            return None
+        palabras = [p for p in resultado.get("result", []) if p.get("word") != "[unk]"]
+        fin = palabras[-1]["end"] if palabras else 0.0
+        return Deteccion(frase, self.nombre, fin)
+
+
+class DetectorPlantillas:
+    """MFCC + DTW contra grabaciones de la palabra clave"""
+    nombre = "plantillas"
+
+    def __init__(self, plantillas, umbral=None):
+        """
+        Args:
+            plantillas: Lista de matrices MFCC
+            umbral: Distancia máxima (None = según la dispersión entre plantillas)
+        """
+        self.plantillas = plantillas
+        self.umbral = umbral if umbral is not None else self._umbral_automatico()
+
+    def _umbral_automatico(self):
+        if len(self.plantillas) < 2:
+            return WAKE_DTW_THRESHOLD
+        # Las repeticiones del usuario marcan cuánto varía la misma palabra
+        distancias = []
+        for i, a in enumerate(self.plantillas):
+            for b in self.plantillas[i + 1:]:
+                distancias.append(distancia_dtw(a, b)[0])
+                distancias.append(distancia_dtw(b, a)[0])
+        finitas = [d for d in distancias if np.isfinite(d)]
+        return max(finitas) * 1.25 if finitas else WAKE_DTW_THRESHOLD
+
+    @classmethod
+    def cargar(cls, carpeta=WAKE_TEMPLATES_DIR):
+        """
+        Returns:
+            DetectorPlantillas: Detector con las plantillas guardadas, o None si no hay
+        """
+        plantillas = [np.load(p) for p in sorted(carpeta.glob("*.npy"))] if carpeta.exists() else []
+        return cls(plantillas) if plantillas else None
+
+    def detectar(self, frase):
+        audio, recorte = _desde_voz(frase.audio, frase.frecuencia, frase.ancho_muestra)
+        audio = audio[:int(WAKE_MAX_SECONDS * frase.frecuencia) * frase.ancho_muestra]
+        mfcc = caracteristicas_mfcc(audio, frase.frecuencia, frase.ancho_muestra, normalizar=False)
+        if len(mfcc) == 0:
+            return None
+        mejor, fin = float("inf"), 0
+        for plantilla in self.plantillas:
+            # Se normaliza solo el tramo que podría ser la palabra (la frase
+            # puede seguir con un comando que cambiaría la media)
+            tramo = normalizar_mfcc(mfcc, mfcc[:int(1.1 * len(plantilla))])
+            distancia, marco = distancia_dtw(plantilla, tramo)
+            if distancia < mejor:
+                mejor, fin = distancia, marco
+        logger.debug(f"Palabra clave: distancia {mejor:.3f} (umbral {self.umbral:.3f})")
+        if mejor > self.umbral:
+            return None
+        return Deteccion(frase, self.nombre, recorte + fin * PASO_MS / 1000)
+
+
+class DetectorNube:
+    """Reconoce en la nube las frases cortas (solo con WAKE_WORD_ENGINE=nube)"""
+    nombre = "nube"
+
+    def __init__(self, palabra=WAKE_WORD):
+        self.palabra = palabra
+
+    def detectar(self, frase):
+        if frase.duracion > WAKE_MAX_SECONDS:
+            return None
+        try:
+            texto = reconocer_frase(frase)
+        except ErrorReconocimiento as e:
+            logger.warning(f"Palabra clave: reconocimiento no disponible: {e}")
+            return None
+        if not texto or quitar_palabra_clave(texto, self.palabra) is None:
+            return None
+        return Deteccion(frase, self.nombre, frase.duracion, texto)
+
+
+# ============== DETECTOR ==============
+class DetectorPalabraClave:
+    """Espera la palabra clave en el flujo de frases del servicio de captura"""
+
+    def __init__(self, motor=None, preferido=WAKE_WORD_ENGINE):
+        """
+        Args:
+            motor: Detector (DetectorVosk, DetectorPlantillas, DetectorNube);
+                   por defecto el que indica preferido
+            preferido: "auto" (Vosk o plantillas), "vosk", "plantillas" o "nube"
+        """
+        self.motor = motor or self._elegir_motor(preferido)
+        if self.motor is not None:
+            logger.info(f"Detector de palabra clave: {self.motor.nombre}")
+
+    @staticmethod
+    def _elegir_motor(preferido):
+        """
+        Returns:
+            Detector local disponible (o DetectorNube si se pidió), o None
+        """
+        if preferido == "nube":
+            logger.warning("Palabra clave en la nube (WAKE_WORD_ENGINE=nube): "
+                           "cada frase corta se envía a Google")
+            return DetectorNube()
+        vosk = MOTORES.get("vosk")
+        if preferido in ("auto", "vosk") and VOSK_AVAILABLE and vosk is not None and vosk.disponible():
+            return DetectorVosk(vosk)
+        if preferido in ("auto", "plantillas"):
+            plantillas = DetectorPlantillas.cargar()
+            if plantillas is not None:
+                return plantillas
+        logger.warning(
+            f"Palabra clave desactivada: no hay motor local ({preferido}). Graba tu voz con "
+            "'python -m src.palabra_clave --registrar' o instala Vosk (VOSK_MODEL); "
+            "WAKE_WORD_ENGINE=nube la detecta en Google"
+        )
+        return None
+
+    @property
+    def disponible(self) -> bool:
+        """Hay un motor para esperar la palabra clave"""
+        return self.motor is not None
+
+    @property
+    def local(self) -> bool:
+        return self.motor is not None and self.motor.nombre != "nube"
+
+    def detectar(self, frase):
+        """
+        Returns:
+            Deteccion: Si la frase empieza con la palabra clave, si no None
+        """
+        if self.motor is None:
+            return None
+        try:
+            return self.motor.detectar(frase)
+        except Exception as e:
+            logger.error(f"Error del detector de palabra clave: {e}")
+            return None
+
+    def esperar(self, captura, timeout=None, cancelar=None, desde=None):
+        """
+        Consume frases hasta oír la palabra clave
+
+        Args:
+            captura: ServicioCaptura iniciado, o una Concesion de él
+            timeout: Segundos máximos de espera (None = sin límite)
+            cancelar: threading.Event opcional que interrumpe la espera
+            desde: Considerar frases que terminaron después de este instante
+                   (time.monotonic; por defecto, las que terminen desde ahora)
+
+        Returns:
+            Deteccion: La detección, o None si venció el timeout o se canceló
+
+        Raises:
+            OSError: Si el micrófono falla
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        desde = time.monotonic() if desde is None else desde
+        while cancelar is None or not cancelar.is_set():
+            espera = 0.5 if limite is None else min(0.5, limite - time.monotonic())
+            if espera <= 0:
+                return None
+            frase = captura.siguiente_frase(timeout=espera, desde=desde)
+            if frase is None:
+                continue
+            deteccion = self.detectar(frase)
+            if deteccion:
+                logger.info(f"Palabra clave detectada ({deteccion.motor})")
+                return deteccion
+        return None
+
+    def comando(self, deteccion):
+        """
+        Texto dicho después de la palabra clave en la misma frase
+
+        Returns:
+            str: El comando, o None si la frase solo tenía la palabra clave
+        """
+        if not deteccion.tiene_resto:
+            return None
+        texto = deteccion.texto
+        if texto is None:
+            try:
+                texto = reconocer_frase(deteccion.frase)
+            except ErrorReconocimiento as e:
+                logger.warning(f"Reconocimiento no disponible: {e}")
+                return None
+        if not texto:
+            return None
+        resto = quitar_palabra_clave(texto)
+        # Si la nube no transcribió la palabra clave, la frase entera es el comando
+        return (resto if resto is not None else texto).lower() or None
+
+
+# ============== REGISTRO DE PLANTILLAS ==============
+def registrar_plantillas(captura, repeticiones=3, carpeta=WAKE_TEMPLATES_DIR, aviso=print):
+    """
+    Graba la palabra clave varias veces y guarda sus MFCC como plantillas
+
+    Args:
+        captura: ServicioCaptura iniciado
+        repeticiones: Número de grabaciones
+        carpeta: Carpeta de destino (se reemplazan las plantillas previas)
+        aviso: Función para mostrar instrucciones
+
+    Returns:
+        int: Plantillas guardadas
+    """
+    plantillas = []
+    with captura.adquirir("registro de palabra clave") as concesion:
+        while len(plantillas) < repeticiones:
+            aviso(f"🎤 Di '{WAKE_WORD}' ({len(plantillas) + 1}/{repeticiones})...")
+            frase = concesion.siguiente_frase(timeout=10)
+            if frase is None:
+                aviso("⚠️  No se escuchó nada, intenta de nuevo")
+                continue
+            if frase.duracion > WAKE_MAX_SECONDS:
+                aviso("⚠️  Demasiado largo: di solo la palabra clave")
+                continue
+            audio, _ = _desde_voz(frase.audio, frase.frecuencia, frase.ancho_muestra)
+            plantillas.append(caracteristicas_mfcc(audio, frase.frecuencia, frase.ancho_muestra))
+
+    carpeta.mkdir(parents=True, exist_ok=True)
+    for viejo in carpeta.glob("*.npy"):
+        viejo.unlink()
+    for i, mfcc in enumerate(plantillas):
+        np.save(carpeta / f"plantilla_{i}.npy", mfcc)
+    umbral = DetectorPlantillas(plantillas).umbral
+    aviso(f"✅ {len(plantillas)} plantillas guardadas en {carpeta} (umbral {umbral:.3f})")
+    return len(plantillas)
+
+
+# ============== INSTANCIA GLOBAL ==============
+_detector_instance = None
+
+
+def get_detector_palabra_clave() -> DetectorPalabraClave:
+    """
+    Obtiene o crea el detector global de palabra clave
+
+    Returns:
+        DetectorPalabraClave: Instancia compartida
+    """
+    global _detector_instance
+
+    if _detector_instance is None:
+        _detector_instance = DetectorPalabraClave()
+
+    return _detector_instance
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.captura import get_servicio_captura
+
+    parser = argparse.ArgumentParser(description="Palabra clave de Aura")
+    parser.add_argument("--registrar", action="store_true", help="grabar plantillas de la palabra clave")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    captura = get_servicio_captura()
+    captura.iniciar()
+    try:
+        if args.registrar:
+            registrar_plantillas(captura, args.repeticiones)
+        elif not get_detector_palabra_clave().disponible:
+            print("❌ Sin motor de palabra clave: usa --registrar o instala Vosk")
+        else:
+            detector = get_detector_palabra_clave()
+            print(f"👂 Esperando '{WAKE_WORD}' ({detector.motor.nombre})... Ctrl+C para salir")
+            while True:
+                deteccion = detector.esperar(captura)
+                print(f"✅ Detectada ({deteccion.motor}); comando: {detector.comando(deteccion)}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        captura.detener()
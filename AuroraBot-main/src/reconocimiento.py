@@ -0,0 +1,456 @@
+"""
+Reconocimiento de voz (ASR) - Motores intercambiables
+Google (en línea, vía SpeechRecognition) y Vosk (offline, CPU, streaming).
+El motor local transcribe mientras el usuario habla (hipótesis parciales)
+y tiene el resultado listo en cuanto el VAD cierra la frase; en modo
+"auto" compite con Google y se usa el primero que responda.
+"""
+import json
+import time
+import logging
+import threading
+from queue import Queue
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import speech_recognition as sr
+
+from config.settings import (
+    VOICE_LANG, ASR_BACKEND, VOSK_MODEL, ASR_TIMEOUT, PARTIAL_STABLE_MS, NOISE_SUPPRESSION
+)
+
+from src.subida_audio import preparar_para_subida, get_estadisticas_subida
+from src.supresion_ruido import suprimir_ruido
+
+# Vosk es opcional
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+    SetLogLevel(-1)
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorReconocimiento(Exception):
+    """El motor no pudo procesar la frase (red, servicio, modelo)"""
+
+
+# ============== MOTORES ==============
+class ReconocedorASR:
+    """Interfaz común de los motores de reconocimiento"""
+    nombre = "base"
+    offline = False
+    streaming = False
+
+    def disponible(self) -> bool:
+        return False
+
+    def reconocer(self, frase):
+        """
+        Transcribe una frase completa
+
+        Args:
+            frase: Frase de src.captura
+
+        Returns:
+            str: Texto reconocido, o None si no se entendió nada
+
+        Raises:
+            ErrorReconocimiento: Si el motor falló
+        """
+        raise NotImplementedError
+
+    def nueva_sesion(self, frecuencia):
+        """Sesión de reconocimiento incremental (solo motores streaming)"""
+        raise NotImplementedError
+
+
+class GoogleASR(ReconocedorASR):
+    """
+    Google Web Speech a través de SpeechRecognition (requiere red)
+
+    La frase se sube recortada y en mono a 16 kHz (src.subida_audio).
+    """
+    nombre = "google"
+
+    def __init__(self, idioma=VOICE_LANG):
+        self.idioma = idioma
+        self._recognizer = sr.Recognizer()
+
+    def disponible(self) -> bool:
+        return True
+
+    def reconocer(self, frase):
+        try:
+            audio = preparar_para_subida(frase)
+            get_estadisticas_subida().registrar(audio)
+            return self._recognizer.recognize_google(audio, language=self.idioma)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            raise ErrorReconocimiento(f"Google: {e}")
+
+
+class SesionVosk:
+    """Reconocimiento incremental de una frase con Vosk"""
+
+    def __init__(self, modelo, frecuencia):
+        self._rec = KaldiRecognizer(modelo, frecuencia)
+        self._texto_previo = []  # Resultados de sub-frases que Vosk ya cerró
+
+    def aceptar(self, audio):
+        """
+        Agrega audio a la sesión
+
+        Returns:
+            str: Hipótesis parcial actual
+        """
+        if self._rec.AcceptWaveform(audio):
+            texto = json.loads(self._rec.Result()).get("text", "")
+            if texto:
+                self._texto_previo.append(texto)
+            return " ".join(self._texto_previo)
+        parcial = json.loads(self._rec.PartialResult()).get("partial", "")
+        return " ".join(self._texto_previo + ([parcial] if parcial else []))
+
+    def finalizar(self):
+        """
+        Returns:
+            str: Transcripción final (vacía si no se entendió nada)
+        """
+        texto = json.loads(self._rec.FinalResult()).get("text", "")
+        return " ".join(self._texto_previo + ([texto] if texto else []))
+
+
+class VoskASR(ReconocedorASR):
+    """Vosk (Kaldi): offline en CPU, con hipótesis parciales"""
+    nombre = "vosk"
+    offline = True
+    streaming = True
+
+    def __init__(self, ruta_modelo=VOSK_MODEL):
+        self.ruta_modelo = ruta_modelo
+        self._modelo = None
+        self._lock = threading.Lock()
+
+    def disponible(self) -> bool:
+        return VOSK_AVAILABLE and bool(self.ruta_modelo)
+
+    def modelo(self):
+        """Modelo Vosk (se carga la primera vez)"""
+        with self._lock:
+            if self._modelo is None:
+                try:
+                    self._modelo = Model(self.ruta_modelo)
+                except Exception as e:
+                    raise ErrorReconocimiento(f"Vosk: no se pudo cargar el modelo: {e}")
+                logger.info(f"Modelo Vosk cargado: {self.ruta_modelo}")
+        return self._modelo
+
+    def nueva_sesion(self, frecuencia):
+        return SesionVosk(self.modelo(), frecuencia)
+
+    def reconocer(self, frase):
+        sesion = self.nueva_sesion(frase.frecuencia)
+        sesion.aceptar(frase.audio)
+        return sesion.finalizar() or None
+
+
+# ============== TRANSCRIPCIÓN EN VIVO ==============
+class TranscriptorStreaming:
+    """
+    Alimenta un motor streaming con el audio de cada frase mientras se
+    captura; publica hipótesis parciales y deja el resultado final de cada
+    frase en un Future apenas el VAD la cierra
+    """
+
+    MAX_RESULTADOS = 16
+
+    def __init__(self, reconocedor, frecuencia):
+        """
+        Args:
+            reconocedor: ReconocedorASR con streaming = True
+            frecuencia: Frecuencia de muestreo de la captura
+        """
+        self.reconocedor = reconocedor
+        self.frecuencia = frecuencia
+        self._eventos = Queue()
+        self._resultados = {}   # id_frase -> Future con el texto final
+        self._lock = threading.Lock()
+        self._oyentes = []      # Callbacks (id_frase, texto) de hipótesis parciales
+        self._hilo = threading.Thread(target=self._bucle, daemon=True, name="asr-streaming")
+        self._hilo.start()
+
+    def agregar_oyente_parcial(self, callback):
+        """Suscribe un callback (id_frase, texto) a las hipótesis parciales"""
+        self._oyentes.append(callback)
+
+    def quitar_oyente_parcial(self, callback):
+        try:
+            self._oyentes.remove(callback)
+        except ValueError:
+            pass
+
+    def evento(self, evento, id_frase, datos):
+        """Oyente de ServicioCaptura (se llama en el hilo de captura)"""
+        if evento == "inicio":
+            with self._lock:
+                self._resultados[id_frase] = Future()
+                for viejo in sorted(self._resultados)[:-self.MAX_RESULTADOS]:
+                    self._resultados.pop(viejo).cancel()
+        self._eventos.put((evento, id_frase, datos))
+
+    def resultado(self, id_frase):
+        """
+        Returns:
+            Future: Texto final de la frase, o None si no se transcribió en vivo
+        """
+        with self._lock:
+            return self._resultados.get(id_frase)
+
+    def _bucle(self):
+        sesion = None
+        parcial_previo = ""
+        while True:
+            evento, id_frase, datos = self._eventos.get()
+            futuro = self.resultado(id_frase)
+            try:
+                if evento == "inicio":
+                    sesion = self.reconocedor.nueva_sesion(self.frecuencia)
+                    parcial_previo = ""
+                    evento = "audio"
+                if sesion is None:
+                    continue
+                if evento == "audio":
+                    parcial = sesion.aceptar(datos)
+                    if parcial and parcial != parcial_previo:
+                        parcial_previo = parcial
+                        self._emitir_parcial(id_frase, parcial)
+                elif evento == "fin":
+                    texto = sesion.finalizar() if datos else ""
+                    sesion = None
+                    if futuro is not None and not futuro.done():
+                        futuro.set_result(texto or None)
+            except Exception as e:
+                logger.error(f"Error en ASR streaming: {e}")
+                sesion = None
+                if futuro is not None and not futuro.done():
+                    futuro.set_exception(ErrorReconocimiento(str(e)))
+
+    def _emitir_parcial(self, id_frase, texto):
+        for callback in list(self._oyentes):
+            try:
+                callback(id_frase, texto)
+            except Exception as e:
+                logger.error(f"Error en oyente de parciales: {e}")
+
+
+class PrefijoEstable:
+    """
+    Decide cuándo una hipótesis parcial ya alcanza para actuar: el texto
+    cumple la condición (p. ej. empieza con "busca en youtube" y tiene
+    término), no cambió durante estable_ms y el usuario hizo una pausa de
+    al menos estable_ms (entre palabras la hipótesis también se queda quieta)
+    """
+
+    def __init__(self, condicion, estable_ms=PARTIAL_STABLE_MS, pausa=None):
+        """
+        Args:
+            condicion: Función (texto) -> bool
+            estable_ms: Milisegundos sin cambios para dar el texto por estable
+            pausa: Función () -> segundos de silencio al final del audio
+                   (None = no se exige pausa)
+        """
+        self.condicion = condicion
+        self.pausa = pausa
+        self.estable = estable_ms / 1000
+        self.listo = threading.Event()
+        self.texto = None
+        self.id_frase = None
+        self._lock = threading.Lock()
+        self._temporizador = None
+        self._version = 0
+
+    def observar(self, id_frase, texto):
+        """Oyente de hipótesis parciales (id_frase, texto)"""
+        with self._lock:
+            if self.listo.is_set():
+                return
+            self._version += 1
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+            if not self.condicion(texto):
+                return
+            self._armar(self.estable, self._version, id_frase, texto)
+
+    def _armar(self, segundos, version, id_frase, texto):
+        self._temporizador = threading.Timer(segundos, self._confirmar, args=(version, id_frase, texto))
+        self._temporizador.daemon = True
+        self._temporizador.start()
+
+    def cancelar(self):
+        with self._lock:
+            if self._temporizador is not None:
+                self._temporizador.cancel()
+            self._version += 1
+
+    def _confirmar(self, version, id_frase, texto):
+        with self._lock:
+            if version != self._version or self.listo.is_set():
+                return
+            silencio = self.pausa() if self.pausa is not None else self.estable
+            if silencio < self.estable:
+                # Sigue hablando: el término todavía puede crecer
+                self._armar(max(0.02, self.estable - silencio), version, id_frase, texto)
+                return
+            self.texto, self.id_frase = texto, id_frase
+            self.listo.set()
+
+
+# ============== SELECCIÓN Y CARRERA ==============
+MOTORES = {
+    "google": GoogleASR(),
+    "vosk": VoskASR(),
+}
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="asr")
+_transcriptor = None
+_transcriptor_lock = threading.Lock()
+_oyentes_parciales = []
+
+
+def agregar_oyente_parcial(callback):
+    """
+    Suscribe un callback a las hipótesis parciales del motor streaming
+
+    Args:
+        callback: Función (id_frase, texto); se llama desde el hilo del
+                  transcriptor. Sin motor streaming nunca se llama.
+    """
+    _oyentes_parciales.append(callback)
+
+
+def quitar_oyente_parcial(callback):
+    """Cancela la suscripción de un callback de hipótesis parciales"""
+    try:
+        _oyentes_parciales.remove(callback)
+    except ValueError:
+        pass
+
+
+def _reenviar_parcial(id_frase, texto):
+    for callback in list(_oyentes_parciales):
+        try:
+            callback(id_frase, texto)
+        except Exception as e:
+            logger.error(f"Error en oyente de parciales: {e}")
+
+
+def motores_activos(preferido=None):
+    """
+    Motores a usar según ASR_BACKEND
+
+    Returns:
+        list: ReconocedorASR disponibles, en orden de preferencia
+    """
+    politica = preferido or ASR_BACKEND
+    if politica != "auto":
+        motor = MOTORES.get(politica)
+        if motor and motor.disponible():
+            return [motor]
+        logger.warning(f"Motor ASR '{politica}' no disponible, usando google")
+        return [MOTORES["google"]]
+    return [m for m in MOTORES.values() if m.disponible()]
+
+
+def iniciar_transcripcion(captura):
+    """
+    Conecta un motor streaming local al servicio de captura (idempotente)
+
+    Args:
+        captura: ServicioCaptura ya iniciado
+
+    Returns:
+        TranscriptorStreaming: El transcriptor, o None si no hay motor streaming
+    """
+    global _transcriptor
+
+    with _transcriptor_lock:
+        if _transcriptor is None:
+            streaming = [m for m in motores_activos() if m.streaming]
+            if not streaming:
+                return None
+            _transcriptor = TranscriptorStreaming(streaming[0], captura.fuente.frecuencia)
+            _transcriptor.agregar_oyente_parcial(_reenviar_parcial)
+            captura.agregar_oyente(_transcriptor.evento)
+    return _transcriptor
+
+
+def get_transcriptor():
+    """Transcriptor en vivo activo (o None)"""
+    return _transcriptor
+
+
+def reconocer_frase(frase, motores=None, timeout=ASR_TIMEOUT, transcriptor=None,
+                    limpiar=NOISE_SUPPRESSION):
+    """
+    Transcribe una frase con todos los motores activos en paralelo y
+    devuelve el primer resultado no vacío
+
+    El motor streaming ya transcribió la frase mientras se capturaba, así
+    que su resultado suele estar listo de inmediato.
+
+    Args:
+        frase: Frase de src.captura
+        motores: Lista de ReconocedorASR (por defecto motores_activos())
+        timeout: Segundos máximos de espera en total (no por motor)
+        transcriptor: TranscriptorStreaming que siguió la captura de la frase
+                      (por defecto el de iniciar_transcripcion)
+        limpiar: Suprimir el ruido de fondo antes de enviar la frase a los
+                 motores (no afecta a lo que ya transcribió el streaming)
+
+    Returns:
+        str: Texto reconocido, o None si ningún motor entendió la frase
+
+    Raises:
+        ErrorReconocimiento: Si todos los motores fallaron
+    """
+    motores = motores if motores is not None else motores_activos()
+    transcriptor = transcriptor or _transcriptor
+    pendientes = {}
+    limpia = None
+    for motor in motores:
+        futuro = None
+        if transcriptor is not None and motor is transcriptor.reconocedor:
+            futuro = transcriptor.resultado(frase.id)
+        if futuro is None:
+            if limpia is None:
+                limpia = suprimir_ruido(frase) if limpiar else frase
+            futuro = _pool.submit(motor.reconocer, limpia)
+        pendientes[futuro] = motor
+
+    errores = []
+    limite = time.monotonic() + timeout
+    while pendientes:
+        listos, _ = wait(pendientes, timeout=max(0, limite - time.monotonic()),
+                         return_when=FIRST_COMPLETED)
+        if not listos:
+            errores.append("tiempo agotado")
+            break
+        for futuro in listos:
+            motor = pendientes.pop(futuro)
+            try:
+                texto = futuro.result()
+            except Exception as e:
+                logger.warning(f"ASR {motor.nombre} falló: {e}")
+                errores.append(f"{motor.nombre}: {e}")
+                continue
+            if texto:
+                logger.debug(f"ASR ganador: {motor.nombre}")
+                return texto
+
+    if errores and len(errores) >= len(motores):
+        raise ErrorReconocimiento("; ".join(errores))
+    return None
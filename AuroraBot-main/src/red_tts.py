@@ -0,0 +1,243 @@
+"""
+Red de gTTS - Sesión HTTP compartida para todas las peticiones de síntesis
+gTTS abre una sesión (y una conexión TLS) nueva por cada fragmento de texto.
+Este cliente reutiliza un pool de conexiones keep-alive entre enunciados,
+descarga en paralelo los fragmentos de un texto largo (en orden) y mide
+cuántos handshakes se evitaron.
+
+Para eso usa la preparación de peticiones interna de gTTS y el formato de
+su respuesta; si una versión nueva de gTTS los cambia, el cliente pasa a
+la vía pública (gTTS.write_to_fp, sin pool) en lugar de quedarse mudo.
+"""
+import io
+import re
+import time
+import base64
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPSConnectionPool, HTTPConnectionPool
+from urllib3.connection import HTTPSConnection, HTTPConnection
+from gtts import gTTS
+from gtts.tts import gTTSError
+
+from config.settings import TTS_HTTP_POOL, TTS_HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_AUDIO_RPC = re.compile(r'jQ1olc","\[\\"(.*)\\"]')  # como gtts.tts.gTTS.stream (2.5.x)
+
+
+# ============== MÉTRICAS ==============
+class MetricasRed:
+    """Contadores de peticiones, conexiones nuevas y tiempo de conexión"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.conexiones = 0
+        self.tiempo_conexion = 0.0  # TCP + TLS de las conexiones nuevas
+
+    def registrar_conexion(self, segundos):
+        with self._lock:
+            self.conexiones += 1
+            self.tiempo_conexion += segundos
+
+    def registrar_peticion(self):
+        with self._lock:
+            self.peticiones += 1
+
+    def resumen(self) -> dict:
+        """
+        Returns:
+            dict: peticiones, conexiones, reutilizadas, handshake_medio_ms
+                  y ahorro_estimado_ms (reutilizadas x handshake medio)
+        """
+        with self._lock:
+            reutilizadas = max(0, self.peticiones - self.conexiones)
+            handshake = self.tiempo_conexion / self.conexiones if self.conexiones else 0.0
+            return {
+                "peticiones": self.peticiones,
+                "conexiones": self.conexiones,
+                "reutilizadas": reutilizadas,
+                "handshake_medio_ms": handshake * 1000,
+                "ahorro_estimado_ms": reutilizadas * handshake * 1000,
+            }
+
+
+def _clases_medidas(metricas):
+    """Crea clases de pool cuyas conexiones registran su tiempo de conexión"""
+
+    def medir(base):
+        class ConexionMedida(base):
+            def connect(self):
+                inicio = time.perf_counter()
+                super().connect()
+                metricas.registrar_conexion(time.perf_counter() - inicio)
+        return ConexionMedida
+
+    class PoolHTTPS(HTTPSConnectionPool):
+        ConnectionCls = medir(HTTPSConnection)
+
+    class PoolHTTP(HTTPConnectionPool):
+        ConnectionCls = medir(HTTPConnection)
+
+    return {"https": PoolHTTPS, "http": PoolHTTP}
+
+
+class _AdaptadorMedido(HTTPAdapter):
+    """HTTPAdapter con pool keep-alive que cuenta las conexiones nuevas"""
+
+    def __init__(self, metricas, **kwargs):
+        self._metricas = metricas
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _clases_medidas(self._metricas)
+
+
+# ============== CLIENTE ==============
+class ClienteGTTS:
+    """Cliente de gTTS sobre una única sesión HTTP con pool de conexiones"""
+
+    def __init__(self, max_conexiones=TTS_HTTP_POOL, timeout=TTS_HTTP_TIMEOUT):
+        """
+        Args:
+            max_conexiones: Conexiones keep-alive y descargas simultáneas
+            timeout: Segundos máximos por petición
+        """
+        self.timeout = timeout
+        self.metricas = MetricasRed()
+        self.max_conexiones = max(1, int(max_conexiones))
+
+        adaptador = _AdaptadorMedido(
+            self.metricas,
+            pool_connections=1,
+            pool_maxsize=self.max_conexiones,
+            pool_block=True
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", adaptador)
+        self.session.mount("http://", adaptador)
+        # Igual que gTTS: sin verificación SSL (proxies y firewalls) y proxies del sistema
+        self.session.verify = False
+        self.session.proxies.update(urllib.request.getproxies())
+        try:
+            requests.packages.urllib3.disable_warnings(
+                requests.packages.urllib3.exceptions.InsecureRequestWarning
+            )
+        except Exception:
+            pass
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_conexiones,
+            thread_name_prefix="gtts-red"
+        )
+        self._via_interna = True  # False si esta versión de gTTS no es compatible
+
+    def sintetizar(self, texto, lang) -> bytes:
+        """
+        Sintetiza el texto; los fragmentos que gTTS envía por separado
+        se descargan en paralelo y se concatenan en orden
+
+        Args:
+            texto: Texto a pronunciar
+            lang: Idioma de gTTS
+
+        Returns:
+            bytes: Audio MP3
+
+        Raises:
+            gTTSError: Si la petición falla o la respuesta no trae audio
+        """
+        tts = gTTS(text=texto, lang=lang)
+        if self._via_interna:
+            try:
+                peticiones = tts._prepare_requests()
+            except AttributeError as e:
+                self._desactivar_via_interna(f"sin _prepare_requests ({e})")
+            else:
+                audio = self._descargar_todas(tts, peticiones)
+                if audio:
+                    return audio
+                self._desactivar_via_interna("respuesta en un formato desconocido")
+
+        buffer = io.BytesIO()
+        tts.write_to_fp(buffer)
+        return buffer.getvalue()
+
+    def _desactivar_via_interna(self, motivo):
+        self._via_interna = False
+        logger.warning(f"gTTS: {motivo}; se usa la vía pública sin pool de conexiones")
+
+    def _descargar_todas(self, tts, peticiones) -> bytes:
+        """Descarga los fragmentos en paralelo y los concatena en orden"""
+        if len(peticiones) == 1:
+            return self._descargar(tts, peticiones[0])
+
+        futuros = [self._pool.submit(self._descargar, tts, p) for p in peticiones]
+        try:
+            audios = [futuro.result() for futuro in futuros]
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+        return b"".join(audios) if all(audios) else b""
+
+    def _descargar(self, tts, peticion) -> bytes:
+        """
+        Envía una petición preparada por gTTS y extrae el audio
+
+        Returns:
+            bytes: Audio MP3, o b"" si la respuesta no tiene el formato esperado
+        """
+        self.metricas.registrar_peticion()
+        try:
+            respuesta = self.session.send(peticion, timeout=self.timeout)
+            respuesta.raise_for_status()
+        except requests.exceptions.HTTPError:
+            raise gTTSError(tts=tts, response=respuesta)
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Error de red gTTS: {e}")
+            raise gTTSError(tts=tts)
+
+        audio = []
+        for linea in respuesta.iter_lines(chunk_size=1024):
+            linea = linea.decode("utf-8")
+            if "jQ1olc" not in linea:
+                continue
+            encontrado = _AUDIO_RPC.search(linea)
+            if not encontrado:
+                return b""
+            audio.append(base64.b64decode(encontrado.group(1).encode("ascii")))
+        return b"".join(audio)
+
+    def cerrar(self):
+        """Cierra las conexiones y el pool de descargas"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+
+# ============== INSTANCIA GLOBAL ==============
+_cliente_instance = None
+_cliente_lock = threading.Lock()
+
+
+def get_cliente_gtts() -> ClienteGTTS:
+    """
+    Obtiene o crea el cliente global de gTTS
+
+    Returns:
+        ClienteGTTS: Instancia compartida por todos los hilos de síntesis
+    """
+    global _cliente_instance
+
+    with _cliente_lock:
+        if _cliente_instance is None:
+            _cliente_instance = ClienteGTTS()
+
+    return _cliente_instance
@@ -0,0 +1,71 @@
+"""
+Señales Qt del motor de voz
+Puente entre los eventos del TTS y del reconocimiento (emitidos desde hilos
+worker) y la interfaz
+"""
+from PySide6.QtCore import QObject, Signal
+
+from src.main import agregar_oyente_tts, agregar_oyente_parcial_asr
+
+
+class SenalesTTS(QObject):
+    """Re-emite los eventos del TTS como señales Qt (seguras entre hilos)"""
+    iniciado = Signal(str)
+    terminado = Signal(str)
+    interrumpido = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        agregar_oyente_tts(self._reenviar)
+
+    def _reenviar(self, evento, texto):
+        senal = getattr(self, evento, None)
+        if senal is not None:
+            senal.emit(texto)
+
+
+class SenalesTranscripcion(QObject):
+    """Re-emite las transcripciones parciales del reconocimiento como señal Qt"""
+    parcial = Signal(str)
+
+    def __init__(self):
+        super().__init__()
+        agregar_oyente_parcial_asr(self._reenviar)
+
+    def _reenviar(self, id_frase, texto):
+        self.parcial.emit(texto)
+
+
+# ============== INSTANCIA GLOBAL ==============
+_senales_instance = None
+_transcripcion_instance = None
+
+
+def get_senales_tts() -> SenalesTTS:
+    """
+    Obtiene o crea el puente global de señales del TTS
+
+    Returns:
+        SenalesTTS: Instancia compartida por todas las ventanas
+    """
+    global _senales_instance
+
+    if _senales_instance is None:
+        _senales_instance = SenalesTTS()
+
+    return _senales_instance
+
+
+def get_senales_transcripcion() -> SenalesTranscripcion:
+    """
+    Obtiene o crea el puente global de transcripciones parciales
+
+    Returns:
+        SenalesTranscripcion: Instancia compartida por todas las ventanas
+    """
+    global _transcripcion_instance
+
+    if _transcripcion_instance is None:
+        _transcripcion_instance = SenalesTranscripcion()
+
+    return _transcripcion_instance
@@ -0,0 +1,465 @@
+"""
+Servicio de voz de Aura - Único camino de TTS para todos los modos
+Cola con prioridades, síntesis paralela, reproducción, interrupción y eventos.
+Todo el estado vive en la instancia del servicio (no en globales de módulo)
+"""
+import os
+import time
+import logging
+import threading
+import subprocess
+from queue import PriorityQueue
+from concurrent.futures import Future
+from pathlib import Path
+
+from config.settings import TEMP_AUDIO_FILE, get_audio_player, get_audio_stream_player
+from src.eco import get_referencia_eco
+from src.sintesis import (
+    SintesisParalela, elegir_backend, backend_offline,
+    duracion_audio, leer_wav, cabecera_wav_stream
+)
+
+logger = logging.getLogger(__name__)
+
+# Prioridades del TTS (menor = antes). Los urgentes adelantan e interrumpen
+PRIORIDAD_URGENTE = 0
+PRIORIDAD_NORMAL = 1
+
+# Resultado de cada enunciado (valor del Future que retorna hablar)
+TTS_TERMINADO = "terminado"
+TTS_INTERRUMPIDO = "interrumpido"
+TTS_DESCARTADO = "descartado"
+
+
+def _find_player_command(players=None):
+    """Encuentra un reproductor de audio disponible"""
+    if players is None:
+        players = get_audio_player()
+    if not players:
+        return None
+    if isinstance(players, list):
+        for cmd in players:
+            player_name = cmd.split()[0]
+            if os.system(f'which {player_name} > /dev/null 2>&1') == 0:
+                return cmd
+    else:
+        player_name = players.split()[0]
+        if os.system(f'which {player_name} > /dev/null 2>&1') == 0:
+            return players
+    return None
+
+
+class ServicioVoz:
+    """
+    Servicio de voz: un worker consume la cola de enunciados, sintetiza en
+    paralelo y reproduce en orden. La duración de cada clip se mide sobre el
+    audio sintetizado, de modo que el fin del enunciado es exacto incluso con
+    reproductores que retornan antes de terminar de sonar.
+    """
+
+    def __init__(self, sintesis=None, reproductor=None, lanzar_proceso=None, referencia=None):
+        """
+        Args:
+            sintesis: Planificador de síntesis (por defecto uno con gTTS)
+            reproductor: Comando fijo (comando, admite_stdin) en lugar de
+                         autodetectar el reproductor del sistema
+            lanzar_proceso: Fábrica de procesos compatible con subprocess.Popen
+            referencia: ReferenciaReproduccion donde se anota lo que suena
+                        (la usa la captura para cancelar el eco del TTS)
+        """
+        self._sintesis = sintesis
+        self.referencia = referencia or get_referencia_eco()
+        self._reproductor = reproductor
+        self._lanzar_proceso = lanzar_proceso or subprocess.Popen
+        self._cola = PriorityQueue()  # (prioridad, secuencia, turno, texto, backend, futuro)
+        self._hilo = None
+        self._proceso = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._sonando = threading.Event()
+        self._inactivo = threading.Event()  # Activo cuando no hay nada sonando ni pendiente
+        self._inactivo.set()
+        self._oyentes = []          # Callbacks (evento, texto)
+
+        self._turno = 0             # Turno de usuario actual
+        self._secuencia = 0         # Orden de llegada (desempate FIFO dentro de una prioridad)
+        self._actual = None         # (prioridad, turno, secuencia) de lo que suena ahora
+        self._ultimo = None         # (secuencia, turno, texto, futuro) del último enunciado encolado
+        self._terminado = 0         # Secuencia del último enunciado terminado o descartado
+        self._pendientes = 0        # Enunciados encolados o sonando
+        self._anunciado = False     # Ya se emitió "iniciado" para el enunciado actual
+
+        self.duracion_actual = 0.0  # Segundos de audio enviados del enunciado actual
+
+    # ============== API PÚBLICA ==============
+    @property
+    def sintesis(self):
+        """Planificador de síntesis (se crea al primer uso)"""
+        if self._sintesis is None:
+            self._sintesis = SintesisParalela()
+        return self._sintesis
+
+    def hablar(self, texto, backend=None, prioridad=PRIORIDAD_NORMAL):
+        """
+        Encola un enunciado
+
+        Los enunciados urgentes adelantan a los normales en la cola e interrumpen
+        lo que esté sonando; lo mismo hace cualquier respuesta de un turno más
+        reciente. Un enunciado idéntico al anterior del mismo turno, aún
+        pendiente, se ignora (salvo que deba interrumpir lo que suena).
+
+        Args:
+            texto: Texto a pronunciar (ya limpio)
+            backend: Motor TTS opcional para este enunciado
+            prioridad: PRIORIDAD_URGENTE o PRIORIDAD_NORMAL
+
+        Returns:
+            Future: Se resuelve con TTS_TERMINADO, TTS_INTERRUMPIDO o TTS_DESCARTADO
+        """
+        futuro = Future()
+        if not texto:
+            futuro.set_result(TTS_DESCARTADO)
+            return futuro
+        self._iniciar_worker()
+
+        with self._lock:
+            # Preempción: urgente sobre normal, o turno nuevo sobre uno viejo
+            interrumpir = bool(self._actual) and (prioridad < self._actual[0]
+                                                  or self._actual[1] < self._turno)
+
+            # Fusionar enunciados idénticos consecutivos del mismo turno (el de
+            # un turno anterior se descartaría sin sonar)
+            if (self._ultimo and self._ultimo[1] == self._turno
+                    and self._ultimo[2] == texto and self._ultimo[0] > self._terminado):
+                logger.debug(f"TTS duplicado ignorado: {texto[:40]}")
+                if interrumpir and self._actual[2] != self._ultimo[0]:
+                    self._detener_reproduccion()
+                return self._ultimo[3]
+
+            self._secuencia += 1
+            self._pendientes += 1
+            self._inactivo.clear()
+            self._ultimo = (self._secuencia, self._turno, texto, futuro)
+            self._cola.put((prioridad, self._secuencia, self._turno, texto, backend, futuro))
+
+            if interrumpir:
+                self._detener_reproduccion()
+
+        return futuro
+
+    def detener(self):
+        """Interrumpe lo que suena y espera a que el reproductor libere el audio"""
+        with self._lock:
+            proceso = self._detener_reproduccion()
+        if proceso:
+            try:
+                proceso.wait(timeout=0.5)
+            except Exception:
+                pass
+
+    def esta_hablando(self) -> bool:
+        """True mientras un enunciado está sonando"""
+        return self._sonando.is_set()
+
+    def esperar_inactivo(self, timeout=None) -> bool:
+        """
+        Bloquea hasta que no quede nada sonando ni pendiente
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            bool: True si el servicio quedó inactivo
+        """
+        return self._inactivo.wait(timeout)
+
+    def nuevo_turno(self) -> int:
+        """
+        Marca el inicio de un nuevo turno del usuario: las respuestas
+        encoladas de turnos anteriores se descartan sin pronunciarse
+
+        Returns:
+            int: Número del nuevo turno
+        """
+        with self._lock:
+            self._turno += 1
+            return self._turno
+
+    def agregar_oyente(self, callback):
+        """
+        Suscribe un callback a los eventos del servicio
+
+        Args:
+            callback: Función (evento, texto) con evento en
+                      "iniciado", "terminado" o "interrumpido".
+                      Se llama desde el hilo del worker.
+        """
+        self._oyentes.append(callback)
+
+    def quitar_oyente(self, callback):
+        """Cancela la suscripción de un callback"""
+        try:
+            self._oyentes.remove(callback)
+        except ValueError:
+            pass
+
+    # ============== WORKER ==============
+    def _iniciar_worker(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._worker, daemon=True, name="servicio-voz")
+            self._hilo.start()
+
+    def _worker(self):
+        """Consume la cola de enunciados"""
+        while True:
+            try:
+                prioridad, secuencia, turno, texto, preferido, futuro = self._cola.get()
+            except Exception:
+                break
+
+            with self._lock:
+                descartar = turno < self._turno
+                if not descartar:
+                    self._detener.clear()
+                    self._actual = (prioridad, turno, secuencia)
+                    self._anunciado = False
+                    self.duracion_actual = 0.0
+            if descartar:
+                # Respuesta de un turno anterior: ya no interesa
+                logger.debug(f"TTS descartado (turno {turno} < {self._turno}): {texto[:40]}")
+                self._finalizar(secuencia, futuro, TTS_DESCARTADO)
+                continue
+
+            resultado = TTS_TERMINADO
+            try:
+                backend = elegir_backend(texto, preferido)
+                reproducidos = self._reproducir_con_backend(texto, backend)
+
+                # Si el motor en línea no produjo nada (sin red), repetir offline
+                offline = backend_offline()
+                if (reproducidos == 0 and not self._detener.is_set()
+                        and not backend.offline and offline):
+                    logger.warning(f"{backend.nombre} no respondió, usando {offline.nombre}")
+                    self._reproducir_con_backend(texto, offline)
+            except Exception as e:
+                logger.exception(f"TTS worker error: {e}")
+            finally:
+                with self._lock:
+                    self._actual = None
+                    anunciado = self._anunciado
+                    if self._detener.is_set():
+                        resultado = TTS_INTERRUMPIDO
+                self._sonando.clear()
+                if anunciado:
+                    logger.debug(f"TTS {resultado}: {self.duracion_actual:.2f}s de audio")
+                    self._emitir(resultado, texto)
+                self._finalizar(secuencia, futuro, resultado)
+
+    def _finalizar(self, secuencia, futuro, resultado):
+        """Resuelve el Future del enunciado y actualiza el estado de inactividad"""
+        with self._lock:
+            self._terminado = max(self._terminado, secuencia)
+            self._pendientes = max(0, self._pendientes - 1)
+            if self._pendientes == 0:
+                self._inactivo.set()
+        if not futuro.done():
+            futuro.set_result(resultado)
+
+    def _emitir(self, evento, texto):
+        """Notifica un evento a todos los oyentes"""
+        for callback in list(self._oyentes):
+            try:
+                callback(evento, texto)
+            except Exception as e:
+                logger.error(f"Error en oyente TTS ({evento}): {e}")
+
+    # ============== REPRODUCCIÓN ==============
+    def _detener_reproduccion(self):
+        """
+        Detiene lo que suena ahora (requiere tener self._lock)
+
+        Returns:
+            subprocess.Popen: Proceso detenido, o None
+        """
+        self._detener.set()
+        proceso = self._proceso
+        try:
+            if proceso and proceso.poll() is None:
+                proceso.terminate()
+        except Exception:
+            pass
+        self._proceso = None
+        self._sonando.clear()
+        self.referencia.cortar()
+        return proceso
+
+    def _lanzar_reproductor(self, cmd, texto, stdin=None):
+        """
+        Lanza el reproductor y marca el servicio como sonando
+
+        Returns:
+            subprocess.Popen: Proceso lanzado, o None si se detuvo o falló
+        """
+        with self._lock:
+            if self._detener.is_set():
+                return None
+            try:
+                self._proceso = self._lanzar_proceso(cmd, stdin=stdin)
+            except Exception as e:
+                logger.error(f"Error launching player: {e}")
+                self._proceso = None
+                return None
+            self._sonando.set()
+            proceso = self._proceso
+            anunciar = not self._anunciado
+            self._anunciado = True
+
+        if anunciar:
+            self._emitir("iniciado", texto)
+        return proceso
+
+    def _esperar_reproductor(self, proceso, inicio, duracion):
+        """
+        Bloquea hasta que el clip termina de sonar: primero el proceso y,
+        si el reproductor retornó antes (p. ej. 'start' en Windows), el resto
+        de la duración medida del audio
+        """
+        try:
+            proceso.wait()
+        except Exception:
+            pass
+        with self._lock:
+            if self._proceso is proceso:
+                self._proceso = None
+
+        restante = duracion - (time.monotonic() - inicio)
+        if restante > 0.05:
+            self._detener.wait(restante)
+
+    def _reproducir_con_backend(self, texto, backend):
+        """
+        Sintetiza y reproduce el texto con el motor indicado
+
+        Returns:
+            int: Número de segmentos reproducidos
+        """
+        if self._reproductor:
+            comando, admite_stdin = self._reproductor
+            if admite_stdin:
+                return self._reproducir_stream(texto, comando, backend)
+            return self._reproducir_por_segmentos(texto, comando, backend)
+
+        stream_players = get_audio_stream_player(backend.formato)
+        stream_cmd = _find_player_command(stream_players) if stream_players else None
+        if stream_cmd:
+            return self._reproducir_stream(texto, stream_cmd, backend)
+
+        player_cmd = _find_player_command(get_audio_player(backend.formato))
+        if player_cmd is None:
+            logger.error("No audio player found")
+            return 0
+        return self._reproducir_por_segmentos(texto, player_cmd, backend)
+
+    def _reproducir_stream(self, texto, player_cmd, backend):
+        """
+        Reproduce los segmentos en orden por el stdin de un único reproductor,
+        sin huecos entre oraciones
+
+        Returns:
+            int: Número de segmentos reproducidos
+        """
+        proceso = None
+        inicio = 0.0
+        reproducidos = 0
+        for audio in self.sintesis.sintetizar(texto, self._detener, backend):
+            segmento = audio
+            duracion = duracion_audio(audio, backend.formato)
+            if backend.formato == "wav":
+                # Una sola cabecera de longitud indefinida y el PCM de cada segmento
+                canales, ancho, frecuencia, pcm = leer_wav(audio)
+                audio = pcm if proceso else cabecera_wav_stream(canales, ancho, frecuencia) + pcm
+            if proceso is None:
+                proceso = self._lanzar_reproductor(player_cmd.split(), texto, stdin=subprocess.PIPE)
+                if proceso is None:
+                    return reproducidos
+                inicio = time.monotonic()
+            try:
+                proceso.stdin.write(audio)
+                proceso.stdin.flush()
+                reproducidos += 1
+            except (BrokenPipeError, OSError, ValueError):
+                # El reproductor se cerró (detener)
+                break
+            # Suena a continuación de lo ya enviado (o ahora, si hubo un hueco)
+            self._anotar_referencia(max(inicio + self.duracion_actual, time.monotonic()),
+                                    segmento, backend.formato)
+            self.duracion_actual += duracion
+
+        if proceso is None:
+            return reproducidos
+        try:
+            proceso.stdin.close()
+        except Exception:
+            pass
+        self._esperar_reproductor(proceso, inicio, self.duracion_actual)
+        return reproducidos
+
+    def _anotar_referencia(self, instante, audio, formato):
+        """Anota en la referencia de eco un segmento que empieza a sonar"""
+        duracion = duracion_audio(audio, formato)
+        if formato == "wav":
+            canales, ancho, frecuencia, pcm = leer_wav(audio)
+            self.referencia.registrar(instante, duracion, pcm, frecuencia, ancho, canales)
+        else:
+            self.referencia.registrar(instante, duracion)
+
+    def _reproducir_por_segmentos(self, texto, player_cmd, backend):
+        """
+        Reproduce cada segmento con un proceso propio (reproductores sin stdin);
+        los siguientes se siguen sintetizando mientras suena el actual
+
+        Returns:
+            int: Número de segmentos reproducidos
+        """
+        tmp = Path(TEMP_AUDIO_FILE).with_suffix(f".{backend.formato}")
+        reproducidos = 0
+        try:
+            for audio in self.sintesis.sintetizar(texto, self._detener, backend):
+                duracion = duracion_audio(audio, backend.formato)
+                self.duracion_actual += duracion
+                tmp.write_bytes(audio)
+                proceso = self._lanzar_reproductor(player_cmd.split() + [str(tmp)], texto)
+                if proceso is None:
+                    break
+                reproducidos += 1
+                inicio = time.monotonic()
+                self._anotar_referencia(inicio, audio, backend.formato)
+                self._esperar_reproductor(proceso, inicio, duracion)
+                if self._detener.is_set():
+                    break
+        finally:
+            try:
+                tmp.unlink()
+            except Exception:
+                pass
+        return reproducidos
+
+
+# ============== INSTANCIA GLOBAL ==============
+# Servicio singleton para todos los modos (terminal, ventana, widget flotante)
+_servicio_instance = None
+
+
+def get_servicio_voz() -> ServicioVoz:
+    """
+    Obtiene o crea la instancia global del servicio de voz
+
+    Returns:
+        ServicioVoz: Instancia del servicio
+    """
+    global _servicio_instance
+
+    if _servicio_instance is None:
+        _servicio_instance = ServicioVoz()
+
+    return _servicio_instance
@@ -0,0 +1,509 @@
+"""
+Síntesis de voz - Motores TTS, segmentación y síntesis paralela
+Divide el texto en oraciones, las sintetiza en un pool de hilos acotado
+y las entrega EN ORDEN para que la reproducción empiece con el primer segmento.
+Motores: gTTS (en línea) y espeak-ng / Piper (offline, CPU)
+"""
+import re
+import json
+import time
+import wave
+import shutil
+import struct
+import logging
+import threading
+import subprocess
+from io import BytesIO
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import (
+    TTS_LANG, TTS_SYNTH_WORKERS, TTS_SEGMENT_MAX_CHARS,
+    TTS_BACKEND, TTS_OFFLINE_MAX_CHARS, TTS_GTTS_MAX_LATENCY,
+    ESPEAK_VOICE, PIPER_MODEL
+)
+from src.red_tts import get_cliente_gtts
+
+logger = logging.getLogger(__name__)
+
+# Fin de oración: se corta DESPUÉS de la puntuación
+_FIN_ORACION = re.compile(r'(?<=[.!?…;:])\s+')
+# Cortes secundarios para oraciones demasiado largas
+_FIN_CLAUSULA = re.compile(r'(?<=[,)])\s+')
+
+# Oraciones más cortas que esto se unen con la siguiente
+MIN_SEGMENT_CHARS = 20
+
+
+def _partir_largo(fragmento, max_chars):
+    """
+    Parte un fragmento que excede max_chars por comas y, si no basta, por espacios
+
+    Args:
+        fragmento: Texto a partir
+        max_chars: Longitud máxima de cada parte
+
+    Returns:
+        list: Partes de como máximo max_chars (salvo palabras más largas)
+    """
+    if len(fragmento) <= max_chars:
+        return [fragmento]
+
+    partes = []
+    for clausula in _FIN_CLAUSULA.split(fragmento):
+        if len(clausula) <= max_chars:
+            partes.append(clausula)
+            continue
+
+        actual = ""
+        for palabra in clausula.split():
+            if actual and len(actual) + 1 + len(palabra) > max_chars:
+                partes.append(actual)
+                actual = palabra
+            else:
+                actual = f"{actual} {palabra}" if actual else palabra
+        if actual:
+            partes.append(actual)
+
+    return _unir_cortos(partes, max_chars)
+
+
+def _unir_cortos(partes, max_chars):
+    """Une fragmentos cortos con el siguiente mientras no se pase de max_chars"""
+    segmentos = []
+    for parte in partes:
+        if (segmentos and len(segmentos[-1]) < MIN_SEGMENT_CHARS
+                and len(segmentos[-1]) + 1 + len(parte) <= max_chars):
+            segmentos[-1] = f"{segmentos[-1]} {parte}"
+        else:
+            segmentos.append(parte)
+    return segmentos
+
+
+def segmentar_texto(texto, max_chars=TTS_SEGMENT_MAX_CHARS):
+    """
+    Divide el texto en segmentos por límites de oración
+
+    Args:
+        texto: Texto a pronunciar
+        max_chars: Longitud máxima de cada segmento
+
+    Returns:
+        list: Segmentos en orden de lectura
+    """
+    texto = re.sub(r'\s+', ' ', texto or "").strip()
+    if not texto:
+        return []
+
+    partes = []
+    for oracion in _FIN_ORACION.split(texto):
+        oracion = oracion.strip()
+        if oracion:
+            partes.extend(_partir_largo(oracion, max_chars))
+
+    return _unir_cortos(partes, max_chars)
+
+
+# ============== UTILIDADES DE AUDIO ==============
+# Tablas MPEG Layer III (kbps y Hz) para medir la duración de un MP3
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+
+
+def leer_wav(datos):
+    """
+    Extrae los parámetros y el PCM de un WAV (tolera cabeceras de streaming
+    con tamaños incorrectos, como las de espeak-ng --stdout)
+
+    Args:
+        datos: Bytes del archivo WAV
+
+    Returns:
+        tuple: (canales, ancho_muestra, frecuencia, pcm)
+    """
+    if len(datos) < 12 or datos[:4] != b"RIFF" or datos[8:12] != b"WAVE":
+        raise ValueError("No es un archivo WAV")
+
+    formato = None
+    pos = 12
+    while pos + 8 <= len(datos):
+        chunk_id = datos[pos:pos + 4]
+        chunk_size = struct.unpack("<I", datos[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt ":
+            _, canales, frecuencia, _, _, bits = struct.unpack("<HHIIHH", datos[pos + 8:pos + 24])
+            formato = (canales, bits // 8, frecuencia)
+        elif chunk_id == b"data":
+            if formato is None:
+                break
+            return (*formato, datos[pos + 8:pos + 8 + chunk_size])
+        pos += 8 + chunk_size + (chunk_size & 1)
+
+    raise ValueError("WAV sin bloque fmt/data")
+
+
+def wav_desde_pcm(pcm, frecuencia, canales=1, ancho_muestra=2):
+    """Envuelve PCM crudo en un archivo WAV"""
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(canales)
+        wav.setsampwidth(ancho_muestra)
+        wav.setframerate(frecuencia)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def cabecera_wav_stream(canales, ancho_muestra, frecuencia):
+    """
+    Cabecera WAV de longitud indefinida: permite enviar el PCM de varios
+    segmentos seguidos a un mismo reproductor
+    """
+    tasa_bytes = frecuencia * canales * ancho_muestra
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, canales, frecuencia,
+                                tasa_bytes, canales * ancho_muestra, ancho_muestra * 8)
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+def _duracion_mp3(datos):
+    """Suma la duración de los frames MPEG Layer III"""
+    pos = 0
+    # Saltar etiqueta ID3v2
+    if datos[:3] == b"ID3" and len(datos) >= 10:
+        tam = datos[6:10]
+        pos = 10 + ((tam[0] << 21) | (tam[1] << 14) | (tam[2] << 7) | tam[3])
+
+    duracion = 0.0
+    while pos + 4 <= len(datos):
+        cabecera = struct.unpack(">I", datos[pos:pos + 4])[0]
+        version_bits = (cabecera >> 19) & 0x3
+        capa = (cabecera >> 17) & 0x3
+        bitrate_idx = (cabecera >> 12) & 0xF
+        rate_idx = (cabecera >> 10) & 0x3
+
+        if ((cabecera >> 21) & 0x7FF) != 0x7FF or version_bits == 1 or capa != 1 \
+                or bitrate_idx in (0, 15) or rate_idx == 3:
+            pos += 1  # Re-sincronizar
+            continue
+
+        version = {3: 1, 2: 2, 0: 25}[version_bits]
+        bitrate = _MP3_BITRATES[1 if version == 1 else 2][bitrate_idx] * 1000
+        frecuencia = _MP3_SAMPLE_RATES[version][rate_idx]
+        relleno = (cabecera >> 9) & 0x1
+        muestras = 1152 if version == 1 else 576
+
+        duracion += muestras / frecuencia
+        pos += (muestras // 8) * bitrate // frecuencia + relleno
+
+    return duracion
+
+
+def duracion_audio(datos, formato):
+    """
+    Calcula la duración exacta de un clip de audio
+
+    Args:
+        datos: Bytes del clip
+        formato: "mp3" o "wav"
+
+    Returns:
+        float: Duración en segundos
+    """
+    if not datos:
+        return 0.0
+    if formato == "wav":
+        canales, ancho, frecuencia, pcm = leer_wav(datos)
+        return len(pcm) / float(canales * ancho * frecuencia)
+    return _duracion_mp3(datos)
+
+
+# ============== MOTORES TTS ==============
+class BackendTTS:
+    """Interfaz base de los motores de síntesis"""
+    nombre = "base"
+    formato = "mp3"
+    offline = False
+
+    def disponible(self) -> bool:
+        """Indica si el motor puede usarse en este sistema"""
+        return False
+
+    def sintetizar(self, texto) -> bytes:
+        """
+        Sintetiza un segmento
+
+        Args:
+            texto: Segmento a sintetizar
+
+        Returns:
+            bytes: Audio en el formato del motor
+        """
+        raise NotImplementedError
+
+
+class GTTSBackend(BackendTTS):
+    """gTTS (Google Translate): buena calidad, requiere red"""
+    nombre = "gtts"
+    formato = "mp3"
+
+    # Tras un fallo, se prefiere el motor offline durante este tiempo
+    ENFRIAMIENTO_FALLO = 60.0
+
+    def __init__(self):
+        self.latencia_media = None
+        self._ultimo_fallo = None
+        self._lock = threading.Lock()
+
+    def disponible(self) -> bool:
+        return True
+
+    def sintetizar(self, texto) -> bytes:
+        inicio = time.perf_counter()
+        try:
+            audio = get_cliente_gtts().sintetizar(texto, TTS_LANG)
+        except Exception:
+            with self._lock:
+                self._ultimo_fallo = time.monotonic()
+            raise
+        self._registrar_latencia(time.perf_counter() - inicio)
+        return audio
+
+    def _registrar_latencia(self, segundos):
+        """Media móvil exponencial de la latencia por petición"""
+        with self._lock:
+            if self.latencia_media is None:
+                self.latencia_media = segundos
+            else:
+                self.latencia_media = 0.7 * self.latencia_media + 0.3 * segundos
+
+    def degradado(self) -> bool:
+        """True si gTTS falló hace poco o su latencia supera TTS_GTTS_MAX_LATENCY"""
+        with self._lock:
+            if self._ultimo_fallo is not None and \
+                    time.monotonic() - self._ultimo_fallo < self.ENFRIAMIENTO_FALLO:
+                return True
+            return self.latencia_media is not None and self.latencia_media > TTS_GTTS_MAX_LATENCY
+
+
+class EspeakBackend(BackendTTS):
+    """espeak-ng: síntesis por formantes en CPU, instantánea y sin red"""
+    nombre = "espeak"
+    formato = "wav"
+    offline = True
+
+    def __init__(self, voz=ESPEAK_VOICE):
+        self.voz = voz
+        self.ejecutable = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def disponible(self) -> bool:
+        return self.ejecutable is not None
+
+    def sintetizar(self, texto) -> bytes:
+        resultado = subprocess.run(
+            [self.ejecutable, "-v", self.voz, "--stdout", texto],
+            capture_output=True, check=True, timeout=30
+        )
+        return resultado.stdout
+
+
+class PiperBackend(BackendTTS):
+    """Piper: TTS neuronal en CPU (requiere PIPER_MODEL con un modelo .onnx)"""
+    nombre = "piper"
+    formato = "wav"
+    offline = True
+
+    def __init__(self, modelo=PIPER_MODEL):
+        self.modelo = modelo
+        self.ejecutable = shutil.which("piper")
+        self.frecuencia = 22050
+        config = Path(f"{modelo}.json")
+        if modelo and config.exists():
+            try:
+                self.frecuencia = json.loads(config.read_text())["audio"]["sample_rate"]
+            except Exception as e:
+                logger.debug(f"No se pudo leer la configuración de Piper: {e}")
+
+    def disponible(self) -> bool:
+        return bool(self.ejecutable and self.modelo and Path(self.modelo).exists())
+
+    def sintetizar(self, texto) -> bytes:
+        resultado = subprocess.run(
+            [self.ejecutable, "--model", self.modelo, "--output_raw"],
+            input=texto.encode("utf-8"), capture_output=True, check=True, timeout=30
+        )
+        return wav_desde_pcm(resultado.stdout, self.frecuencia)
+
+
+BACKENDS = {
+    "gtts": GTTSBackend(),
+    "piper": PiperBackend(),
+    "espeak": EspeakBackend(),
+}
+
+
+def get_backend(nombre):
+    """
+    Obtiene un motor por nombre
+
+    Returns:
+        BackendTTS: Motor, o None si no existe o no está disponible
+    """
+    backend = BACKENDS.get(nombre)
+    if backend and backend.disponible():
+        return backend
+    return None
+
+
+def backend_offline():
+    """Retorna el mejor motor offline disponible (Piper antes que espeak-ng)"""
+    for backend in BACKENDS.values():
+        if backend.offline and backend.disponible():
+            return backend
+    return None
+
+
+def backends_disponibles():
+    """Lista los motores utilizables en este sistema"""
+    return [backend for backend in BACKENDS.values() if backend.disponible()]
+
+
+def elegir_backend(texto, preferido=None):
+    """
+    Política de selección de motor por enunciado
+
+    - Un motor pedido explícitamente (argumento o TTS_BACKEND) se respeta
+      si está disponible.
+    - En modo "auto": offline para acuses cortos (<= TTS_OFFLINE_MAX_CHARS)
+      o cuando gTTS está degradado (lento o fallando); gTTS para el resto.
+
+    Args:
+        texto: Texto a pronunciar
+        preferido: Nombre de motor opcional ("gtts", "espeak", "piper", "offline")
+                   o una instancia de BackendTTS, que se usa tal cual
+
+    Returns:
+        BackendTTS: Motor elegido
+    """
+    if isinstance(preferido, BackendTTS):
+        return preferido
+
+    gtts = BACKENDS["gtts"]
+    offline = backend_offline()
+    politica = preferido or TTS_BACKEND
+
+    if politica == "offline":
+        return offline or gtts
+    if politica != "auto":
+        return get_backend(politica) or gtts
+
+    if offline and (len(texto) <= TTS_OFFLINE_MAX_CHARS or gtts.degradado()):
+        return offline
+    return gtts
+
+
+# ============== SÍNTESIS PARALELA ==============
+class SintesisParalela:
+    """
+    Planificador de síntesis: sintetiza los segmentos de un texto en paralelo
+    y los entrega en orden (buffer de reordenamiento)
+    """
+
+    def __init__(self, backend=None, max_workers=TTS_SYNTH_WORKERS):
+        """
+        Args:
+            backend: Motor por defecto (gTTS si no se indica)
+            max_workers: Tamaño máximo del pool de síntesis
+        """
+        self.backend = backend or BACKENDS["gtts"]
+        self.max_workers = max(1, int(max_workers))
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="tts-sintesis"
+        )
+
+    def sintetizar(self, texto, cancelado: threading.Event = None, backend=None):
+        """
+        Sintetiza el texto por segmentos en paralelo
+
+        Todos los segmentos se envían al pool de inmediato; el generador
+        entrega cada uno en cuanto él y todos los anteriores están listos,
+        así la reproducción empieza apenas termina el primero.
+
+        Args:
+            texto: Texto a pronunciar
+            cancelado: Evento opcional; si se activa se descartan los pendientes
+            backend: Motor para este enunciado (por defecto el del planificador)
+
+        Yields:
+            bytes: Audio de cada segmento, en orden
+        """
+        backend = backend or self.backend
+        segmentos = segmentar_texto(texto)
+        futuros = [self._pool.submit(backend.sintetizar, s) for s in segmentos]
+        try:
+            for indice, futuro in enumerate(futuros):
+                if cancelado is not None and cancelado.is_set():
+                    return
+                try:
+                    audio = futuro.result()
+                except Exception as e:
+                    logger.error(f"Error sintetizando segmento {indice + 1}/{len(futuros)} "
+                                 f"con {backend.nombre}: {e}")
+                    continue
+                if audio:
+                    yield audio
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+    def cerrar(self):
+        """Libera el pool de síntesis"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def medir_factor_tiempo_real(backend, texto):
+    """
+    Mide el factor de tiempo real (RTF) de un motor: tiempo de síntesis / duración del audio
+
+    Args:
+        backend: Motor a medir
+        texto: Texto de prueba
+
+    Returns:
+        tuple: (rtf, segundos_sintesis, segundos_audio)
+    """
+    inicio = time.perf_counter()
+    audio = backend.sintetizar(texto)
+    segundos_sintesis = time.perf_counter() - inicio
+    segundos_audio = duracion_audio(audio, backend.formato)
+    rtf = segundos_sintesis / segundos_audio if segundos_audio > 0 else float("inf")
+    return rtf, segundos_sintesis, segundos_audio
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    ejemplo = (
+        "Python es un lenguaje de programación de alto nivel. "
+        "Fue creado por Guido van Rossum y lanzado en 1991, con una filosofía "
+        "que enfatiza la legibilidad del código, el uso de sangría significativa "
+        "y una sintaxis que permite expresar conceptos en pocas líneas. Sí. "
+        "Es multiparadigma."
+    )
+
+    print("=" * 60)
+    print("🔊 TEST DE SEGMENTACIÓN")
+    print("=" * 60)
+    for i, segmento in enumerate(segmentar_texto(ejemplo), 1):
+        print(f"   {i}. ({len(segmento):3d}) {segmento}")
+
+    print("\n🎛️  Motores disponibles:")
+    for backend in backends_disponibles():
+        print(f"   • {backend.nombre} ({backend.formato}{', offline' if backend.offline else ''})")
@@ -0,0 +1,232 @@
+"""
+Subida de audio a la nube - Frases más livianas para Google
+SpeechRecognition sube la frase tal como la capturó el micrófono (44.1 o
+48 kHz, con el pre-roll y el hangover del VAD). Antes de enviarla se
+recorta el silencio de los extremos, se mezcla a mono y se remuestrea a
+UPLOAD_SAMPLE_RATE (16 kHz, lo que usa el reconocedor), todo en NumPy.
+El FLAC resultante se codifica una sola vez y se anotan los bytes
+ahorrados frente a lo que se habría subido sin esta etapa.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import speech_recognition as sr
+
+from config.settings import UPLOAD_SAMPLE_RATE, UPLOAD_TRIM_MARGIN_MS, ENERGY_RATIO
+
+from src.vad import pcm_a_float, float_a_pcm
+
+logger = logging.getLogger(__name__)
+
+MARCO_RECORTE_MS = 10  # resolución del recorte de silencio
+PICO_MINIMO = 0.05     # fracción del pico de la frase que cuenta como voz
+
+# Medir lo que se habría subido sin preparar la frase cuesta una segunda
+# codificación FLAC: se hace fuera del camino del reconocimiento
+_pool_medicion = ThreadPoolExecutor(max_workers=1, thread_name_prefix="subida")
+
+
+# ============== PROCESAMIENTO ==============
+def mezclar_mono(x, canales=1) -> np.ndarray:
+    """
+    Promedia los canales de un audio intercalado
+
+    Args:
+        x: Muestras float (intercaladas si hay varios canales)
+        canales: Número de canales
+
+    Returns:
+        np.ndarray: Muestras mono
+    """
+    if canales <= 1:
+        return x
+    n = len(x) // canales
+    return x[:n * canales].reshape(n, canales).mean(axis=1)
+
+
+def remuestrear(x, origen, destino) -> np.ndarray:
+    """
+    Cambia la frecuencia de muestreo en el dominio de la frecuencia
+
+    Truncar el espectro por encima de la nueva frecuencia de Nyquist es a
+    la vez el filtro anti-aliasing; para una frase de pocos segundos una
+    sola FFT es más barata que un filtro polifásico en Python.
+
+    Args:
+        x: Muestras mono en float
+        origen: Frecuencia de muestreo de x
+        destino: Frecuencia de muestreo deseada
+
+    Returns:
+        np.ndarray: Muestras a la frecuencia destino
+    """
+    if origen == destino or len(x) == 0:
+        return x
+    m = max(1, int(round(len(x) * destino / origen)))
+    espectro = np.fft.rfft(x)
+    bins = m // 2 + 1
+    if bins <= len(espectro):
+        espectro = espectro[:bins]
+    else:
+        espectro = np.concatenate([espectro, np.zeros(bins - len(espectro), dtype=espectro.dtype)])
+    return np.fft.irfft(espectro, n=m) * (m / len(x))
+
+
+def limites_voz(x, frecuencia, margen_ms=UPLOAD_TRIM_MARGIN_MS):
+    """
+    Región de la frase que contiene voz, con margen a cada lado
+
+    El umbral sale de la propia frase: ENERGY_RATIO veces sus marcos más
+    silenciosos, pero nunca por debajo de una fracción del pico (en una
+    frase sin silencio alrededor no se recorta nada).
+
+    Args:
+        x: Muestras mono en float
+        frecuencia: Frecuencia de muestreo
+        margen_ms: Audio que se conserva antes y después de la voz
+
+    Returns:
+        tuple: (inicio, fin) en muestras
+    """
+    n = max(1, int(frecuencia * MARCO_RECORTE_MS / 1000))
+    n_marcos = len(x) // n
+    if n_marcos < 3:
+        return 0, len(x)
+    marcos = x[:n_marcos * n].reshape(n_marcos, n)
+    rms = np.sqrt(np.mean(marcos * marcos, axis=1))
+    umbral = max(np.percentile(rms, 10) * ENERGY_RATIO, rms.max() * PICO_MINIMO)
+    voz = np.flatnonzero(rms > umbral)
+    if len(voz) == 0:
+        return 0, len(x)
+    margen = int(frecuencia * margen_ms / 1000)
+    inicio = max(0, voz[0] * n - margen)
+    fin = min(len(x), (voz[-1] + 1) * n + margen)
+    return inicio, fin
+
+
+# ============== AUDIO PARA SUBIR ==============
+class AudioSubida(sr.AudioData):
+    """sr.AudioData que codifica su FLAC una sola vez (y recuerda el tamaño)"""
+
+    def __init__(self, frame_data, sample_rate, sample_width, original=None):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.original = original  # sr.AudioData sin preparar (para medir el ahorro)
+        self._flac = {}
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        clave = (convert_rate, convert_width)
+        if clave not in self._flac:
+            self._flac[clave] = super().get_flac_data(convert_rate, convert_width)
+        return self._flac[clave]
+
+    def flac(self) -> bytes:
+        """El FLAC tal como lo sube recognize_google (16 bits, sin cambiar la frecuencia)"""
+        return self.get_flac_data(convert_rate=_frecuencia_google(self.sample_rate), convert_width=2)
+
+
+def _frecuencia_google(frecuencia):
+    """La conversión que aplica recognize_google antes de codificar"""
+    return None if frecuencia >= 8000 else 8000
+
+
+def preparar_para_subida(frase, canales=1, frecuencia=UPLOAD_SAMPLE_RATE) -> AudioSubida:
+    """
+    Recorta, mezcla a mono y remuestrea una frase antes de subirla
+
+    Args:
+        frase: Frase de src.captura
+        canales: Canales del audio capturado (intercalados)
+        frecuencia: Frecuencia de muestreo de la subida
+
+    Returns:
+        AudioSubida: Audio listo para recognize_google (FLAC ya codificado)
+    """
+    original = frase.audio_data()
+    x = mezclar_mono(pcm_a_float(frase.audio, frase.ancho_muestra), canales)
+    # El margen se mide en la frecuencia original: recortar antes de remuestrear ahorra FFT
+    inicio, fin = limites_voz(x, frase.frecuencia)
+    x = x[inicio:fin]
+    destino = min(frecuencia, frase.frecuencia)
+    x = remuestrear(x, frase.frecuencia, destino)
+    escala = 2.0 ** (8 * (2 - frase.ancho_muestra))  # a 16 bits, como exige Google
+    audio = AudioSubida(float_a_pcm(x * escala, 2), destino, 2, original=original)
+    audio.flac()
+    return audio
+
+
+# ============== ESTADÍSTICAS ==============
+class EstadisticasSubida:
+    """Bytes subidos frente a los que se habrían subido sin preparar las frases"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        self.bytes_originales = 0
+        self.bytes_subidos = 0
+
+    def registrar(self, audio):
+        """
+        Anota una subida; el tamaño original se mide en segundo plano
+
+        Args:
+            audio: AudioSubida enviado al reconocedor
+        """
+        subidos = len(audio.flac())
+        if audio.original is None:
+            return
+        futuro = _pool_medicion.submit(
+            audio.original.get_flac_data,
+            convert_rate=_frecuencia_google(audio.original.sample_rate), convert_width=2
+        )
+        futuro.add_done_callback(
+            lambda f: self._anotar(subidos, len(f.result()) if f.exception() is None else None)
+        )
+
+    def _anotar(self, subidos, originales):
+        if originales is None:
+            return
+        with self._lock:
+            self.peticiones += 1
+            self.bytes_originales += originales
+            self.bytes_subidos += subidos
+        logger.info(
+            f"Subida: {subidos} bytes en lugar de {originales} "
+            f"({originales - subidos} ahorrados, {self.ahorro():.0%} acumulado)"
+        )
+
+    def ahorro(self) -> float:
+        """Fracción de bytes ahorrados en total"""
+        with self._lock:
+            if self.bytes_originales == 0:
+                return 0.0
+            return 1 - self.bytes_subidos / self.bytes_originales
+
+    def resumen(self) -> dict:
+        with self._lock:
+            return {
+                "peticiones": self.peticiones,
+                "bytes_originales": self.bytes_originales,
+                "bytes_subidos": self.bytes_subidos,
+                "bytes_ahorrados": self.bytes_originales - self.bytes_subidos,
+            }
+
+
+# ============== INSTANCIA GLOBAL ==============
+_estadisticas_instance = None
+
+
+def get_estadisticas_subida() -> EstadisticasSubida:
+    """
+    Obtiene o crea las estadísticas globales de subida
+
+    Returns:
+        EstadisticasSubida: Acumulado de la sesión
+    """
+    global _estadisticas_instance
+
+    if _estadisticas_instance is None:
+        _estadisticas_instance = EstadisticasSubida()
+
+    return _estadisticas_instance
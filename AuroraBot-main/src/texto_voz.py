@@ -0,0 +1,183 @@
+"""
+Texto para voz - Etapa de render entre procesar_comando y hablar
+Quita lo que no se puede (o no vale la pena) pronunciar: URLs, citas de
+fuente, bloques de código, tablas y markdown; deja frases cortas en su lugar
+y limita la longitud de cada enunciado. El texto completo sigue en el chat.
+"""
+import re
+import logging
+from urllib.parse import urlparse
+
+from config.settings import TTS_MAX_CHARS_ENUNCIADO
+
+logger = logging.getLogger(__name__)
+
+# Frases que reemplazan al contenido omitido
+AVISO_CODIGO = "Te dejé el código en el chat."
+AVISO_TABLA = "Te dejé una tabla en el chat."
+AVISO_RECORTE = "El resto está en el chat."
+
+# Paréntesis más largos que esto son aclaraciones que se omiten al hablar
+PARENTESIS_MAX_CHARS = 40
+# Código en línea más largo que esto se reemplaza
+CODIGO_LINEA_MAX_CHARS = 30
+
+_BLOQUE_CODIGO = re.compile(r'```.*?(?:```|$)', re.DOTALL)
+_TABLA = re.compile(r'(?:^[ \t]*\|.*\|[ \t]*(?:\n|$))+', re.MULTILINE)
+_CITA_FUENTE = re.compile(r'\(\s*fuentes?\s*:[^)]*\)|^[ \t]*fuentes?\s*:.*$', re.IGNORECASE | re.MULTILINE)
+_IMAGEN = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+_ENLACE_MD = re.compile(r'\[([^\]]+)\]\([^)]*\)')
+_URL = re.compile(r'(?:https?://|www\.)[^\s<>()\[\]]+', re.IGNORECASE)
+_CODIGO_LINEA = re.compile(r'`([^`\n]+)`')
+_ENCABEZADO = re.compile(r'^[ \t]*#{1,6}[ \t]*', re.MULTILINE)
+_VINETA = re.compile(r'^[ \t]*(?:[-*+•]|\d+[.)])[ \t]+', re.MULTILINE)
+_REGLA = re.compile(r'^[ \t]*(?:[-*_][ \t]*){3,}$', re.MULTILINE)
+_PARENTESIS = re.compile(r'(\s*)\(([^()]*)\)')
+_ENFASIS = [
+    (re.compile(r'\*\*(.+?)\*\*'), r'\1'),
+    (re.compile(r'__(.+?)__'), r'\1'),
+    (re.compile(r'(?<!\w)\*(?!\s)(.+?)(?<!\s)\*'), r'\1'),
+    (re.compile(r'(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)'), r'\1'),
+    (re.compile(r'~~(.+?)~~'), r'\1'),
+]
+_EMOJI = re.compile("["
+    u"\U0001F600-\U0001F64F"
+    u"\U0001F300-\U0001F5FF"
+    u"\U0001F680-\U0001F6FF"
+    u"\U0001F1E0-\U0001F1FF"
+    u"\U0001F900-\U0001F9FF"
+    u"\U00002702-\U000027B0"
+    u"\U00002600-\U000026FF"
+    "]+", flags=re.UNICODE)
+_FIN_ORACION = re.compile(r'(?<=[.!?…])\s+')
+_PUNTUACION_FINAL = ".!?…:;,"
+
+
+def _dominio(url):
+    """Dominio legible de una URL ('es.wikipedia.org')"""
+    if not url.lower().startswith("http"):
+        url = "http://" + url
+    dominio = urlparse(url).netloc.lower()
+    return dominio[4:] if dominio.startswith("www.") else dominio
+
+
+def _reemplazar_url(match):
+    dominio = _dominio(match.group(0).rstrip(".,;:!?"))
+    return f"un enlace de {dominio}" if dominio else "un enlace"
+
+
+def _reemplazar_parentesis(match):
+    contenido = match.group(2).strip()
+    if not contenido or len(contenido) > PARENTESIS_MAX_CHARS:
+        return ""
+    return f"{match.group(1)}({contenido})"
+
+
+def _lineas_a_oraciones(texto):
+    """Cada línea (título, viñeta, párrafo) se pronuncia como una oración"""
+    oraciones = []
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        if linea[-1] not in _PUNTUACION_FINAL:
+            linea += "."
+        oraciones.append(linea)
+    return " ".join(oraciones)
+
+
+def aplicar_presupuesto(texto, max_chars=TTS_MAX_CHARS_ENUNCIADO):
+    """
+    Recorta el texto a oraciones completas dentro del presupuesto
+
+    Si la primera oración ya excede el presupuesto se corta en la última
+    palabra que entra. Cuando se recorta se agrega AVISO_RECORTE.
+
+    Args:
+        texto: Texto ya limpio
+        max_chars: Caracteres máximos a pronunciar (0 = sin límite)
+
+    Returns:
+        str: Texto dentro del presupuesto
+    """
+    if not max_chars or len(texto) <= max_chars:
+        return texto
+
+    # El aviso final también cuenta dentro del presupuesto
+    disponible = max(1, max_chars - len(AVISO_RECORTE) - 1)
+    recortado = ""
+    for oracion in _FIN_ORACION.split(texto):
+        candidato = f"{recortado} {oracion}".strip()
+        if len(candidato) > disponible:
+            break
+        recortado = candidato
+
+    if not recortado:
+        recortado = texto[:disponible].rsplit(" ", 1)[0].rstrip(_PUNTUACION_FINAL) + "."
+
+    logger.debug(f"Enunciado recortado de {len(texto)} a {len(recortado)} caracteres")
+    return f"{recortado} {AVISO_RECORTE}"
+
+
+def preparar_para_voz(texto, max_chars=TTS_MAX_CHARS_ENUNCIADO):
+    """
+    Convierte una respuesta (markdown, URLs, código...) en texto pronunciable
+
+    Args:
+        texto: Respuesta tal como se muestra en el chat
+        max_chars: Presupuesto de caracteres del enunciado (0 = sin límite)
+
+    Returns:
+        str: Texto listo para el TTS (puede quedar vacío)
+    """
+    if not texto:
+        return ""
+
+    # Bloques: se reemplazan por un aviso (una sola vez aunque haya varios seguidos)
+    texto = _BLOQUE_CODIGO.sub(f"\n{AVISO_CODIGO}\n", texto)
+    texto = _TABLA.sub(f"\n{AVISO_TABLA}\n", texto)
+    texto = _CITA_FUENTE.sub("", texto)
+
+    # Enlaces y URLs
+    texto = _IMAGEN.sub(r'\1', texto)
+    texto = _ENLACE_MD.sub(r'\1', texto)
+    texto = _URL.sub(_reemplazar_url, texto)
+
+    # Código en línea: se lee si es corto
+    texto = _CODIGO_LINEA.sub(
+        lambda m: m.group(1) if len(m.group(1)) <= CODIGO_LINEA_MAX_CHARS else "un fragmento de código",
+        texto
+    )
+
+    # Estructura markdown
+    texto = _REGLA.sub("", texto)
+    texto = _ENCABEZADO.sub("", texto)
+    texto = _VINETA.sub("", texto)
+    for patron, reemplazo in _ENFASIS:
+        texto = patron.sub(reemplazo, texto)
+
+    texto = _PARENTESIS.sub(_reemplazar_parentesis, texto)
+    texto = _EMOJI.sub("", texto)
+    texto = _lineas_a_oraciones(texto)
+
+    # Espacios y puntuación sueltos
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s+([.,;:!?…])', r'\1', texto)
+    texto = re.sub(r'([.!?…])(?:\s+\.)+', r'\1', texto)
+    texto = re.sub(r'\b(' + re.escape(AVISO_CODIGO) + r')(?:\s+\1)+', r'\1', texto)
+    texto = texto.strip()
+
+    return aplicar_presupuesto(texto, max_chars)
+
+
+if __name__ == "__main__":
+    ejemplos = [
+        "La fotosíntesis es un proceso biológico... (Fuente: https://es.wikipedia.org/wiki/Fotos%C3%ADntesis)",
+        "## Pasos\n1. Abre **Python**\n2. Ejecuta `print('hola')`\n\n```python\nprint('hola')\n```\n"
+        "Más info en https://docs.python.org/3/tutorial/ 😊",
+        "| Col | Val |\n|---|---|\n| a | 1 |\nEso es todo (una aclaración bastante larga que no vale la pena leer).",
+    ]
+    for ejemplo in ejemplos:
+        print(repr(ejemplo))
+        print("  →", repr(preparar_para_voz(ejemplo)))
+    print(repr(preparar_para_voz("Oración número uno. " * 40, max_chars=100)))
@@ -0,0 +1,244 @@
+"""
+Detección de actividad de voz (VAD) - Clasificador por marcos en NumPy
+Cada marco de ~20 ms se clasifica por energía sobre el piso de ruido y por
+la forma de su espectro (energía en la banda de voz y planitud). Un
+autómata con histéresis abre la frase tras unos marcos de voz seguidos y
+la cierra tras VAD_HANGOVER_MS de silencio, en lugar de esperar la pausa
+fija de SpeechRecognition. Los últimos VAD_PREROLL_MS antes de abrir la
+frase se le anteponen: las consonantes iniciales, más débiles que el
+umbral, no se pierden ("…sca en google").
+"""
+import logging
+from collections import deque
+
+import numpy as np
+
+from config.settings import (
+    VAD_FRAME_MS, VAD_ONSET_MS, VAD_PREROLL_MS, VAD_HANGOVER_MS, VAD_MIN_VOICE_MS,
+    VAD_SPEECH_BAND_MIN, VAD_FLATNESS_MAX, PHRASE_TIME_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+_TIPOS_PCM = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def pcm_a_float(datos, ancho_muestra=2) -> np.ndarray:
+    """PCM entero con signo a float64 (misma escala que las muestras)"""
+    return np.frombuffer(datos, dtype=_TIPOS_PCM[ancho_muestra]).astype(np.float64)
+
+
+def float_a_pcm(x, ancho_muestra=2) -> bytes:
+    """Inverso de pcm_a_float (recorta al rango del tipo entero)"""
+    maximo = 2 ** (8 * ancho_muestra - 1)
+    return np.clip(np.round(x), -maximo, maximo - 1).astype(_TIPOS_PCM[ancho_muestra]).tobytes()
+
+
+class ClasificadorMarcos:
+    """Decide, marco a marco, si hay voz"""
+
+    def __init__(self, frecuencia, marco_ms=VAD_FRAME_MS,
+                 banda_min=VAD_SPEECH_BAND_MIN, planitud_max=VAD_FLATNESS_MAX):
+        self.frecuencia = frecuencia
+        self.muestras_marco = max(1, int(frecuencia * marco_ms / 1000))
+        self.banda_min = banda_min
+        self.planitud_max = planitud_max
+
+        self._ventana = np.hanning(self.muestras_marco)
+        frecuencias = np.fft.rfftfreq(self.muestras_marco, 1.0 / frecuencia)
+        self._banda_voz = (frecuencias >= 300) & (frecuencias <= 3400)
+
+    def clasificar(self, marcos, umbral):
+        """
+        Args:
+            marcos: Matriz (n_marcos, muestras_marco) en float
+            umbral: Energía RMS mínima de un marco de voz
+
+        Returns:
+            tuple: (es_voz bool[n], rms float[n])
+        """
+        rms = np.sqrt(np.mean(marcos * marcos, axis=1))
+        espectro = np.abs(np.fft.rfft(marcos * self._ventana, axis=1)) ** 2 + 1e-10
+        total = espectro.sum(axis=1)
+        banda = espectro[:, self._banda_voz].sum(axis=1) / total
+        planitud = np.exp(np.mean(np.log(espectro), axis=1)) / np.mean(espectro, axis=1)
+        es_voz = (rms > umbral) & (banda >= self.banda_min) & (planitud <= self.planitud_max)
+        return es_voz, rms
+
+
+class SegmentadorVAD:
+    """
+    Convierte el flujo de bloques de captura en frases
+
+    Estados: silencio → (VAD_ONSET_MS de voz) → frase → (VAD_HANGOVER_MS
+    de silencio o PHRASE_TIME_LIMIT) → silencio.
+    """
+
+    def __init__(self, frecuencia, ancho_muestra, ruido, marco_ms=VAD_FRAME_MS,
+                 inicio_ms=VAD_ONSET_MS, hangover_ms=VAD_HANGOVER_MS,
+                 min_voz_ms=VAD_MIN_VOICE_MS, max_frase=PHRASE_TIME_LIMIT, umbral_fijo=None,
+                 oyente=None, preroll_ms=VAD_PREROLL_MS, eco=None, perfil=None):
+        """
+        Args:
+            frecuencia: Frecuencia de muestreo
+            ancho_muestra: Bytes por muestra
+            ruido: PisoRuido (umbral de energía y seguimiento del ruido)
+            marco_ms: Duración del marco de análisis
+            inicio_ms: Voz continua necesaria para abrir una frase
+            hangover_ms: Silencio que cierra una frase
+            min_voz_ms: Voz mínima para publicar una frase
+            max_frase: Duración máxima de una frase (segundos)
+            umbral_fijo: Umbral de energía fijo (None = el del piso de ruido)
+            oyente: Callback opcional (evento, datos) llamado en el hilo de captura:
+                    "inicio" (audio ya acumulado), "audio" (cada marco de la frase),
+                    "fin" ((audio, inicio, fin), o None si la frase se descartó)
+            preroll_ms: Audio previo al inicio de la voz que se incluye en la frase
+            eco: CanceladorEco opcional; mientras suena el TTS la voz debe
+                 superar el eco residual (y el eco no se toma como ruido)
+            perfil: PerfilRuido opcional que aprende el espectro de los marcos sin voz
+        """
+        self.frecuencia = frecuencia
+        self.ancho_muestra = ancho_muestra
+        self.ruido = ruido
+        self.umbral_fijo = umbral_fijo
+        self.oyente = oyente
+        self.eco = eco
+        self.perfil = perfil
+        self.clasificador = ClasificadorMarcos(frecuencia, marco_ms)
+
+        self.n = self.clasificador.muestras_marco
+        self.duracion_marco = self.n / frecuencia
+        self.marcos_inicio = max(1, round(inicio_ms / 1000 / self.duracion_marco))
+        self.marcos_hangover = max(1, round(hangover_ms / 1000 / self.duracion_marco))
+        self.marcos_min_voz = max(1, round(min_voz_ms / 1000 / self.duracion_marco))
+        self.marcos_max = max(1, round(max_frase / self.duracion_marco))
+
+        self._resto = b""
+        self._previos = deque(maxlen=max(0, round(preroll_ms / 1000 / self.duracion_marco)))
+        self._candidatos = []  # Marcos de voz seguidos antes de abrir la frase
+        self._frase = []       # Marcos de la frase abierta
+        self._voz_en_frase = 0
+        self._silencio = 0
+        self._inicio = None
+
+    @property
+    def en_frase(self) -> bool:
+        return bool(self._frase)
+
+    @property
+    def inicio_frase(self):
+        return self._inicio
+
+    @property
+    def silencio_actual(self) -> float:
+        """Segundos de silencio al final de la frase en curso (inf si no hay frase)"""
+        return self._silencio * self.duracion_marco if self._frase else float("inf")
+
+    def umbral(self) -> float:
+        return self.umbral_fijo if self.umbral_fijo is not None else self.ruido.umbral()
+
+    def procesar(self, bloque, instante):
+        """
+        Procesa un bloque de captura
+
+        Args:
+            bloque: Bytes PCM
+            instante: time.monotonic() del final del bloque
+
+        Returns:
+            list: Frases completadas como (audio, inicio, fin)
+        """
+        datos = self._resto + bloque
+        bytes_marco = self.n * self.ancho_muestra
+        n_marcos = len(datos) // bytes_marco
+        self._resto = datos[n_marcos * bytes_marco:]
+        if n_marcos == 0:
+            return []
+
+        crudos = datos[:n_marcos * bytes_marco]
+        marcos = pcm_a_float(crudos, self.ancho_muestra).reshape(n_marcos, self.n)
+        umbral = self.umbral()
+        eco_activo = self.eco is not None and self.eco.activo(instante)
+        if eco_activo:
+            umbral = max(umbral, self.eco.umbral())
+        es_voz, rms = self.clasificador.clasificar(marcos, umbral)
+
+        # Instante de fin de cada marco (el resto queda después del último)
+        pendiente = len(self._resto) // self.ancho_muestra / self.frecuencia
+        fines = instante - pendiente - self.duracion_marco * np.arange(n_marcos - 1, -1, -1)
+
+        completas = []
+        for i in range(n_marcos):
+            marco = crudos[i * bytes_marco:(i + 1) * bytes_marco]
+            if not es_voz[i]:
+                if eco_activo:
+                    if not self.en_frase:  # los valles de la voz del usuario no son eco
+                        self.eco.observar(float(rms[i]), self.duracion_marco)
+                else:
+                    self.ruido.observar(float(rms[i]), self.duracion_marco, False)
+                    if self.perfil is not None and not self.en_frase:
+                        self.perfil.observar(marcos[i], self.duracion_marco)
+            frase = self._avanzar(marco, bool(es_voz[i]), float(fines[i]))
+            if frase:
+                completas.append(frase)
+        return completas
+
+    def cerrar(self, instante):
+        """Cierra la frase en curso (fin del audio)"""
+        return self._terminar(instante)
+
+    def _avanzar(self, marco, es_voz, fin):
+        if not self._frase:
+            if not es_voz:
+                # Los candidatos que no llegaron a abrir frase pasan al pre-roll
+                self._previos.extend(self._candidatos)
+                self._previos.append(marco)
+                self._candidatos = []
+                return None
+            self._candidatos.append(marco)
+            if len(self._candidatos) < self.marcos_inicio:
+                return None
+            # Abrir la frase con el pre-roll antes del primer marco de voz
+            self._voz_en_frase = len(self._candidatos)
+            self._frase = list(self._previos) + self._candidatos
+            self._previos.clear()
+            self._candidatos = []
+            self._silencio = 0
+            self._inicio = fin - len(self._frase) * self.duracion_marco
+            self._notificar("inicio", b"".join(self._frase))
+            return None
+
+        self._frase.append(marco)
+        self._notificar("audio", marco)
+        if es_voz:
+            self._voz_en_frase += 1
+            self._silencio = 0
+        else:
+            self._silencio += 1
+
+        if self._silencio >= self.marcos_hangover or len(self._frase) >= self.marcos_max:
+            return self._terminar(fin)
+        return None
+
+    def _terminar(self, fin):
+        if not self._frase:
+            return None
+        frase, voz, inicio = self._frase, self._voz_en_frase, self._inicio
+        self._frase = []
+        self._candidatos = []
+        self._silencio = 0
+        self._inicio = None
+        if voz < self.marcos_min_voz:
+            logger.debug(f"Frase descartada: {voz * self.duracion_marco * 1000:.0f} ms de voz")
+            self._notificar("fin", None)
+            return None
+        resultado = (b"".join(frase), inicio, fin)
+        self._notificar("fin", resultado)
+        return resultado
+
+    def _notificar(self, evento, datos):
+        if self.oyente is not None:
+            try:
+                self.oyente(evento, datos)
+            except Exception as e:
+                logger.error(f"Error en oyente del VAD ({evento}): {e}")